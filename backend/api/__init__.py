@@ -3,7 +3,10 @@ __all__ = {
     'auth_router',
     'student_router',
     'subject_router',
-    'group_router'
+    'group_router',
+    'export_router',
+    'analytics_router',
+    'exam_router'
 }
 
 from backend.api.user import user_router
@@ -11,3 +14,6 @@ from backend.api.auth import auth_router
 from backend.api.student import student_router
 from backend.api.subject import subject_router
 from backend.api.groups import group_router
+from backend.api.export import export_router
+from backend.api.analytics import analytics_router
+from backend.api.exam import exam_router
@@ -0,0 +1,5 @@
+__all__ = {
+    'analytics_router'
+}
+
+from .view import router as analytics_router
@@ -0,0 +1,171 @@
+"""
+Exam performance statistics.
+
+The score histogram, (group or subject, score) -> number of exams, is summed
+from the trigger-maintained ``group_score_stats`` table and returned as three
+columnar arrays in a single row. Scores are small integers, so the histogram
+has at most a few rows per group no matter how many exams there are. Mean,
+median, percentiles, pass rate and distribution are then computed for all
+groups at once with NumPy; percentiles are exact (linear interpolation, as in
+``numpy.percentile``) because the histogram holds every score.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.analytics.models import PerformanceModel, ScoreStatsModel, GroupStatsModel
+from backend.api.auth.scoping import scope_groups
+from backend.config import rpcfg
+from backend.database.tables import Group, GroupScoreStats
+from backend.database.tables.student import Subject
+
+PERCENTILES = (10, 25, 75, 90)
+
+# Ключ в group_score_stats для студентов без группы и экзаменов без предмета
+NO_KEY = 0
+
+
+def _histogram_query(by: str, semester: Optional[int], year: Optional[int],
+                     group_id: Optional[int], subject_id: Optional[int], current_user: dict):
+    key = GroupScoreStats.group_id if by == 'group' else GroupScoreStats.subject_id
+
+    histogram = scope_groups(
+        select(key.label('key'), GroupScoreStats.score, func.sum(GroupScoreStats.exams).label('n')),
+        GroupScoreStats.group_id, current_user
+    )
+    if semester is not None:
+        histogram = histogram.where(GroupScoreStats.semester == semester)
+    if year is not None:
+        histogram = histogram.where(GroupScoreStats.year == year)
+    if group_id is not None:
+        histogram = histogram.where(GroupScoreStats.group_id == group_id)
+    if subject_id is not None:
+        histogram = histogram.where(GroupScoreStats.subject_id == subject_id)
+
+    histogram = histogram.group_by(key, GroupScoreStats.score).subquery()
+    return select(
+        func.array_agg(histogram.c.key),
+        func.array_agg(histogram.c.score),
+        func.array_agg(histogram.c.n)
+    )
+
+
+def summarize(keys: np.ndarray, scores: np.ndarray, counts: np.ndarray, pass_score: int) -> list[dict]:
+    """
+    Statistics per key from histogram arrays: ``counts[i]`` exams of ``keys[i]``
+    got ``scores[i]``. Returns one dict per distinct key, ordered by key.
+    """
+    order = np.lexsort((scores, keys))
+    keys, scores, counts = keys[order], scores[order], counts[order]
+
+    # Одинаковые пары (ключ, оценка) складываются в одну строку
+    distinct = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (scores[1:] != scores[:-1])])
+    keys, scores, counts = keys[distinct], scores[distinct], np.add.reduceat(counts, distinct)
+
+    groups, first = np.unique(keys, return_index=True)
+    last = np.append(first[1:], len(keys)) - 1
+
+    totals = np.add.reduceat(counts, first)
+    means = np.add.reduceat(scores * counts, first) / totals
+    passed = np.add.reduceat(np.where(scores >= pass_score, counts, 0), first)
+
+    # Сквозная нумерация экзаменов: экзамены с рангами cum[i - 1]..cum[i] - 1
+    # имеют оценку scores[i]; ранги группы начинаются с starts
+    cum = np.cumsum(counts)
+    starts = cum[first] - counts[first]
+
+    def quantile(q: float) -> np.ndarray:
+        position = starts + q * (totals - 1)
+        lower = np.floor(position).astype(np.int64)
+        fraction = position - lower
+        low = scores[np.searchsorted(cum, lower, side='right')]
+        high = scores[np.searchsorted(cum, np.minimum(lower + 1, starts + totals - 1), side='right')]
+        return low + (high - low) * fraction
+
+    medians = quantile(0.5)
+    percentiles = {f'p{p}': quantile(p / 100) for p in PERCENTILES}
+
+    return [
+        {
+            'key': int(groups[i]),
+            'count': int(totals[i]),
+            'mean': round(float(means[i]), 3),
+            'median': float(medians[i]),
+            'percentiles': {name: float(values[i]) for name, values in percentiles.items()},
+            'min': int(scores[first[i]]),
+            'max': int(scores[last[i]]),
+            'pass_rate': round(float(passed[i] / totals[i]), 4),
+            'distribution': {
+                int(score): int(count)
+                for score, count in zip(scores[first[i]:last[i] + 1], counts[first[i]:last[i] + 1])
+            }
+        }
+        for i in range(len(groups))
+    ]
+
+
+async def get_performance(
+        by: str,
+        semester: Optional[int],
+        year: Optional[int],
+        group_id: Optional[int],
+        subject_id: Optional[int],
+        session: AsyncSession,
+        current_user: dict
+) -> PerformanceModel:
+    """
+    Статистика успеваемости по группам или по предметам.
+
+    Гистограмма оценок загружается одним запросом, статистика считается
+    векторно по всем группам сразу; вторым запросом подгружаются имена.
+    Преподаватель видит только оценки закрепленных за ним групп.
+
+    Args:
+        by: 'group' или 'subject'
+        semester: Фильтр по семестру
+        year: Фильтр по году сдачи
+        group_id: Фильтр по группе
+        subject_id: Фильтр по предмету
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        PerformanceModel: Статистика по каждой группе/предмету и по всей выборке
+    """
+    keys, scores, counts = (await session.execute(
+        _histogram_query(by, semester, year, group_id, subject_id, current_user)
+    )).one()
+
+    if not keys:
+        return PerformanceModel(by=by, semester=semester, year=year, total=None, items=[])
+
+    keys = np.array(keys, dtype=np.int64)
+    scores = np.array(scores, dtype=np.int64)
+    counts = np.array(counts, dtype=np.int64)
+
+    items = summarize(keys, scores, counts, rpcfg.PASS_SCORE)
+    total = summarize(np.zeros_like(keys), scores, counts, rpcfg.PASS_SCORE)[0]
+
+    model = Group if by == 'group' else Subject
+    names = dict((await session.execute(
+        select(model.id, model.name).where(model.id.in_([item['key'] for item in items]))
+    )).all())
+
+    return PerformanceModel(
+        by=by,
+        semester=semester,
+        year=year,
+        total=ScoreStatsModel(**{k: v for k, v in total.items() if k != 'key'}),
+        items=[
+            GroupStatsModel(
+                id=item['key'] if item['key'] != NO_KEY else None,
+                name=names.get(item['key']),
+                **{k: v for k, v in item.items() if k != 'key'}
+            )
+            for item in items
+        ]
+    )
@@ -0,0 +1,27 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ScoreStatsModel(BaseModel):
+    count: int
+    mean: float
+    median: float
+    percentiles: Dict[str, float]   # 'p10', 'p25', 'p75', 'p90'
+    min: int
+    max: int
+    pass_rate: float                # доля оценок не ниже REPORT_PASS_SCORE
+    distribution: Dict[int, int]    # оценка -> число экзаменов
+
+
+class GroupStatsModel(ScoreStatsModel):
+    id: Optional[int]               # None - студенты без группы / экзамены без предмета
+    name: Optional[str]
+
+
+class PerformanceModel(BaseModel):
+    by: str
+    semester: Optional[int]
+    year: Optional[int]
+    total: Optional[ScoreStatsModel]
+    items: List[GroupStatsModel]
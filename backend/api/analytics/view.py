@@ -0,0 +1,59 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, status
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.auth.privileges import require, TEACHER
+from backend.database import profiles
+from backend.database.engine import create_session
+from backend.api.analytics import crud
+from backend.api.analytics.models import PerformanceModel
+
+router = APIRouter(prefix='/api/analytics', tags=['Analytics'])
+
+
+@router.get(
+    '/performance',
+    response_model=PerformanceModel,
+    status_code=status.HTTP_200_OK,
+    summary="Exam performance statistics",
+    description=(
+            "Mean, median, percentiles, score distribution and pass rate per group or per subject, "
+            "plus totals over the whole selection. Filterable by semester, year, group and subject. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Performance statistics"},
+        403: {"description": "Guest access forbidden"}
+    },
+    dependencies=[Depends(profiles.query_budget('list'))]
+)
+async def get_performance(
+        by: Literal['group', 'subject'] = Query('group', description="Group statistics by group or subject"),
+        semester: Optional[int] = Query(None, ge=1),
+        year: Optional[int] = Query(None, ge=1900, le=9999),
+        group_id: Optional[int] = None,
+        subject_id: Optional[int] = None,
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> PerformanceModel:
+    """
+    Analytics with:
+    - Score histogram fetched as columnar arrays in one query
+    - Vectorised statistics for all groups at once
+    - Privilege check
+
+    Args:
+        by: group or subject
+        semester: Semester filter
+        year: Exam year filter
+        group_id: Group filter
+        subject_id: Subject filter
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Statistics per group/subject and in total
+    """
+    return await crud.get_performance(by, semester, year, group_id, subject_id, session, current_user)
@@ -1,3 +1,9 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime
 
 from jose import jwt, JWTError
@@ -9,12 +15,69 @@ from passlib.context import CryptContext
 
 from backend.config import becfg
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=becfg.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="oauth2/authorize")
 
 secret_key = becfg.SECRET_KEY
 algorithm = becfg.ALGORITHM
 
+class TokenCache:
+    """
+    LRU of verified tokens: sha256(token) -> (claims, exp).
+
+    A token found here was already decoded with signature verification, so
+    only its expiry is rechecked. Entries are dropped at ``exp``; tokens
+    without ``exp`` are not cached. ``get_current_user`` is a sync
+    dependency and runs in FastAPI's thread pool, hence the lock.
+    """
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._items.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict, exp) -> None:
+        if not isinstance(exp, (int, float)) or self.max_items <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._items[key] = (claims, float(exp))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'items': len(self._items),
+            'max_items': self.max_items,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(becfg.TOKEN_CACHE_SIZE)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         401,
@@ -22,6 +85,10 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cached = token_cache.get(token)
+    if cached is not None:
+        return dict(cached)
+
     try:
         payload = jwt.decode(token, secret_key, algorithms=[algorithm])
         uid: int = payload.get("id")
@@ -31,7 +98,9 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         if uid is None or login is None:
             raise credentials_exception
 
-        return {"id": uid, "login": login, "privilege": privilege}
+        user = {"id": uid, "login": login, "privilege": privilege}
+        token_cache.put(token, user, payload.get("exp"))
+        return dict(user)
     except JWTError:
         raise credentials_exception
 
@@ -46,3 +115,33 @@ def verify_password(password, hashed_password, salt=''):
 def get_password_hash(password, salt=''):
     return bcrypt_context.hash(password + salt)
 
+
+# bcrypt освобождает GIL, поэтому потоков достаточно; число потоков ограничивает
+# одновременные хеширования, остальные ждут в очереди пула
+_hash_pool: ThreadPoolExecutor | None = None
+
+
+def _get_hash_pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(max_workers=becfg.HASH_WORKERS, thread_name_prefix='bcrypt')
+    return _hash_pool
+
+
+async def check_password(password, hashed_password, salt='') -> bool:
+    """``verify_password`` in the hashing pool, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_hash_pool(), verify_password, password, hashed_password, salt
+    )
+
+
+async def hash_password(password, salt='') -> str:
+    """``get_password_hash`` in the hashing pool, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), get_password_hash, password, salt)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=True, cancel_futures=True)
+        _hash_pool = None
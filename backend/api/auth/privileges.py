@@ -0,0 +1,39 @@
+"""
+Privilege levels and the dependency that enforces them.
+
+``require(level)`` is declared in the route signature before the session
+dependency, so FastAPI rejects an under-privileged caller before a database
+session is opened or a pooled connection is checked out.
+"""
+from functools import cache
+
+from fastapi import Depends, HTTPException, status
+
+from backend.api.auth.auth import get_current_user
+
+# Уровни привилегий
+GUEST = 0
+TEACHER = 1
+ADMIN = 2
+
+_ROLE_NAMES = {TEACHER: 'преподавателя', ADMIN: 'администратора'}
+
+
+@cache
+def require(level: int):
+    """
+    Dependency returning the current user if their privilege is at least ``level``.
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+    """
+    def dependency(current_user: dict = Depends(get_current_user)) -> dict:
+        # Токен без уровня привилегий считается гостевым
+        if (current_user.get('privilege') or GUEST) < level:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Недостаточно прав: требуются права {_ROLE_NAMES.get(level, level)}"
+            )
+        return current_user
+
+    return dependency
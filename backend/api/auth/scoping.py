@@ -0,0 +1,40 @@
+"""
+Row-level scoping of teacher-visible data.
+
+A teacher sees only the groups assigned to them in ``teacher_groups`` and the
+students of those groups; administrators see everything. The restriction is
+an inner join with the assignment table added to the query itself, so rows
+are filtered by the database - through the (user_id, group_id) primary key
+and the students' (group_id, id) index - rather than loaded and dropped in
+Python.
+"""
+from sqlalchemy import and_
+
+from backend.api.auth.privileges import GUEST, ADMIN
+from backend.database.tables import TeacherGroup
+
+
+def is_scoped(current_user: dict) -> bool:
+    """Whether ``current_user`` sees only assigned groups."""
+    return (current_user.get('privilege') or GUEST) < ADMIN
+
+
+def scope_groups(query, group_column, current_user: dict):
+    """
+    Restricts ``query`` to rows whose ``group_column`` is a group assigned to
+    ``current_user``. Rows without a group are hidden from teachers.
+
+    The join cannot duplicate rows: (user_id, group_id) is the primary key.
+    """
+    if not is_scoped(current_user):
+        return query
+
+    return query.join(
+        TeacherGroup,
+        and_(TeacherGroup.group_id == group_column, TeacherGroup.user_id == current_user['id'])
+    )
+
+
+def scope_key(current_user: dict) -> str:
+    """Identifies the rows ``current_user`` can see, for cache keys and ETags."""
+    return f"teacher:{current_user['id']}" if is_scoped(current_user) else 'all'
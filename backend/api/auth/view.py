@@ -6,7 +6,7 @@ from datetime import timedelta
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.api.auth.auth import create_access_token, verify_password
+from backend.api.auth.auth import create_access_token, check_password
 from backend.api.auth.models import Credentials, Token
 from backend.database.tables import User
 from backend.database.engine import create_session
@@ -22,7 +22,7 @@ async def login(response: Response, creds: Credentials, session: AsyncSession =
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not verify_password(creds.password, user.password, user.salt):
+    if not await check_password(creds.password, user.password, user.salt):
         raise HTTPException(status_code=401, detail="Incorrect credentials")
 
     payload = {"id": user.id, "login": user.login, "privilege": user.privilege}
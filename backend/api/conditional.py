@@ -0,0 +1,51 @@
+"""
+Conditional GET for list endpoints.
+
+The ETag is derived from the request URL, the versions of the tables the
+response is built from and the caller's visibility scope. Only the version
+lookup runs before the comparison, so a matching If-None-Match is answered
+with 304 without the list query.
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.versions import table_versions, digest
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag``."""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in (t.strip() for t in if_none_match.split(','))
+
+
+async def not_modified(
+        request: Request,
+        response: Response,
+        session: AsyncSession,
+        tables: Sequence[str],
+        *scope
+) -> Optional[Response]:
+    """
+    Returns a 304 response if the client's copy is current; otherwise sets
+    the ETag on ``response`` and returns None.
+
+    Args:
+        request: Incoming request (URL and If-None-Match)
+        response: Outgoing response of the endpoint
+        session: Database session
+        tables: Tables the response is built from
+        scope: Extra key parts, e.g. the caller's visibility scope
+    """
+    versions = await table_versions(session, tables)
+    etag = f'"{digest(request.url.path, request.url.query, *scope, *versions)}"'
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    response.headers['ETag'] = etag
+    return None
@@ -0,0 +1,5 @@
+__all__ = {
+    'exam_router'
+}
+
+from .view import router as exam_router
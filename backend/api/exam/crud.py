@@ -0,0 +1,347 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, null
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.exam.models import (
+    ExamModel,
+    CreateExamModel,
+    UpdateExamModel,
+    GradebookModel,
+    GradebookRowModel,
+    GradebookSubjectModel,
+    GradebookSubmitModel,
+    GradeEntryModel
+)
+from backend.api.auth.scoping import is_scoped, scope_groups
+from backend.api.exam.grades import Grade, write_grades, grade_batcher
+from backend.database.bulk import bulk_update
+from backend.database.validation import missing_ids, delete_existing
+from backend.database.tables import Group, Student
+from backend.database.tables.student import Exam, Subject
+
+
+def _year_range(year: int) -> tuple[datetime, datetime]:
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
+async def create_exam(exam: CreateExamModel, session: AsyncSession, current_user: dict) -> ExamModel:
+    """
+    Создает запись об экзамене.
+
+    Args:
+        exam: Данные экзамена
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        ExamModel: Созданный экзамен
+
+    Raises:
+        HTTPException: 404 - Студент или предмет не найден
+    """
+    if not await session.get(Student, exam.student_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Студент {exam.student_id} не найден")
+    if not await session.get(Subject, exam.subject_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Предмет {exam.subject_id} не найден")
+
+    # Год по умолчанию берется из модели; оценка None - экзамен еще не сдан
+    new_exam = Exam(**exam.model_dump(exclude={'year'} if exam.year is None else set()))
+    if exam.score is None:
+        # Иначе вместо None подставится default=0 модели - неудовлетворительная оценка
+        new_exam.score = null()
+    session.add(new_exam)
+    await session.commit()
+    await session.refresh(new_exam)
+    return ExamModel.model_validate(new_exam)
+
+
+async def get_exams(
+        session: AsyncSession,
+        current_user: dict,
+        exam_id: Optional[int] = None,
+        student_id: Optional[int] = None,
+        subject_id: Optional[int] = None,
+        group_id: Optional[int] = None,
+        semester: Optional[int] = None,
+        year: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+) -> List[ExamModel]:
+    """
+    Список экзаменов с фильтрами и keyset-пагинацией по id.
+
+    Преподаватель видит только экзамены студентов закрепленных за ним групп.
+
+    Args:
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+        exam_id: Конкретный экзамен
+        student_id: Фильтр по студенту
+        subject_id: Фильтр по предмету
+        group_id: Фильтр по группе студента
+        semester: Фильтр по семестру
+        year: Фильтр по году сдачи
+        after_id: Курсор (id последнего экзамена предыдущей страницы)
+        limit: Размер страницы
+
+    Returns:
+        List[ExamModel]: Экзамены по возрастанию id
+
+    Raises:
+        HTTPException: 404 - Экзамен не найден
+    """
+    query = select(Exam)
+    if group_id is not None or is_scoped(current_user):
+        query = scope_groups(query.join(Student, Student.id == Exam.student_id), Student.group_id, current_user)
+    if exam_id is not None:
+        query = query.where(Exam.id == exam_id)
+    if student_id is not None:
+        query = query.where(Exam.student_id == student_id)
+    if subject_id is not None:
+        query = query.where(Exam.subject_id == subject_id)
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+    if semester is not None:
+        query = query.where(Exam.semester == semester)
+    if year is not None:
+        start, end = _year_range(year)
+        query = query.where(Exam.year >= start, Exam.year < end)
+    if after_id is not None:
+        query = query.where(Exam.id > after_id)
+
+    query = query.order_by(Exam.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    exams = (await session.execute(query)).scalars().all()
+    if exam_id is not None and not exams:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Экзамен {exam_id} не найден")
+    return [ExamModel.model_validate(exam) for exam in exams]
+
+
+async def update_exam(updates: List[UpdateExamModel], session: AsyncSession, current_user: dict) -> dict:
+    """
+    Пакетное обновление экзаменов.
+
+    Args:
+        updates: Список обновлений
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        dict: Статус операции
+
+    Raises:
+        HTTPException: 404 - Экзамен не найден
+    """
+    missing = await missing_ids(session, Exam, (u.id for u in updates))
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Экзамены {sorted(missing)} не найдены")
+
+    await bulk_update(session, Exam, [upd.model_dump(exclude_unset=True) for upd in updates])
+
+    await session.commit()
+    return {"status": "success", "updated": len(updates)}
+
+
+async def delete_exam(exam_ids: List[int], session: AsyncSession, current_user: dict) -> dict:
+    """
+    Удаляет экзамены по ID.
+
+    Args:
+        exam_ids: Список ID экзаменов
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        dict: Статус операции
+
+    Raises:
+        HTTPException: 404 - Экзамен не найден
+    """
+    missing = await delete_existing(session, Exam, exam_ids)
+    if missing:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Экзамены {sorted(missing)} не найдены")
+
+    await session.commit()
+    return {"status": "success", "deleted": len(exam_ids)}
+
+
+async def get_gradebook(group_id: int, semester: int, year: int, session: AsyncSession, current_user: dict) -> GradebookModel:
+    """
+    Ведомость группы за семестр: матрица студенты x предметы одним запросом.
+
+    Для каждой пары (студент, предмет) берется последний экзамен семестра;
+    оценки студента сворачиваются в массивы, отсортированные по предмету.
+    Колонки - предметы, по которым в группе есть хотя бы один экзамен.
+    Группа, не закрепленная за преподавателем, для него не существует.
+
+    Args:
+        group_id: ID группы
+        semester: Семестр
+        year: Год сдачи
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        GradebookModel: Предметы и строки оценок по студентам
+
+    Raises:
+        HTTPException: 404 - Группа не найдена
+    """
+    start, end = _year_range(year)
+    latest = (
+        select(Exam.student_id, Exam.subject_id, Exam.score)
+        .join(Student, Student.id == Exam.student_id)
+        .where(
+            Student.group_id == group_id,
+            Exam.subject_id.is_not(None),
+            Exam.semester == semester,
+            Exam.year >= start,
+            Exam.year < end
+        )
+        .distinct(Exam.student_id, Exam.subject_id)
+        .order_by(Exam.student_id, Exam.subject_id, Exam.id.desc())
+        .subquery()
+    )
+    by_subject = latest.c.subject_id
+    query = (
+        select(
+            Student.id,
+            Student.educational_id,
+            Student.surname,
+            Student.name,
+            Student.lastname,
+            func.array_agg(aggregate_order_by(latest.c.subject_id, by_subject)),
+            func.array_agg(aggregate_order_by(Subject.name, by_subject)),
+            func.array_agg(aggregate_order_by(latest.c.score, by_subject))
+        )
+        .outerjoin(latest, latest.c.student_id == Student.id)
+        .outerjoin(Subject, Subject.id == latest.c.subject_id)
+        .where(Student.group_id == group_id)
+        .group_by(Student.id)
+        .order_by(Student.surname, Student.name, Student.id)
+    )
+    rows = (await session.execute(scope_groups(query, Student.group_id, current_user))).all()
+
+    if not rows and await missing_ids(session, Group, [group_id], lambda q: scope_groups(q, Group.id, current_user)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группа {group_id} не найдена")
+
+    subjects: dict[int, str] = {}
+    for *_, subject_ids, names, _ in rows:
+        subjects.update((sid, name) for sid, name in zip(subject_ids, names) if sid is not None)
+    columns = {subject_id: i for i, subject_id in enumerate(sorted(subjects))}
+
+    matrix = []
+    for student_id, educational_id, surname, name, lastname, subject_ids, _, scores in rows:
+        cells: list[Optional[int]] = [None] * len(columns)
+        for subject_id, score in zip(subject_ids, scores):
+            if subject_id is not None:
+                cells[columns[subject_id]] = score
+        matrix.append(GradebookRowModel(
+            student_id=student_id,
+            educational_id=educational_id,
+            full_name=f"{surname} {name} {lastname or ''}".strip(),
+            scores=cells
+        ))
+
+    return GradebookModel(
+        group_id=group_id,
+        semester=semester,
+        year=year,
+        subjects=[GradebookSubjectModel(id=subject_id, name=subjects[subject_id]) for subject_id in columns],
+        rows=matrix
+    )
+
+
+async def submit_gradebook(
+        group_id: int,
+        semester: int,
+        year: int,
+        gradebook: GradebookSubmitModel,
+        session: AsyncSession,
+        current_user: dict
+) -> dict:
+    """
+    Записывает матрицу оценок группы за семестр одной set-based операцией.
+
+    Пустые ячейки (None) не меняются. Для заполненных обновляется последний
+    экзамен по предмету в этом семестре или создается новый.
+
+    Args:
+        group_id: ID группы
+        semester: Семестр
+        year: Год сдачи
+        gradebook: Предметы и строки оценок
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        dict: Число обновленных и созданных экзаменов
+
+    Raises:
+        HTTPException: 404 - Предмет не найден или студент не состоит в группе
+    """
+    grades = [
+        Grade(row.student_id, subject_id, semester, year, score)
+        for row in gradebook.rows
+        for subject_id, score in zip(gradebook.subject_ids, row.scores)
+        if score is not None
+    ]
+    if not grades:
+        return {"status": "success", "updated": 0, "inserted": 0}
+
+    missing = await missing_ids(session, Subject, {grade.subject_id for grade in grades})
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Предметы {sorted(missing)} не найдены")
+
+    requested = {grade.student_id for grade in grades}
+    in_group = (await session.execute(
+        select(Student.id).where(Student.id.in_(requested), Student.group_id == group_id)
+    )).scalars()
+    outside = requested - set(in_group)
+    if outside:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Студенты {sorted(outside)} не найдены в группе {group_id}"
+        )
+
+    updated, inserted = await write_grades(session, grades)
+
+    await session.commit()
+    return {"status": "success", "updated": updated, "inserted": inserted}
+
+
+async def enter_grade(grade: GradeEntryModel, current_user: dict) -> dict:
+    """
+    Выставляет одну оценку через write-behind буфер.
+
+    Ответ возвращается после фиксации пачки, в которую попала оценка.
+
+    Args:
+        grade: Ячейка ведомости и оценка
+        current_user: Данные пользователя
+
+    Returns:
+        dict: Статус операции и размер пачки
+
+    Raises:
+        HTTPException: 404 - Студент или предмет не найден
+    """
+    try:
+        batch = await grade_batcher.submit(
+            Grade(grade.student_id, grade.subject_id, grade.semester, grade.year, grade.score)
+        )
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Студент {grade.student_id} или предмет {grade.subject_id} не найден"
+        )
+
+    return {"status": "success", "batch": batch}
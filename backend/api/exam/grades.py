@@ -0,0 +1,205 @@
+"""
+Grade writes.
+
+A grade is a cell: (student, subject, semester, year) -> score. ``write_grades``
+stores any number of cells with one statement: the latest exam of each cell is
+updated, missing ones are inserted. It backs both the gradebook matrix upload
+and single-cell entry.
+
+Single-cell entry goes through ``GradeBatcher``, a write-behind buffer with
+group commit. Cells from all requests are queued in arrival order; one
+flusher takes up to ``max_rows`` of them, waiting at most ``max_delay``
+seconds after the first, writes them in one transaction and only then
+resolves the waiting requests. Batches are flushed one after another, so
+writes are applied in arrival order (per teacher in particular); within a
+batch the last write to a cell wins. If a batch fails, its cells are retried
+one by one so that a single bad cell does not reject the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import dbcfg
+from backend.database.engine import session_factory
+
+logger = logging.getLogger('uvicorn.error')
+
+# Ячейки передаются массивами: число параметров не зависит от числа оценок
+WRITE_GRADES = text("""
+    WITH cells AS (
+        SELECT * FROM unnest(
+            CAST(:student_ids AS integer[]), CAST(:subject_ids AS integer[]),
+            CAST(:semesters AS integer[]), CAST(:years AS integer[]), CAST(:scores AS integer[])
+        ) AS c (student_id, subject_id, semester, year, score)
+    ),
+    latest AS (
+        SELECT DISTINCT ON (c.student_id, c.subject_id, c.semester, c.year) e.id, c.score
+        FROM cells c
+        JOIN exams e
+          ON e.student_id = c.student_id AND e.subject_id = c.subject_id AND e.semester = c.semester
+         AND e.year >= make_timestamp(c.year, 1, 1, 0, 0, 0)
+         AND e.year < make_timestamp(c.year + 1, 1, 1, 0, 0, 0)
+        ORDER BY c.student_id, c.subject_id, c.semester, c.year, e.id DESC
+    ),
+    updated AS (
+        UPDATE exams e SET score = l.score, updated_at = localtimestamp(0)
+        FROM latest l
+        WHERE e.id = l.id AND e.score IS DISTINCT FROM l.score
+        RETURNING e.id
+    ),
+    inserted AS (
+        INSERT INTO exams (student_id, subject_id, semester, year, score, created_at, updated_at)
+        SELECT c.student_id, c.subject_id, c.semester, make_timestamp(c.year, 1, 1, 0, 0, 0), c.score,
+               localtimestamp(0), localtimestamp(0)
+        FROM cells c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM exams e
+            WHERE e.student_id = c.student_id AND e.subject_id = c.subject_id AND e.semester = c.semester
+              AND e.year >= make_timestamp(c.year, 1, 1, 0, 0, 0)
+              AND e.year < make_timestamp(c.year + 1, 1, 1, 0, 0, 0)
+        )
+        RETURNING id
+    )
+    SELECT (SELECT count(*) FROM updated), (SELECT count(*) FROM inserted)
+""")
+
+
+class Grade(NamedTuple):
+    student_id: int
+    subject_id: int
+    semester: int
+    year: int
+    score: int
+
+
+async def write_grades(session: AsyncSession, grades: Sequence[Grade]) -> tuple[int, int]:
+    """
+    Writes ``grades`` (unique cells) with one statement. Does not commit.
+
+    Returns:
+        (число обновленных экзаменов, число созданных экзаменов)
+    """
+    updated, inserted = (await session.execute(WRITE_GRADES, {
+        'student_ids': [g.student_id for g in grades],
+        'subject_ids': [g.subject_id for g in grades],
+        'semesters': [g.semester for g in grades],
+        'years': [g.year for g in grades],
+        'scores': [g.score for g in grades],
+    })).one()
+    return updated, inserted
+
+
+class GradeBatcher:
+    def __init__(self, max_rows: int, max_delay: float):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.batches = 0
+        self.grades = 0
+        self._pending: list[tuple[Grade, asyncio.Future]] = []
+        self._arrived: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._closing = False
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flushes everything already queued and stops the flusher."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._arrived.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, grade: Grade) -> int:
+        """
+        Queues ``grade`` and waits until its batch is committed.
+
+        Returns:
+            Размер пачки, в которой оценка была записана
+        """
+        if self._task is None or self._closing:
+            raise RuntimeError("Grade batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((grade, future))
+        self._arrived.set()
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+
+        # Отмена запроса не отменяет запись: оценка уже в очереди
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'grades': self.grades,
+            'pending': len(self._pending),
+            'average_batch': round(self.grades / self.batches, 1) if self.batches else 0.0,
+        }
+
+    async def _run(self) -> None:
+        while self._pending or not self._closing:
+            if not self._pending:
+                self._arrived.clear()
+                await self._arrived.wait()
+                continue
+
+            # Окно group commit: ждем, пока пачка наберется или истечет задержка
+            if len(self._pending) < self.max_rows and not self._closing:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_rows]
+            del self._pending[:self.max_rows]
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[Grade, asyncio.Future]]) -> None:
+        # Последняя запись в ячейку побеждает
+        cells = {}
+        for grade, _ in batch:
+            cells[grade[:4]] = grade
+
+        try:
+            async with session_factory() as session:
+                await write_grades(session, list(cells.values()))
+                await session.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, error=e)
+                return
+            logger.info(f"Grade batch of {len(batch)} failed, retrying one by one: {e}.")
+            for item in batch:
+                await self._flush([item])
+            return
+
+        self.batches += 1
+        self.grades += len(batch)
+        self._resolve(batch, result=len(batch))
+
+    @staticmethod
+    def _resolve(batch, result=None, error=None) -> None:
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+grade_batcher = GradeBatcher(dbcfg.GRADE_BATCH_ROWS, dbcfg.GRADE_BATCH_MS / 1000)
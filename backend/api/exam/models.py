@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ExamModel(BaseModel):
+    id: int
+    student_id: int | None
+    subject_id: int | None
+    semester: int | None
+    year: datetime | None
+    score: int | None
+
+    class Config:
+        from_attributes = True
+
+
+class CreateExamModel(BaseModel):
+    student_id: int
+    subject_id: int
+    semester: int = Field(1, ge=1)
+    year: datetime | None = None
+    score: int | None = Field(None, ge=0)
+
+    class Config:
+        from_attributes = True
+
+
+class UpdateExamModel(BaseModel):
+    id: int
+    student_id: Optional[int] = None
+    subject_id: Optional[int] = None
+    semester: Optional[int] = Field(None, ge=1)
+    year: Optional[datetime] = None
+    score: Optional[int] = Field(None, ge=0)
+
+    class Config:
+        from_attributes = True
+
+
+class GradeEntryModel(BaseModel):
+    student_id: int
+    subject_id: int
+    semester: int = Field(..., ge=1)
+    year: int = Field(..., ge=1900, le=9999)
+    score: int = Field(..., ge=0)
+
+
+class GradebookSubjectModel(BaseModel):
+    id: int
+    name: str
+
+
+class GradebookRowModel(BaseModel):
+    student_id: int
+    educational_id: str
+    full_name: str
+    scores: List[Optional[int]]     # по порядку subjects; None - оценки нет
+
+
+class GradebookModel(BaseModel):
+    group_id: int
+    semester: int
+    year: int
+    subjects: List[GradebookSubjectModel]
+    rows: List[GradebookRowModel]
+
+
+class GradebookSubmitRowModel(BaseModel):
+    student_id: int
+    scores: List[Optional[int]]     # по порядку subject_ids; None - не менять
+
+
+class GradebookSubmitModel(BaseModel):
+    subject_ids: List[int]
+    rows: List[GradebookSubmitRowModel]
+
+    @model_validator(mode='after')
+    def rows_match_subjects(self):
+        if len(set(self.subject_ids)) != len(self.subject_ids):
+            raise ValueError("subject_ids must be unique")
+        if len({row.student_id for row in self.rows}) != len(self.rows):
+            raise ValueError("student_id must be unique across rows")
+        for row in self.rows:
+            if len(row.scores) != len(self.subject_ids):
+                raise ValueError(f"Student {row.student_id}: expected {len(self.subject_ids)} scores")
+            if any(score is not None and score < 0 for score in row.scores):
+                raise ValueError(f"Student {row.student_id}: scores must be non-negative")
+        return self
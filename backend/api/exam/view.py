@@ -0,0 +1,316 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Response, status
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.auth.privileges import require, TEACHER, ADMIN
+from backend.api.exam import crud
+from backend.api.exam.models import (
+    ExamModel,
+    CreateExamModel,
+    UpdateExamModel,
+    GradebookModel,
+    GradebookSubmitModel,
+    GradeEntryModel
+)
+from backend.api.exam.grades import grade_batcher
+from backend.database import profiles
+from backend.database.engine import create_session
+
+router = APIRouter(prefix='/api/exam', tags=['Exam'])
+
+
+@router.post(
+    '',
+    response_model=ExamModel,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create exam",
+    description=(
+            "Records an exam result for a student and subject. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        201: {"description": "Exam created"},
+        403: {"description": "Insufficient privileges"},
+        404: {"description": "Student or subject not found"}
+    }
+)
+async def create_exam(
+        exam: CreateExamModel,
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> ExamModel:
+    """
+    Create exam with:
+    - Privilege check
+    - Student and subject existence validation
+
+    Args:
+        exam: Exam data
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Created exam
+    """
+    return await crud.create_exam(exam, session, current_user)
+
+
+@router.get(
+    '',
+    response_model=List[ExamModel],
+    status_code=status.HTTP_200_OK,
+    summary="Retrieve exams",
+    dependencies=[Depends(profiles.query_budget('list'))],
+    description=(
+            "Get exams filtered by ID, student, subject, group, semester and year. "
+            "Keyset pagination by ID. Requires authentication."
+    ),
+    responses={
+        200: {"description": "List of exams"},
+        403: {"description": "Guest access forbidden"},
+        404: {"description": "Exam not found"}
+    }
+)
+async def get_exams(
+        response: Response,
+        exam_id: int = Query(None, description="Filter by specific exam ID", ge=1),
+        student_id: int = Query(None, description="Filter by student ID", ge=1),
+        subject_id: int = Query(None, description="Filter by subject ID", ge=1),
+        group_id: int = Query(None, description="Filter by the student's group ID", ge=1),
+        semester: int = Query(None, description="Filter by semester", ge=1),
+        year: int = Query(None, description="Filter by exam year", ge=1900, le=9999),
+        after_id: int = Query(None, description="Return exams after this ID (keyset cursor)", ge=1),
+        limit: int = Query(None, description="Page size", ge=1, le=500),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> List[ExamModel]:
+    """
+    Retrieve exams with:
+    - Optional filters
+    - Keyset pagination
+
+    When a page is full, the cursor for the next page is returned in the
+    X-Next-After-Id header.
+
+    Args:
+        response: Outgoing response (pagination headers)
+        exam_id: Optional exam ID filter
+        student_id: Optional student filter
+        subject_id: Optional subject filter
+        group_id: Optional group filter
+        semester: Optional semester filter
+        year: Optional year filter
+        after_id: Keyset cursor
+        limit: Page size
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        List of exams
+    """
+    exams = await crud.get_exams(
+        session, current_user,
+        exam_id=exam_id, student_id=student_id, subject_id=subject_id, group_id=group_id,
+        semester=semester, year=year, after_id=after_id, limit=limit
+    )
+    if limit is not None and len(exams) == limit:
+        response.headers['X-Next-After-Id'] = str(exams[-1].id)
+    return exams
+
+
+@router.get(
+    '/gradebook',
+    response_model=GradebookModel,
+    status_code=status.HTTP_200_OK,
+    summary="Group gradebook",
+    dependencies=[Depends(profiles.query_budget('list'))],
+    description=(
+            "Students x subjects score matrix of a group for one semester, built by a single pivot query. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Score matrix"},
+        403: {"description": "Guest access forbidden"},
+        404: {"description": "Group not found"}
+    }
+)
+async def get_gradebook(
+        group_id: int = Query(..., description="Group ID", ge=1),
+        semester: int = Query(..., description="Semester", ge=1),
+        year: int = Query(..., description="Exam year", ge=1900, le=9999),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> GradebookModel:
+    """
+    Gradebook with:
+    - Latest exam per student and subject
+    - Pivot in one query
+
+    Args:
+        group_id: Group ID
+        semester: Semester
+        year: Exam year
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Subjects and per-student score rows
+    """
+    return await crud.get_gradebook(group_id, semester, year, session, current_user)
+
+
+@router.put(
+    '/gradebook',
+    status_code=status.HTTP_200_OK,
+    summary="Submit group gradebook",
+    description=(
+            "Writes a whole score matrix in one set-based statement: "
+            "existing exams of the semester are updated, missing ones inserted, empty cells left unchanged. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Updated and inserted counts"},
+        403: {"description": "Insufficient privileges"},
+        404: {"description": "Subject not found or student not in group"},
+        422: {"description": "Matrix shape mismatch"}
+    }
+)
+async def submit_gradebook(
+        gradebook: GradebookSubmitModel,
+        group_id: int = Query(..., description="Group ID", ge=1),
+        semester: int = Query(..., description="Semester", ge=1),
+        year: int = Query(..., description="Exam year", ge=1900, le=9999),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> dict:
+    """
+    Bulk grade submission with:
+    - Subject and group membership validation
+    - Single UPDATE + INSERT statement for the whole matrix
+
+    Args:
+        gradebook: Subject IDs and score rows
+        group_id: Group ID
+        semester: Semester
+        year: Exam year
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Operation status with counts
+    """
+    return await crud.submit_gradebook(group_id, semester, year, gradebook, session, current_user)
+
+
+@router.post(
+    '/grades',
+    status_code=status.HTTP_200_OK,
+    summary="Enter a single grade",
+    description=(
+            "Sets the score of one gradebook cell. Writes from all users are buffered and committed in "
+            "batches (group commit); the response is sent once the batch is durable. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Grade committed"},
+        403: {"description": "Insufficient privileges"},
+        404: {"description": "Student or subject not found"}
+    }
+)
+async def enter_grade(
+        grade: GradeEntryModel,
+        current_user: dict = Depends(require(TEACHER))
+) -> dict:
+    """
+    Grade entry with:
+    - Write-behind buffering
+    - Group commit, acknowledged after the batch is committed
+    - Arrival order preserved
+
+    Args:
+        grade: Gradebook cell and score
+        current_user: Authenticated user info
+
+    Returns:
+        Operation status with the size of the committed batch
+    """
+    return await crud.enter_grade(grade, current_user)
+
+
+@router.get('/grades/stats', summary="Grade batching statistics")
+async def get_grade_stats(current_user: dict = Depends(require(ADMIN))) -> dict:
+    return grade_batcher.stats()
+
+
+@router.put(
+    '',
+    status_code=status.HTTP_200_OK,
+    summary="Bulk update exams",
+    description=(
+            "Update multiple exams. "
+            "Requires teacher/admin privileges. "
+            "Validates existence."
+    ),
+    responses={
+        200: {"description": "Update success count"},
+        403: {"description": "Insufficient privileges"},
+        404: {"description": "Some exams not found"}
+    }
+)
+async def update_exam(
+        updates: List[UpdateExamModel],
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> dict:
+    """
+    Bulk update exams with:
+    - Existence validation
+    - Privilege check
+
+    Args:
+        updates: List of exam updates
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Operation status with update count
+    """
+    return await crud.update_exam(updates, session, current_user)
+
+
+@router.delete(
+    '',
+    status_code=status.HTTP_200_OK,
+    summary="Bulk delete exams",
+    description=(
+            "Delete multiple exams by ID. "
+            "Requires teacher/admin privileges. "
+            "Validates existence."
+    ),
+    responses={
+        200: {"description": "Deletion success count"},
+        403: {"description": "Insufficient privileges"},
+        404: {"description": "Some exams not found"}
+    }
+)
+async def delete_exam(
+        exam_ids: List[int],
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> dict:
+    """
+    Bulk delete exams with:
+    - Privilege check
+    - Existence validation
+
+    Args:
+        exam_ids: List of exam IDs
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Operation status with deletion count
+    """
+    return await crud.delete_exam(exam_ids, session, current_user)
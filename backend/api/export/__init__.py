@@ -0,0 +1,5 @@
+__all__ = {
+    'export_router'
+}
+
+from .view import router as export_router
@@ -0,0 +1,124 @@
+import io
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from sqlalchemy import select
+
+from backend.api.auth.scoping import scope_groups
+from backend.database.engine import session_factory
+from backend.database.tables import Student, Group
+from backend.database.tables.student import Diploma, Exam, Subject
+
+# Строк в одном чанке ответа и в одной выборке серверного курсора
+CHUNK_ROWS = 1000
+
+DATASETS = {
+    'students': lambda: (
+        select(
+            Student.id,
+            Student.educational_id,
+            Student.surname,
+            Student.name,
+            Student.lastname,
+            Student.phone,
+            Student.entrance,
+            Group.name.label('group')
+        )
+        .outerjoin(Group, Student.group_id == Group.id)
+        .order_by(Student.id)
+    ),
+    'exams': lambda: (
+        select(
+            Exam.id,
+            Exam.student_id,
+            Student.educational_id,
+            Exam.subject_id,
+            Subject.name.label('subject'),
+            Exam.semester,
+            Exam.year,
+            Exam.score
+        )
+        .outerjoin(Student, Exam.student_id == Student.id)
+        .outerjoin(Subject, Exam.subject_id == Subject.id)
+        .order_by(Exam.id)
+    ),
+    'diplomas': lambda: (
+        select(
+            Diploma.id,
+            Diploma.student_id,
+            Student.educational_id,
+            Diploma.title,
+            Diploma.assignment,
+            Diploma.chapters,
+            Diploma.originality
+        )
+        .outerjoin(Student, Diploma.student_id == Student.id)
+        .order_by(Diploma.id)
+    ),
+}
+
+MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def check_export(dataset: str, fmt: str) -> None:
+    """
+    Проверяет параметры выгрузки до начала потоковой передачи.
+
+    Raises:
+        HTTPException: 404 - Неизвестный набор данных
+        HTTPException: 422 - Неизвестный формат
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Набор данных '{dataset}' не найден. Доступны: {', '.join(DATASETS)}"
+        )
+
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестный формат '{fmt}'. Доступны: {', '.join(MEDIA_TYPES)}"
+        )
+
+
+async def stream_rows(dataset: str, fmt: str, current_user: dict) -> AsyncIterator[str]:
+    """
+    Выгружает набор данных чанками CSV или NDJSON.
+
+    Строки читаются серверным курсором порциями по CHUNK_ROWS, поэтому
+    потребление памяти не зависит от размера таблицы. Сессия открывается
+    внутри генератора: она должна жить, пока передается тело ответа.
+    Преподаватель получает только строки студентов закрепленных за ним групп.
+    """
+    query = scope_groups(DATASETS[dataset](), Student.group_id, current_user)
+    query = query.execution_options(yield_per=CHUNK_ROWS)
+
+    async with session_factory() as session:
+        result = await session.stream(query)
+        columns = list(result.keys())
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            writer.writerow(columns)
+
+        async for partition in result.partitions(CHUNK_ROWS):
+            for row in partition:
+                if fmt == 'csv':
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+                    buffer.write('\n')
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
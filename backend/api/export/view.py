@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import StreamingResponse
+
+from backend.api.auth.privileges import require, TEACHER
+from backend.api.export import crud
+
+router = APIRouter(prefix='/api/export', tags=['Export'])
+
+
+@router.get(
+    '/{dataset}',
+    status_code=status.HTTP_200_OK,
+    summary="Stream a full dataset export",
+    description=(
+            "Streams students, exams or diplomas as CSV or NDJSON. "
+            "Rows are read with a server-side cursor, so memory use is flat. "
+            "Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Streamed export"},
+        403: {"description": "Guest access forbidden"},
+        404: {"description": "Unknown dataset"}
+    }
+)
+async def export_dataset(
+        dataset: str,
+        fmt: str = Query('csv', alias='format', description="csv or ndjson"),
+        current_user: dict = Depends(require(TEACHER))
+) -> StreamingResponse:
+    """
+    Export with:
+    - Privilege check before streaming starts
+    - Teachers get rows of their assigned groups only
+    - Server-side cursor reads
+    - Chunked CSV/NDJSON output
+
+    Args:
+        dataset: students, exams or diplomas
+        fmt: Output format
+        current_user: Authenticated user info
+
+    Returns:
+        Streaming response
+    """
+    crud.check_export(dataset, fmt)
+
+    filename = f"{dataset}_{datetime.today().strftime('%d.%m.%Y')}.{fmt}"
+    return StreamingResponse(
+        crud.stream_rows(dataset, fmt, current_user),
+        media_type=crud.MEDIA_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -1,15 +1,17 @@
 from typing import List, Optional, Sequence
 from fastapi import HTTPException, status
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from backend.api.groups.models import CreateGroupModel, GroupModel, UpdateGroupModel
-from backend.database.tables import Group, Student
+from backend.api.auth.scoping import is_scoped, scope_groups
+from backend.api.groups.models import CreateGroupModel, GroupModel, UpdateGroupModel, GroupTeachersModel
+from backend.database import profiles
+from backend.database.bulk import bulk_update
+from backend.database.validation import missing_ids, delete_existing
+from backend.database.tables import Group, Student, User, TeacherGroup
 
-# Константы уровней привилегий
-GUEST_PRIVILEGE = 0
-TEACHER_PRIVILEGE = 1
-ADMIN_PRIVILEGE = 2 
+# Таблицы, из которых строится список групп (версии для ETag)
+GROUP_TABLES = ('groups', 'students', 'teacher_groups')
 
 
 async def create_group(group: CreateGroupModel, session: AsyncSession, current_user: dict) -> GroupModel:
@@ -17,7 +19,8 @@ async def create_group(group: CreateGroupModel, session: AsyncSession, current_u
     Создает новую группу при наличии достаточных прав.
 
     Проверяет права пользователя и создает новую группу в базе данных.
-    Записывает изменения в БД и возвращает созданную группу.
+    Преподаватель закрепляется за созданной группой, иначе она была бы
+    ему не видна. Записывает изменения в БД и возвращает созданную группу.
 
     Args:
         group: Модель данных для создания группы
@@ -26,21 +29,15 @@ async def create_group(group: CreateGroupModel, session: AsyncSession, current_u
 
     Returns:
         GroupModel: Созданная группа
-
-    Raises:
-        HTTPException: При недостаточных правах (403)
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Создание групп запрещено для гостей"
-        )
-
     new_group = Group(name=group.name)
     session.add(new_group)
+    if is_scoped(current_user):
+        await session.flush()
+        session.add(TeacherGroup(user_id=current_user['id'], group_id=new_group.id))
     await session.commit()
     await session.refresh(new_group)
-    return GroupModel.model_validate(new_group)
+    return GroupModel(id=new_group.id, name=new_group.name)
 
 
 async def get_group(group_id: Optional[int], session: AsyncSession, current_user: dict) -> Sequence[Group]:
@@ -56,19 +53,13 @@ async def get_group(group_id: Optional[int], session: AsyncSession, current_user
         Sequence[Group]: Список групп с предзагруженными учениками
 
     Raises:
-        HTTPException: При недостаточных правах (403)
         HTTPException: Если запрашиваемая группа не найдена (404)
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Просмотр групп запрещен для гостей"
-        )
-
-    query = select(Group).options(selectinload(Group.students))
+    # Преподаватель видит только закрепленные за ним группы
+    query = scope_groups(select(Group), Group.id, current_user)
 
     if group_id is not None:
-        query = query.where(Group.id == group_id)
+        query = query.options(*profiles.options('detail', Group)).where(Group.id == group_id)
         result = await session.execute(query)
         group = result.scalars().first()
         if not group:
@@ -78,6 +69,7 @@ async def get_group(group_id: Optional[int], session: AsyncSession, current_user
             )
         return [group]
 
+    query = query.options(*profiles.options('list', Group))
     return (await session.execute(query.order_by(Group.id))).scalars().all()
 
 
@@ -100,16 +92,9 @@ async def add_student_to_group(
         dict: Статус операции
 
     Raises:
-        HTTPException: При недостаточных правах (403)
         HTTPException: Если группа/ученик не найдены (404)
         HTTPException: Если ученик уже в группе (409)
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Изменение состава групп запрещено для гостей"
-        )
-
     group = await session.get(Group, group_id)
     if not group:
         raise HTTPException(
@@ -124,13 +109,13 @@ async def add_student_to_group(
             detail=f"Ученик {student_id} не найден"
         )
 
-    if student in group.students:
+    if student.group_id == group_id:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Ученик уже состоит в группе"
         )
 
-    group.students.append(student)
+    student.group_id = group_id
     await session.commit()
     return {"status": "success", "group_id": group_id, "student_id": student_id}
 
@@ -148,27 +133,15 @@ async def update_group(groups: List[UpdateGroupModel], session: AsyncSession, cu
         dict: Статус операции
 
     Raises:
-        HTTPException: При недостаточных правах (403)
         HTTPException: Если какая-либо группа не найдена (404)
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Обновление групп запрещено для гостей")
-
-    existing_groups = (await session.execute(select(Group.id))).scalars().all()
-    group_ids = [g.id for g in groups]
-
     # Проверяем существование всех групп
-    for group_id in group_ids:
-        if group_id not in existing_groups:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группа {group_id} не найдена")
+    missing = await missing_ids(session, Group, (g.id for g in groups))
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группы {sorted(missing)} не найдены")
 
     # Пакетное обновление
-    for group in groups:
-        await session.execute(
-            update(Group)
-            .where(Group.id == group.id)
-            .values(name=group.name)
-        )
+    await bulk_update(session, Group, [group.model_dump(exclude_unset=True) for group in groups])
 
     await session.commit()
     return {"status": "success", "updated": len(groups)}
@@ -187,19 +160,77 @@ async def delete_group(group_ids: List[int], session: AsyncSession, current_user
         dict: Статус операции
 
     Raises:
-        HTTPException: При недостаточных правах (403)
         HTTPException: Если какая-либо группа не найдена (404)
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Удаление групп запрещено для гостей")
-
-    existing_groups = (await session.execute(select(Group.id))).scalars().all()
-    missing = [gid for gid in group_ids if gid not in existing_groups]
+    missing = await delete_existing(session, Group, group_ids)
 
     if missing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группы {missing} не найдены")
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группы {sorted(missing)} не найдены")
 
-    await session.execute(delete(Group).where(Group.id.in_(group_ids)))
     await session.commit()
 
-    return {"status": "success", "deleted": len(group_ids)}
\ No newline at end of file
+    return {"status": "success", "deleted": len(group_ids)}
+
+
+async def get_group_teachers(group_id: int, session: AsyncSession) -> GroupTeachersModel:
+    """
+    Возвращает преподавателей, закрепленных за группой.
+
+    Args:
+        group_id: ID группы
+        session: Асинхронная сессия
+
+    Returns:
+        GroupTeachersModel: ID группы и ID преподавателей
+
+    Raises:
+        HTTPException: Если группа не найдена (404)
+    """
+    if await missing_ids(session, Group, [group_id]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группа {group_id} не найдена")
+
+    user_ids = (await session.scalars(
+        select(TeacherGroup.user_id).where(TeacherGroup.group_id == group_id).order_by(TeacherGroup.user_id)
+    )).all()
+    return GroupTeachersModel(group_id=group_id, user_ids=list(user_ids))
+
+
+async def set_group_teachers(teachers: GroupTeachersModel, session: AsyncSession) -> dict:
+    """
+    Заменяет набор преподавателей группы.
+
+    Лишние назначения удаляются, недостающие добавляются, существующие не трогаются.
+
+    Args:
+        teachers: ID группы и полный список ID преподавателей
+        session: Асинхронная сессия
+
+    Returns:
+        dict: Статус операции
+
+    Raises:
+        HTTPException: Если группа или пользователи не найдены (404)
+    """
+    if await missing_ids(session, Group, [teachers.group_id]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группа {teachers.group_id} не найдена")
+
+    missing = await missing_ids(session, User, teachers.user_ids)
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Пользователи {sorted(missing)} не найдены")
+
+    user_ids = sorted(set(teachers.user_ids))
+    removed = await session.execute(
+        delete(TeacherGroup)
+        .where(TeacherGroup.group_id == teachers.group_id, TeacherGroup.user_id.not_in(user_ids))
+    )
+    added = 0
+    if user_ids:
+        added = (await session.execute(
+            insert(TeacherGroup)
+            .values([{'user_id': uid, 'group_id': teachers.group_id} for uid in user_ids])
+            .on_conflict_do_nothing()
+        )).rowcount
+
+    await session.commit()
+    return {"status": "success", "group_id": teachers.group_id, "added": added, "removed": removed.rowcount}
@@ -15,6 +15,10 @@ class UpdateGroupModel(BaseModel):
     id: int
     name: str = None
 
+class GroupTeachersModel(BaseModel):
+    group_id: int
+    user_ids: list[int]
+
 class CreateGroupModel(BaseModel):
     name: str
 
@@ -1,10 +1,13 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.api.auth.auth import get_current_user
+from backend.api.auth.privileges import require, TEACHER, ADMIN
+from backend.api.auth.scoping import scope_key
+from backend.api.conditional import not_modified
 from backend.api.groups import crud
-from backend.api.groups.models import GroupModel, CreateGroupModel, UpdateGroupModel
+from backend.api.groups.models import GroupModel, CreateGroupModel, UpdateGroupModel, GroupTeachersModel
+from backend.database import profiles
 from backend.database.engine import create_session
 
 router = APIRouter(prefix='/api/group', tags=['Groups'])
@@ -14,12 +17,15 @@ router = APIRouter(prefix='/api/group', tags=['Groups'])
     response_model=GroupModel,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new educational group",
-    description="Requires teacher/admin privileges. Creates a new group with the given name."
+    description=(
+        "Requires teacher/admin privileges. Creates a new group with the given name. "
+        "A teacher is assigned to the group they create."
+    )
 )
 async def create_group(
     new_group: CreateGroupModel,
-    session: AsyncSession = Depends(create_session),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
 ) -> GroupModel:
     """
     Create a new group with the following checks:
@@ -39,24 +45,35 @@ async def create_group(
     response_model=List[GroupModel],
     status_code=status.HTTP_200_OK,
     summary="Retrieve groups",
-    description="Get all groups or filter by ID. Returns groups with associated students."
+    dependencies=[Depends(profiles.query_budget('versioned_list'))],
+    description=(
+        "Get all groups or filter by ID. Returns groups with associated students. "
+        "Supports conditional requests: If-None-Match with the returned ETag gets 304 when nothing changed."
+    )
 )
 async def get_group(
+    request: Request,
+    response: Response,
     group_id: Optional[int] = None,
-    session: AsyncSession = Depends(create_session),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
 ):
     """
     Retrieve groups with the following behavior:
     - Returns all groups if no ID provided
     - Returns specific group if ID provided
     - Includes nested student data
+    - Strong ETag from the groups/students table versions
 
     **Response:**
     - 200 OK: List of groups
+    - 304 Not Modified: If-None-Match matches the current ETag
     - 403 Forbidden: Guest access attempt
     - 404 Not Found: Requested group doesn't exist
     """
+    unchanged = await not_modified(request, response, session, crud.GROUP_TABLES, scope_key(current_user))
+    if unchanged:
+        return unchanged
     return await crud.get_group(group_id, session, current_user)
 
 @router.put(
@@ -67,8 +84,8 @@ async def get_group(
 )
 async def update_group(
     groups: List[UpdateGroupModel],
-    session: AsyncSession = Depends(create_session),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Update multiple groups.
@@ -87,8 +104,8 @@ async def delete_group(
         description="List of group IDs to delete",
         example=[1, 2, 3]
     ),
-    session: AsyncSession = Depends(create_session),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Delete groups with:
@@ -112,8 +129,8 @@ async def delete_group(
 async def add_student_to_group(
     student_id: int = Query(..., description="ID of the student to add"),
     group_id: int = Query(..., description="Target group ID"),
-    session: AsyncSession = Depends(create_session),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Student assignment with:
@@ -128,4 +145,53 @@ async def add_student_to_group(
     - 409 Conflict: Student already in group
     """
 
-    return await crud.add_student_to_group(student_id, group_id, session, current_user)
\ No newline at end of file
+    return await crud.add_student_to_group(student_id, group_id, session, current_user)
+
+
+@router.get(
+    '/teachers',
+    response_model=GroupTeachersModel,
+    status_code=status.HTTP_200_OK,
+    summary="Teachers assigned to a group",
+    description="Requires admin privileges."
+)
+async def get_group_teachers(
+    group_id: int = Query(..., description="Group ID"),
+    current_user: dict = Depends(require(ADMIN)),
+    session: AsyncSession = Depends(create_session)
+) -> GroupTeachersModel:
+    """
+    **Response:**
+    - 200 OK: { "group_id": 1, "user_ids": [2, 5] }
+    - 403 Forbidden: Non-admin access
+    - 404 Not Found: Invalid group ID
+    """
+    return await crud.get_group_teachers(group_id, session)
+
+
+@router.put(
+    '/teachers',
+    status_code=status.HTTP_200_OK,
+    summary="Set teachers of a group",
+    description=(
+        "Replaces the set of teachers assigned to a group. "
+        "Teachers see only the groups assigned to them and their students. "
+        "Requires admin privileges."
+    )
+)
+async def set_group_teachers(
+    teachers: GroupTeachersModel,
+    current_user: dict = Depends(require(ADMIN)),
+    session: AsyncSession = Depends(create_session)
+) -> dict:
+    """
+    Teacher assignment with:
+    - Group and user existence verification
+    - Only the difference is written
+
+    **Response:**
+    - 200 OK: { "status": "success", "group_id": 1, "added": 1, "removed": 0 }
+    - 403 Forbidden: Non-admin access
+    - 404 Not Found: Invalid group or user ID
+    """
+    return await crud.set_group_teachers(teachers, session)
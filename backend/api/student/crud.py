@@ -1,18 +1,30 @@
 from typing import Optional, List
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, UploadFile, status
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import Row, select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from backend.api.student.models import StudentModel, CreateStudentModel, UpdateStudentModel, InfoStudentModel
+from backend.api.auth.scoping import is_scoped, scope_groups
+from backend.api.student import importer
+from backend.api.student.models import (
+    StudentModel, CreateStudentModel, UpdateStudentModel, InfoStudentModel, ImportResultModel
+)
+from backend.database.bulk import bulk_update
+from backend.database.validation import missing_ids, delete_existing
 from backend.database.tables import Student, Group
+from backend.database.tables.student import Diploma, Exam, student_search_document
 
-# Константы уровней привилегий
-GUEST_PRIVILEGE = 0
-TEACHER_PRIVILEGE = 1
-ADMIN_PRIVILEGE = 2
+# Таблицы, из которых строится список студентов (версии для ETag)
+STUDENT_TABLES = ('students', 'groups', 'diplomas', 'exams', 'teacher_groups')
+
+# Допустимые поля сортировки списка студентов
+SORT_COLUMNS = {
+    'id': Student.id,
+    'surname': Student.surname,
+    'name': Student.name,
+    'educational_id': Student.educational_id,
+}
 
 
 async def create_student(student: CreateStudentModel, session: AsyncSession, current_user: dict) -> StudentModel:
@@ -20,6 +32,8 @@ async def create_student(student: CreateStudentModel, session: AsyncSession, cur
     Создает нового студента.
 
     Требует права преподавателя/администратора. Проверяет уникальность educational_id.
+    Преподаватель создает студентов только в закрепленных за ним группах:
+    студент без группы или в чужой группе был бы ему не виден.
 
     Args:
         student: Модель данных для создания студента
@@ -30,15 +44,10 @@ async def create_student(student: CreateStudentModel, session: AsyncSession, cur
         StudentModel: Созданный студент
 
     Raises:
-        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Группа не найдена или не закреплена за преподавателем
         HTTPException: 409 - Дублирование educational_id
+        HTTPException: 422 - Преподаватель не указал группу
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Создание студентов запрещено для гостей"
-        )
-
     # Проверка уникальности student.id
     # existing = await session.execute(select(Student).where(Student.login == student.login))
 
@@ -50,87 +59,247 @@ async def create_student(student: CreateStudentModel, session: AsyncSession, cur
 
     new_student = Student(**student.model_dump())
 
-    if student.group_id is not None:
-        group = await session.get(Group, student.group_id)
+    if student.group_id is None and is_scoped(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Преподаватель должен указать закрепленную за ним группу"
+        )
 
-        if not group:
+    if student.group_id is not None:
+        if await missing_ids(session, Group, [student.group_id], lambda q: scope_groups(q, Group.id, current_user)):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группы с ID {student.group_id} не найдено")
 
-        group.students.append(new_student)
-
     session.add(new_student)
     await session.commit()
     await session.refresh(new_student)
     return StudentModel.model_validate(new_student)
 
 
+async def import_students(upload: UploadFile, session: AsyncSession, current_user: dict) -> ImportResultModel:
+    """
+    Массовый импорт студентов из CSV/XLSX.
+
+    Строки проверяются по мере чтения и загружаются через COPY во временную
+    таблицу, затем сливаются со students: существующие educational_id
+    обновляются, новые добавляются. Ошибочные строки пропускаются и
+    возвращаются в отчете.
+
+    Args:
+        upload: Загруженный файл (.csv или .xlsx)
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        ImportResultModel: Количество строк, ошибки и скорость импорта
+
+    Raises:
+        HTTPException: 415 - Неподдерживаемый формат файла или CSV не в UTF-8
+    """
+    return await importer.import_rows(importer.read_rows(upload), session)
+
+
 async def get_student(
         student_id: Optional[int] = None,
         session: AsyncSession = None,
-        current_user: dict = None
+        current_user: dict = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        group_id: Optional[int] = None,
+        sort: str = 'id',
+        descending: bool = False
 ) -> List[InfoStudentModel]:
     """
     Получает студентов с расширенной информацией.
 
+    Фильтрация и постраничная выборка выполняются в SQL. Пагинация курсорная
+    (keyset): следующая страница начинается после студента с ID ``after_id``
+    в выбранном порядке сортировки, поэтому стоимость запроса не зависит
+    от номера страницы.
+
     Args:
         student_id: ID студента (None для всех)
         session: Асинхронная сессия
         current_user: Данные пользователя
+        after_id: ID последнего студента предыдущей страницы
+        limit: Размер страницы (None - без ограничения)
+        group_id: Фильтр по группе
+        sort: Поле сортировки (см. SORT_COLUMNS)
+        descending: Сортировка по убыванию
 
     Returns:
         List[InfoStudentModel]: Список студентов с группами, дипломами и экзаменами
 
     Raises:
-        HTTPException: 403 - Недостаточно прав
-        HTTPException: 404 - Студент не найден
+        HTTPException: 404 - Студент не найден (в том числе студент курсора
+            ``after_id`` при сортировке не по id)
+        HTTPException: 422 - Недопустимое поле сортировки
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Просмотр данных студентов запрещен для гостей"
-        )
-
-    query = select(Student).options(
-        selectinload(Student.group),
-        selectinload(Student.diploma),
-        selectinload(Student.exams)
-    )
+    # Преподаватель видит только студентов закрепленных за ним групп
+    query = scope_groups(_info_query(), Student.group_id, current_user)
 
     if student_id:
         query = query.where(Student.id == student_id)
-        result = await session.execute(query)
-        student = result.scalars().first()
-        if not student:
+        row = (await session.execute(query)).first()
+        if not row:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Студент с ID {student_id} не найден")
 
-        return [InfoStudentModel(
-            id=student.id,
-            educational_id=student.educational_id,
-            name=student.name,
-            surname=student.surname,
-            lastname=student.lastname,
-            phone=student.phone,
-            entrance=bool(student.entrance),
-            group=student.group.name if student.group else None,
-            diploma=student.diploma.title if student.diploma else None,
-            exams=len(student.exams)
-        )]
-
-    results = await session.execute(query.order_by(Student.id))
-    return [
-        InfoStudentModel(
-            id=s.id,
-            educational_id=s.educational_id,
-            name=s.name,
-            surname=s.surname,
-            lastname=s.lastname,
-            phone=s.phone,
-            entrance=bool(s.entrance),
-            group=s.group.name if s.group else None,
-            diploma=s.diploma.title if s.diploma else None,
-            exams=len(s.exams)
-        ) for s in results.scalars().all()
-    ]
+        return [_to_info(row)]
+
+    query, anchored = _paginate(query, after_id, limit, group_id, sort, descending)
+    rows = (await session.execute(query)).all()
+    if anchored:
+        # Первой строкой идет сам курсор; без нее курсор недействителен,
+        # а пустой ответ читался бы клиентом как конец списка
+        if not rows or rows[0].id != after_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Студент с ID {after_id} не найден")
+        rows = rows[1:]
+    return [_to_info(row) for row in rows]
+
+
+async def count_students(group_id: Optional[int], session: AsyncSession, current_user: dict) -> int:
+    """
+    Считает видимых пользователю студентов с учетом фильтра по группе.
+
+    Args:
+        group_id: Фильтр по группе (None для всех)
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        int: Количество студентов
+    """
+    query = scope_groups(select(func.count(Student.id)), Student.group_id, current_user)
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+    return (await session.execute(query)).scalar_one()
+
+
+async def search_students(
+        q: str,
+        session: AsyncSession,
+        current_user: dict,
+        group_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0
+) -> List[InfoStudentModel]:
+    """
+    Ищет студентов по ФИО и номеру студенческого билета.
+
+    Использует триграммный индекс ix_students_search_trgm: совпадения по
+    подстроке (ILIKE) и по сходству слов ранжируются по word_similarity.
+
+    Args:
+        q: Поисковая строка
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+        group_id: Фильтр по группе
+        limit: Размер страницы
+        offset: Смещение
+
+    Returns:
+        List[InfoStudentModel]: Найденные студенты в порядке релевантности
+    """
+    pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    rank = func.word_similarity(q, student_search_document)
+
+    query = (
+        scope_groups(_info_query(), Student.group_id, current_user)
+        .where(student_search_document.ilike(pattern) | student_search_document.op('%>')(q))
+        .order_by(rank.desc(), Student.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+
+    results = await session.execute(query)
+    return [_to_info(row) for row in results]
+
+
+def _info_query():
+    """
+    Проекция для InfoStudentModel: только нужные колонки, группа и диплом
+    через LEFT JOIN, количество экзаменов - коррелированным подзапросом.
+    ORM-объекты не создаются.
+    """
+    exams_count = (
+        select(func.count(Exam.id))
+        .where(Exam.student_id == Student.id)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Student.id,
+            Student.educational_id,
+            Student.name,
+            Student.surname,
+            Student.lastname,
+            Student.phone,
+            Student.entrance,
+            Group.name.label('group'),
+            Diploma.title.label('diploma'),
+            exams_count.label('exams')
+        )
+        .outerjoin(Group, Student.group_id == Group.id)
+        .outerjoin(Diploma, Diploma.student_id == Student.id)
+    )
+
+
+def _to_info(row: Row) -> InfoStudentModel:
+    """Строит InfoStudentModel из строки _info_query."""
+    return InfoStudentModel(
+        id=row.id,
+        educational_id=row.educational_id,
+        name=row.name,
+        surname=row.surname,
+        # NULL в старых строках и после обновлений с lastname=None
+        lastname=row.lastname or '',
+        phone=row.phone,
+        entrance=bool(row.entrance),
+        group=row.group,
+        diploma=row.diploma,
+        exams=row.exams
+    )
+
+
+def _paginate(query, after_id, limit, group_id, sort, descending):
+    """
+    Добавляет к запросу фильтр по группе, сортировку и keyset-курсор.
+
+    При сортировке не по id ключ курсора читается из строки ``after_id``, и
+    эта строка возвращается первой, чтобы проверить курсор без отдельного
+    запроса. Возвращает запрос и признак того, что первая строка - курсор.
+    """
+    column = SORT_COLUMNS.get(sort)
+    if column is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Недопустимое поле сортировки '{sort}'. Допустимы: {', '.join(SORT_COLUMNS)}"
+        )
+
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+
+    anchored = after_id is not None and column is not Student.id
+    if after_id is not None:
+        if column is Student.id:
+            query = query.where(Student.id < after_id if descending else Student.id > after_id)
+        else:
+            # Ключ курсора (значение поля, id) берется из строки after_id подзапросом
+            anchor = select(column).where(Student.id == after_id).correlate(None).scalar_subquery()
+            key, cursor = tuple_(column, Student.id), tuple_(anchor, after_id)
+            query = query.where((key < cursor if descending else key > cursor) | (Student.id == after_id))
+
+    if column is Student.id:
+        order = [Student.id.desc() if descending else Student.id]
+    else:
+        order = [column.desc(), Student.id.desc()] if descending else [column, Student.id]
+    query = query.order_by(*order)
+
+    if limit is not None:
+        query = query.limit(limit + 1 if anchored else limit)
+    return query, anchored
 
 
 async def update_student(updates: List[UpdateStudentModel], session: AsyncSession, current_user: dict) -> dict:
@@ -146,50 +315,19 @@ async def update_student(updates: List[UpdateStudentModel], session: AsyncSessio
         dict: Статус операции
 
     Raises:
-        HTTPException: 403 - Недостаточно прав
         HTTPException: 404 - Студент не найден
         HTTPException: 409 - Дублирование educational_id
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Обновление студентов запрещено для гостей"
-        )
-
-    _ = await session.execute(select(Student.id))
-
-    existing_ids = {s for s in _.scalars().all()}
-    update_ids = {u.id for u in updates}
-
     # Проверка существования всех студентов
-    missing = update_ids - existing_ids
+    missing = await missing_ids(session, Student, (u.id for u in updates))
     if missing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Студенты с ID {missing} не найдены"
+            detail=f"Студенты с ID {sorted(missing)} не найдены"
         )
 
-    # Проверка уникальности student.id
-    for upd in updates:
-        if upd.id:
-            existing = await session.execute(
-                select(Student.id).where(Student.id == upd.id)
-            )
-            existing = existing.scalars().first()
-            if existing and existing != upd.id:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"ID {upd.id} уже занят"
-                )
-
     # Пакетное обновление
-    for upd in updates:
-        values = upd.model_dump(exclude_unset=True)
-        await session.execute(
-            update(Student)
-            .where(Student.id == upd.id)
-            .values(**values)
-        )
+    await bulk_update(session, Student, [upd.model_dump(exclude_unset=True) for upd in updates])
 
     await session.commit()
     return {"status": "success", "updated": len(updates)}
@@ -208,26 +346,15 @@ async def delete_student(student_ids: List[int], session: AsyncSession, current_
         dict: Статус операции
 
     Raises:
-        HTTPException: 403 - Недостаточно прав
         HTTPException: 404 - Студенты не найдены
     """
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Удаление студентов запрещено для гостей"
-        )
-
-    _ = await session.execute(select(Student.id))
-    existing = set(_.scalars().all())
-    to_delete = set(student_ids)
-
-    missing = to_delete - existing
+    missing = await delete_existing(session, Student, student_ids)
     if missing:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Студенты с ID {missing} не найдены"
+            detail=f"Студенты с ID {sorted(missing)} не найдены"
         )
 
-    await session.execute(delete(Student).where(Student.id.in_(student_ids)))
     await session.commit()
     return {"status": "success", "deleted": len(student_ids)}
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Bulk student import.
+
+Rows are read from CSV or XLSX and validated in chunks in a worker thread, so
+parsing a large file does not block the event loop, and streamed through
+asyncpg ``copy_records_to_table`` into a temporary staging table. Group names
+are resolved, duplicates dropped and rows merged into ``students`` with a few
+set-based statements.
+"""
+from __future__ import annotations
+
+import io
+import csv
+import time
+import asyncio
+from itertools import islice
+from typing import AsyncIterator, Iterator
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.student.models import ImportStudentRow, ImportErrorModel, ImportResultModel
+
+# Строк, читаемых и проверяемых в потоке за один переход из event loop
+CHUNK_ROWS = 1000
+
+COLUMNS = ('educational_id', 'name', 'surname', 'lastname', 'phone', 'group', 'entrance')
+
+STAGING_TABLE = 'students_import'
+STAGING_COLUMNS = (
+    'row_no', 'educational_id', 'name', 'surname', 'lastname', 'phone', 'entrance', 'group_name'
+)
+
+CREATE_STAGING = text(f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        row_no integer PRIMARY KEY,
+        educational_id varchar NOT NULL,
+        name varchar NOT NULL,
+        surname varchar NOT NULL,
+        lastname varchar,
+        phone varchar,
+        entrance boolean,
+        group_name varchar,
+        group_id integer
+    ) ON COMMIT DROP
+""")
+
+# Группы по имени одним запросом; при одинаковых именах берется меньший id
+RESOLVE_GROUPS = text(f"""
+    UPDATE {STAGING_TABLE} s SET group_id = g.id
+    FROM (SELECT name, min(id) AS id FROM groups GROUP BY name) g
+    WHERE g.name = s.group_name
+""")
+
+DROP_UNKNOWN_GROUPS = text(f"""
+    DELETE FROM {STAGING_TABLE}
+    WHERE group_name IS NOT NULL AND group_id IS NULL
+    RETURNING row_no, group_name
+""")
+
+# Повтор educational_id в файле: побеждает последняя строка
+DROP_DUPLICATES = text(f"""
+    DELETE FROM {STAGING_TABLE} a USING {STAGING_TABLE} b
+    WHERE a.educational_id = b.educational_id AND a.row_no < b.row_no
+    RETURNING a.row_no, b.row_no
+""")
+
+# Пустые отчество и телефон хранятся как '', как у студентов, созданных через API
+MERGE_UPDATE = text(f"""
+    UPDATE students t SET
+        name = s.name, surname = s.surname,
+        lastname = coalesce(s.lastname, ''), phone = coalesce(s.phone, ''),
+        entrance = s.entrance, group_id = s.group_id, updated_at = localtimestamp(0)
+    FROM {STAGING_TABLE} s
+    WHERE t.educational_id = s.educational_id
+""")
+
+MERGE_INSERT = text(f"""
+    INSERT INTO students (
+        educational_id, name, surname, lastname, phone, entrance, group_id, created_at, updated_at
+    )
+    SELECT s.educational_id, s.name, s.surname, coalesce(s.lastname, ''), coalesce(s.phone, ''),
+           s.entrance, s.group_id,
+           localtimestamp(0), localtimestamp(0)
+    FROM {STAGING_TABLE} s
+    WHERE NOT EXISTS (SELECT 1 FROM students t WHERE t.educational_id = s.educational_id)
+    ORDER BY s.row_no
+""")
+
+
+def _read_csv(file) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    try:
+        for row_no, row in enumerate(reader, start=2):
+            yield row_no, {key.strip().lower(): value for key, value in row.items() if key}
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Файл CSV должен быть в кодировке UTF-8"
+        )
+
+
+def _read_xlsx(file) -> Iterator[tuple[int, dict]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Импорт XLSX недоступен: не установлен openpyxl"
+        )
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip().lower() if cell is not None else '' for cell in next(rows, ())]
+        for row_no, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_no, {
+                key: str(value) if value is not None and not isinstance(value, bool) else value
+                for key, value in zip(header, values) if key
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(upload: UploadFile) -> Iterator[tuple[int, dict]]:
+    """Rows of an uploaded CSV or XLSX file as ``(row number, {column: value})``."""
+    filename = (upload.filename or '').lower()
+    if filename.endswith('.xlsx'):
+        return _read_xlsx(upload.file)
+    if filename.endswith('.csv'):
+        return _read_csv(upload.file)
+
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Поддерживаются только файлы .csv и .xlsx"
+    )
+
+
+def _validate_chunk(rows: Iterator[tuple[int, dict]], errors: list[ImportErrorModel], counter: list[int]) -> list[tuple] | None:
+    """Reads and validates up to CHUNK_ROWS rows; None once ``rows`` is exhausted."""
+    chunk = list(islice(rows, CHUNK_ROWS))
+    if not chunk:
+        return None
+
+    records = []
+    for row_no, raw in chunk:
+        counter[0] += 1
+        try:
+            row = ImportStudentRow.model_validate({key: raw.get(key) for key in COLUMNS})
+        except ValidationError as e:
+            detail = '; '.join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append(ImportErrorModel(row=row_no, detail=detail))
+            continue
+
+        records.append((
+            row_no, row.educational_id, row.name, row.surname,
+            row.lastname, row.phone, row.entrance, row.group
+        ))
+    return records
+
+
+async def _records(rows: Iterator[tuple[int, dict]], errors: list[ImportErrorModel], counter: list[int]) -> AsyncIterator[tuple]:
+    # Разбор файла (csv, openpyxl) и проверка синхронные: выполняются в потоке
+    while (records := await asyncio.to_thread(_validate_chunk, rows, errors, counter)) is not None:
+        for record in records:
+            yield record
+
+
+async def import_rows(rows: Iterator[tuple[int, dict]], session: AsyncSession) -> ImportResultModel:
+    """Validates ``rows``, COPYs them into the staging table and merges into ``students``."""
+    started = time.perf_counter()
+    errors: list[ImportErrorModel] = []
+    counter = [0]
+
+    connection = await session.connection()
+    await connection.execute(CREATE_STAGING)
+
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=_records(rows, errors, counter),
+        columns=STAGING_COLUMNS
+    )
+
+    await connection.execute(RESOLVE_GROUPS)
+    for row_no, group_name in await connection.execute(DROP_UNKNOWN_GROUPS):
+        errors.append(ImportErrorModel(row=row_no, detail=f"Группа '{group_name}' не найдена"))
+    for row_no, winner in await connection.execute(DROP_DUPLICATES):
+        errors.append(ImportErrorModel(row=row_no, detail=f"educational_id повторяется в строке {winner}"))
+
+    updated = (await connection.execute(MERGE_UPDATE)).rowcount
+    inserted = (await connection.execute(MERGE_INSERT)).rowcount
+    await session.commit()
+
+    seconds = time.perf_counter() - started
+    return ImportResultModel(
+        rows=counter[0],
+        inserted=inserted,
+        updated=updated,
+        errors=sorted(errors, key=lambda e: e.row),
+        seconds=round(seconds, 3),
+        rows_per_second=round(counter[0] / seconds, 1) if seconds else 0.0
+    )
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 class StudentModel(BaseModel):
     id: int
@@ -52,3 +52,43 @@ class InfoStudentModel(BaseModel):
     group: str | None = None
     diploma: str | None = None
     exams: int | None = None
+
+
+class ImportStudentRow(BaseModel):
+    educational_id: str = Field(..., min_length=1)
+    name: str = Field(..., min_length=1)
+    surname: str = Field(..., min_length=1)
+    lastname: str | None = None
+    phone: str | None = None
+    group: str | None = None
+    entrance: bool = False
+
+    @field_validator('lastname', 'phone', 'group', mode='before')
+    @classmethod
+    def empty_as_none(cls, value):
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    @field_validator('entrance', mode='before')
+    @classmethod
+    def empty_as_false(cls, value):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return False
+        if isinstance(value, str) and value.strip().lower() in ('да', 'нет'):
+            return value.strip().lower() == 'да'
+        return value
+
+
+class ImportErrorModel(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportResultModel(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    errors: list[ImportErrorModel] = []
+    seconds: float
+    rows_per_second: float
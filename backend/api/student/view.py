@@ -1,14 +1,18 @@
 from typing import List
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, File, Query, Request, Response, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.api.auth.auth import get_current_user
+from backend.api.auth.privileges import require, TEACHER
+from backend.api.auth.scoping import scope_key
+from backend.api.conditional import not_modified
 from backend.api.student import crud
 from backend.api.student.models import (
     StudentModel,
     CreateStudentModel,
     UpdateStudentModel,
-    InfoStudentModel
+    InfoStudentModel,
+    ImportResultModel
 )
+from backend.database import profiles
 from backend.database.engine import create_session
 
 router = APIRouter(prefix='/api/student', tags=['Student Management'])
@@ -22,18 +26,21 @@ router = APIRouter(prefix='/api/student', tags=['Student Management'])
     description=(
             "Requires teacher/admin privileges. "
             "Creates student with unique educational ID. "
+            "Teachers create students only in groups assigned to them. "
             "Validates data integrity and access rights."
     ),
     responses={
         201: {"description": "Student created"},
         403: {"description": "Insufficient privileges"},
-        409: {"description": "Duplicate educational ID"}
+        404: {"description": "Group not found or not assigned to the teacher"},
+        409: {"description": "Duplicate educational ID"},
+        422: {"description": "Teacher did not give a group"}
     }
 )
 async def create_student(
         student: CreateStudentModel,
-        session: AsyncSession = Depends(create_session),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> StudentModel:
     """
     Create student with:
@@ -52,47 +59,168 @@ async def create_student(
     return await crud.create_student(student, session, current_user)
 
 
+@router.post(
+    '/import',
+    response_model=ImportResultModel,
+    status_code=status.HTTP_200_OK,
+    summary="Bulk import students",
+    description=(
+            "Imports students from a CSV or XLSX file with columns "
+            "educational_id, name, surname, lastname, phone, group, entrance. "
+            "Existing educational IDs are updated. Requires teacher/admin privileges."
+    ),
+    responses={
+        200: {"description": "Import report with per-row errors"},
+        403: {"description": "Insufficient privileges"},
+        415: {"description": "Unsupported file type or non UTF-8 CSV"}
+    }
+)
+async def import_students(
+        file: UploadFile = File(..., description="CSV or XLSX file"),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> ImportResultModel:
+    """
+    Bulk import with:
+    - Streaming row validation
+    - COPY into a staging table
+    - Group name resolution in one query
+    - Merge by educational ID
+
+    Args:
+        file: Uploaded CSV/XLSX file
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Import report
+    """
+    return await crud.import_students(file, session, current_user)
+
+
 @router.get(
     '',
     response_model=List[InfoStudentModel],
     status_code=status.HTTP_200_OK,
     summary="Retrieve students",
+    dependencies=[Depends(profiles.query_budget('versioned_list'))],
     description=(
             "Get all students or filter by ID. "
             "Includes related group, diploma, and exam data. "
+            "Supports If-None-Match with the returned ETag. "
             "Requires authentication."
     ),
     responses={
         200: {"description": "List of students"},
+        304: {"description": "Not modified since the ETag was issued"},
         403: {"description": "Guest access forbidden"},
-        404: {"description": "Student not found"}
+        404: {"description": "Student or after_id cursor not found"}
     }
 )
 async def get_student(
+        request: Request,
+        response: Response,
         student_id: int = Query(
             None,
             description="Filter by specific student ID",
             example=1,
             ge=1
         ),
-        session: AsyncSession = Depends(create_session),
-        current_user: dict = Depends(get_current_user)
+        after_id: int = Query(None, description="Return students after this ID (keyset cursor)", ge=1),
+        limit: int = Query(None, description="Page size", ge=1, le=500),
+        group_id: int = Query(None, description="Filter by group ID", ge=1),
+        sort: str = Query('id', description="Sort field: id, surname, name, educational_id"),
+        desc: bool = Query(False, description="Sort in descending order"),
+        with_total: bool = Query(False, description="Return total count in X-Total-Count header"),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> List[InfoStudentModel]:
     """
     Retrieve students with:
     - Optional ID filtering
+    - Group filtering, sorting and keyset pagination done in SQL
     - Relationship data loading
     - Access control
 
+    When a page is full, the cursor for the next page is returned in the
+    X-Next-After-Id header. The ETag is built from the versions of the
+    underlying tables; a matching If-None-Match gets 304 before the list
+    query runs.
+
     Args:
+        request: Incoming request (conditional headers)
+        response: Outgoing response (pagination headers)
         student_id: Optional student ID filter
+        after_id: Keyset cursor
+        limit: Page size
+        group_id: Optional group filter
+        sort: Sort field
+        desc: Descending order
+        with_total: Include total count
         session: Database session
         current_user: Authenticated user info
 
     Returns:
         List of students with extended info
     """
-    return await crud.get_student(student_id, session, current_user)
+    unchanged = await not_modified(request, response, session, crud.STUDENT_TABLES, scope_key(current_user))
+    if unchanged:
+        return unchanged
+
+    students = await crud.get_student(
+        student_id, session, current_user,
+        after_id=after_id, limit=limit, group_id=group_id, sort=sort, descending=desc
+    )
+
+    if limit is not None and len(students) == limit:
+        response.headers['X-Next-After-Id'] = str(students[-1].id)
+    if with_total:
+        response.headers['X-Total-Count'] = str(await crud.count_students(group_id, session, current_user))
+
+    return students
+
+
+@router.get(
+    '/search',
+    response_model=List[InfoStudentModel],
+    status_code=status.HTTP_200_OK,
+    summary="Search students",
+    dependencies=[Depends(profiles.query_budget('list'))],
+    description=(
+            "Ranked search over surname, name, lastname and educational ID. "
+            "Backed by a trigram index. Requires authentication."
+    ),
+    responses={
+        200: {"description": "Matching students, most relevant first"},
+        403: {"description": "Guest access forbidden"}
+    }
+)
+async def search_students(
+        q: str = Query(..., min_length=2, max_length=100, description="Search string"),
+        group_id: int = Query(None, description="Filter by group ID", ge=1),
+        limit: int = Query(20, description="Page size", ge=1, le=100),
+        offset: int = Query(0, description="Number of matches to skip", ge=0),
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
+) -> List[InfoStudentModel]:
+    """
+    Search students with:
+    - Substring and word-similarity matching
+    - Relevance ranking
+    - Offset pagination
+
+    Args:
+        q: Search string
+        group_id: Optional group filter
+        limit: Page size
+        offset: Matches to skip
+        session: Database session
+        current_user: Authenticated user info
+
+    Returns:
+        Matching students with extended info
+    """
+    return await crud.search_students(q, session, current_user, group_id=group_id, limit=limit, offset=offset)
 
 
 @router.put(
@@ -113,8 +241,8 @@ async def get_student(
 )
 async def update_student(
         updates: List[UpdateStudentModel],
-        session: AsyncSession = Depends(create_session),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Bulk update students with:
@@ -150,8 +278,8 @@ async def update_student(
 )
 async def delete_student(
         student_ids: List[int],
-        session: AsyncSession = Depends(create_session),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Bulk delete students with:
@@ -1,24 +1,18 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.api.subject.models import CreateSubjectModel, UpdateSubjectModel, SubjectModel
+from backend.database.bulk import bulk_update
+from backend.database.validation import missing_ids, delete_existing
 from backend.database.tables.student import Subject
 
-# Константы уровней привилегий
-GUEST_PRIVILEGE = 0
-TEACHER_PRIVILEGE = 1
-ADMIN_PRIVILEGE = 2
+# Таблицы, из которых строится список предметов (версии для ETag)
+SUBJECT_TABLES = ('subjects',)
 
 async def create_subject(subject: CreateSubjectModel, session: AsyncSession, current_user: dict) -> SubjectModel:
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Создание предмета запрещено для гостей'
-        )
-
     new_subject = Subject(name=subject.name)
     session.add(new_subject)
     await session.commit()
@@ -26,27 +20,65 @@ async def create_subject(subject: CreateSubjectModel, session: AsyncSession, cur
     return SubjectModel.model_validate(new_subject)
 
 
-async def get_subject(subject_id: int, session: AsyncSession, current_user: dict) -> List[SubjectModel]:
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
+async def get_subject(subject_id: Optional[int], session: AsyncSession, current_user: dict) -> List[SubjectModel]:
+    query = select(Subject)
+    if subject_id is not None:
+        query = query.where(Subject.id == subject_id)
+
+    subjects = (await session.execute(query.order_by(Subject.id))).scalars().all()
+    if subject_id is not None and not subjects:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Получение предмета запрещено для гостей'
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Предмет с ID {subject_id} не найден'
         )
+    return [SubjectModel.model_validate(s) for s in subjects]
 
-    query = select(Subject).where(Subject.id == subject_id)
 
+async def update_subject(subjects: list[UpdateSubjectModel], session: AsyncSession, current_user: dict) -> dict:
+    """
+    Обновляет несколько предметов (bulk update).
 
+    Args:
+        subjects: Список моделей обновления предметов
+        session: Асинхронная сессия
+        current_user: Данные пользователя
 
-async def update_subject(subjects: list[UpdateSubjectModel], session: AsyncSession, current_user: dict):
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Обновление предмета запрещено для гостей'
-        )
+    Returns:
+        dict: Статус операции
 
-async def delete_subject(subject_ids: list[int], session: AsyncSession, current_user: dict):
-    if current_user.get('privilege') == GUEST_PRIVILEGE:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Удаление предмета запрещено для гостей'
-        )
+    Raises:
+        HTTPException: Если какой-либо предмет не найден (404)
+    """
+    missing = await missing_ids(session, Subject, (s.id for s in subjects))
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Предметы {sorted(missing)} не найдены")
+
+    await bulk_update(session, Subject, [subject.model_dump(exclude_unset=True) for subject in subjects])
+
+    await session.commit()
+    return {"status": "success", "updated": len(subjects)}
+
+
+async def delete_subject(subject_ids: list[int], session: AsyncSession, current_user: dict) -> dict:
+    """
+    Удаляет несколько предметов (bulk delete). Экзамены по ним удаляются каскадно.
+
+    Args:
+        subject_ids: Список ID удаляемых предметов
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        dict: Статус операции
+
+    Raises:
+        HTTPException: Если какой-либо предмет не найден (404)
+    """
+    missing = await delete_existing(session, Subject, subject_ids)
+
+    if missing:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Предметы {sorted(missing)} не найдены")
+
+    await session.commit()
+    return {"status": "success", "deleted": len(subject_ids)}
@@ -7,14 +7,14 @@ class CreateSubjectModel(BaseModel):
         from_attributes = True
 
 class SubjectModel(BaseModel):
-    id: str
+    id: int
     name: str
 
     class Config:
         from_attributes = True
 
 class UpdateSubjectModel(BaseModel):
-    id: str
+    id: int
     name: str
 
     class Config:
@@ -1,10 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.api.auth.auth import get_current_user
+from backend.api.auth.privileges import require, TEACHER
+from backend.api.conditional import not_modified
+from backend.database import profiles
 from backend.database.engine import create_session
 from backend.api.subject import crud
 from backend.api.subject.models import SubjectModel, CreateSubjectModel, UpdateSubjectModel
@@ -29,8 +31,8 @@ router = APIRouter(prefix='/api/subject', tags=['Subject'])
 )
 async def create_subject(
         subject: CreateSubjectModel,
-        session: AsyncSession = Depends(create_session),
-        current_user = Depends(get_current_user)
+        current_user = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> SubjectModel:
     return await crud.create_subject(subject, session, current_user)
 
@@ -39,21 +41,29 @@ async def create_subject(
     response_model=List[SubjectModel],
     status_code=status.HTTP_200_OK,
     summary="Retrieve subject",
+    dependencies=[Depends(profiles.query_budget('versioned_list'))],
     description=(
             "Get all subjects or filter by ID. "
+            "Supports If-None-Match with the returned ETag. "
             "Requires authentication."
     ),
     responses={
         200: {"description": "List of subjects"},
+        304: {"description": "Not modified since the ETag was issued"},
         403: {"description": "Guest access forbidden"},
         404: {"description": "Subject not found"}
     }
 )
 async def get_subject(
-        subject_id: int,
-        session: AsyncSession = Depends(create_session),
-        current_user = Depends(get_current_user)
+        request: Request,
+        response: Response,
+        subject_id: int = None,
+        current_user = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> List[SubjectModel]:
+    unchanged = await not_modified(request, response, session, crud.SUBJECT_TABLES)
+    if unchanged:
+        return unchanged
     return await crud.get_subject(subject_id, session, current_user)
 
 @router.put(
@@ -73,8 +83,8 @@ async def get_subject(
 )
 async def update_subject(
         subjects: list[UpdateSubjectModel],
-        session: AsyncSession = Depends(create_session),
-        current_user = Depends(get_current_user)
+        current_user = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> dict:
     return await crud.update_subject(subjects, session, current_user)
 
@@ -95,7 +105,7 @@ async def update_subject(
 )
 async def delete_subject(
         subject_ids: list[int],
-        session: AsyncSession = Depends(create_session),
-        current_user = Depends(get_current_user)
+        current_user = Depends(require(TEACHER)),
+        session: AsyncSession = Depends(create_session)
 ) -> dict:
     return await crud.delete_subject(subject_ids, session, current_user)
\ No newline at end of file
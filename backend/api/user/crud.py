@@ -1,28 +1,42 @@
 from datetime import datetime
 from typing import List, Optional
 
+import asyncio
 import string
 import secrets
 
 from fastapi import HTTPException, status
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, func, and_, or_, true, cast, Numeric
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import undefer
 
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-from docx.enum.table import WD_TABLE_ALIGNMENT
-from starlette.responses import FileResponse
+from starlette.responses import Response, JSONResponse, StreamingResponse
 
-from backend.api.auth.auth import get_password_hash
-from backend.api.user.models import UserSchema, CreateUserSchema, UserParamSchema
-from backend.database.tables import User, Group, Student
+from backend.api.auth.auth import hash_password
+from backend.api.auth.privileges import ADMIN
+from backend.api.auth.scoping import scope_groups
+from backend.api.conditional import etag_matches
+from backend.api.user.models import UserSchema, CreateUserSchema, UserParamSchema, ReportJobModel
+from backend.config import rpcfg
+from backend.database.bulk import bulk_update
+from backend.database.validation import missing_ids, delete_existing
+from backend.database.versions import group_version
+from backend.database.engine import session_factory
+from backend.database.tables import User, Group, Student, ReportJob, StudentScoreStats, TeacherGroup
+from backend.database.tables.student import Diploma
+from backend.reports import render_group_report, run_in_pool, report_cache, digest
+from backend.reports.bundle import stream_bundle
+from backend.reports.jobs import jobs, PermanentJobError, QUEUED, DONE
 
 
+DOCX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def _generate_salt() -> str:
+    # Криптографически безопасная соль
+    return ''.join(secrets.choice(string.ascii_letters + string.digits + string.punctuation) for _ in range(16))
+
 
 async def create_user(user: CreateUserSchema, session: AsyncSession) -> UserSchema:
     """
@@ -49,9 +63,8 @@ async def create_user(user: CreateUserSchema, session: AsyncSession) -> UserSche
             detail=f"Логин '{user.login}' уже занят"
         )
 
-    # Генерация криптографически безопасной соли
-    salt = ''.join(secrets.choice(string.ascii_letters + string.digits + string.punctuation) for _ in range(16))
-    hashed_password = get_password_hash(user.password, salt)
+    salt = _generate_salt()
+    hashed_password = await hash_password(user.password, salt)
 
     new_user = User(
         login=user.login,
@@ -68,6 +81,62 @@ async def create_user(user: CreateUserSchema, session: AsyncSession) -> UserSche
     await session.refresh(new_user)
     return UserSchema.model_validate(new_user)
 
+async def create_users(users: List[CreateUserSchema], session: AsyncSession, current_user: dict) -> List[UserSchema]:
+    """
+    Массовое создание пользователей.
+
+    Пароли хешируются параллельно в пуле хеширования, все пользователи
+    вставляются одним INSERT ... RETURNING.
+
+    Args:
+        users: Данные пользователей
+        session: Асинхронная сессия БД
+        current_user: Текущий пользователь
+
+    Returns:
+        List[UserSchema]: Созданные пользователи в порядке запроса
+
+    Raises:
+        HTTPException: 409 - Логины повторяются или заняты
+    """
+    if not users:
+        return []
+
+    logins = [u.login for u in users]
+    duplicates = sorted({login for login in logins if logins.count(login) > 1})
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Логины {duplicates} повторяются в запросе"
+        )
+
+    # Проверка занятых логинов одним запросом до дорогого хеширования
+    taken = (await session.scalars(select(User.login).where(User.login.in_(logins)))).all()
+    if taken:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Логины {sorted(taken)} уже заняты"
+        )
+
+    salts = [_generate_salt() for _ in users]
+    hashes = await asyncio.gather(*(hash_password(u.password, salt) for u, salt in zip(users, salts)))
+
+    rows = [
+        {
+            'login': u.login,
+            'password': hashed,
+            'salt': salt,
+            'name': u.name,
+            'surname': u.surname,
+            'lastname': u.lastname,
+            'privilege': u.privilege
+        }
+        for u, salt, hashed in zip(users, salts, hashes)
+    ]
+    created = (await session.scalars(insert(User).returning(User, sort_by_parameter_order=True), rows)).all()
+    await session.commit()
+    return [UserSchema.model_validate(u) for u in created]
+
 async def get_users_by_id(user_id: Optional[int] = None, session: AsyncSession = None) -> List[UserSchema]:
     """
     Получает пользователей по ID или всех пользователей.
@@ -103,27 +172,25 @@ async def update_user(updates: List[UserParamSchema], session: AsyncSession, cur
         HTTPException: 404 - Пользователь не найден
     """
     # Предварительная проверка существования пользователей
-    _ = await session.execute(select(User.id))
-    existing_ids = {u for u in _.scalars().all()}
-    update_ids = {u.id for u in updates}
-    missing = update_ids - existing_ids
+    missing = await missing_ids(session, User, (u.id for u in updates))
     if missing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Пользователи {missing} не найдены"
+            detail=f"Пользователи {sorted(missing)} не найдены"
         )
 
-    # Пакетное обновление
+    # Проверка прав по всем строкам до записи
+    rows = []
     for user_update in updates:
         # Проверка прав на изменение
-        if current_user['id'] != user_update.id and current_user['privilege'] < 2:
+        if current_user['id'] != user_update.id and current_user['privilege'] < ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Недостаточно прав для изменения чужих данных"
             )
 
         # Проверка прав на изменение привилегий
-        if user_update.privilege is not None and current_user['privilege'] < 2:
+        if user_update.privilege is not None and current_user['privilege'] < ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Только администратор может менять привилегии"
@@ -131,7 +198,7 @@ async def update_user(updates: List[UserParamSchema], session: AsyncSession, cur
 
         # Обновление логина
         if user_update.login:
-            if current_user['id'] != user_update.id and current_user['privilege'] < 2:
+            if current_user['id'] != user_update.id and current_user['privilege'] < ADMIN:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Только владелец или администратор может менять логин"
@@ -142,7 +209,10 @@ async def update_user(updates: List[UserParamSchema], session: AsyncSession, cur
         if 'password' in update_data:
             raise NotImplementedError("Смена пароля требует отдельной реализации")
 
-        await session.execute(update(User).where(User.id == user_update.id).values(**update_data))
+        rows.append(update_data)
+
+    # Пакетное обновление
+    await bulk_update(session, User, rows)
 
     await session.commit()
     return {"status": "success", "updated": len(updates)}
@@ -160,151 +230,354 @@ async def delete_user(user_ids: List[int], session: AsyncSession, current_user:
         Статус операции
 
     Raises:
-        HTTPException: 403 - Недостаточно прав
         HTTPException: 404 - Пользователи не найдены
     """
-    if current_user['privilege'] < 2:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Только администратор может удалять пользователей"
-        )
-
-    _ = await session.execute(select(User.id))
-    existing = set(_.scalars().all())
-    to_delete = set(user_ids)
-    missing = to_delete - existing
+    missing = await delete_existing(session, User, user_ids)
 
     if missing:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Пользователи {missing} не найдены"
+            detail=f"Пользователи {sorted(missing)} не найдены"
         )
 
-    await session.execute(
-        delete(User)
-        .where(User.id.in_(user_ids))
-    )
     await session.commit()
     return {"status": "success", "deleted": len(user_ids)}
 
-async def get_group_report(group_id, session, current_user):
-    group = await session.execute(select(Group).where(Group.id == group_id))
-    group = group.scalar()
 
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
+async def _group_report_version(group_id: int, session: AsyncSession, current_user: Optional[dict] = None):
+    """
+    Версия данных отчета по группе одной выборкой.
+
+    Версия - счетчик group_versions этой группы: он растет при каждой записи
+    в группу, ее студентов, их дипломы и экзамены. Записи в другие группы
+    версию не меняют, а повторное изменение в ту же секунду, в отличие от
+    updated_at с точностью до секунды, дает новую версию.
+
+    С ``current_user`` выборка ограничена видимыми пользователю группами.
+
+    Returns:
+        (имя группы, число студентов, ключ кэша, дата отчета) или None, если группы нет
+    """
+    query = (
+        select(Group.name, func.count(Student.id), group_version(Group.id))
+        .outerjoin(Student, Student.group_id == Group.id)
+        .where(Group.id == group_id)
+        .group_by(Group.id)
+    )
+    if current_user is not None:
+        query = scope_groups(query, Group.id, current_user)
+    version = (await session.execute(query)).first()
+
+    if not version:
+        return None
+
+    today = datetime.today().strftime('%d.%m.%Y')
+    return version[0], version[1], digest('group', group_id, *version, today), today
+
+
+def _report_query():
+    """
+    Строки отчета по группам одним запросом: студент, тема диплома и агрегаты по экзаменам.
+
+    Средний балл, число оцененных экзаменов и допуск к защите считаются в БД
+    по гистограмме оценок student_score_stats. Допуск:
+    есть диплом с темой, сдан хотя бы один экзамен и ни одной оценки ниже
+    ``rpcfg.PASS_SCORE``.
+    """
+    exams = (
+        select(
+            func.round(
+                cast(func.sum(StudentScoreStats.score * StudentScoreStats.exams), Numeric)
+                / func.sum(StudentScoreStats.exams), 2
+            ).label('average'),
+            func.coalesce(func.sum(StudentScoreStats.exams), 0).label('count'),
+            func.min(StudentScoreStats.score).label('min_score')
+        )
+        .where(StudentScoreStats.student_id == Student.id)
+        .lateral('exam_stats')
+    )
+    admitted = and_(
+        Diploma.title.is_(True),
+        exams.c.count > 0,
+        func.coalesce(exams.c.min_score, 0) >= rpcfg.PASS_SCORE
+    )
+    return (
+        select(
+            Group.id,
+            Group.name,
+            Student.educational_id,
+            Student.surname,
+            Student.name,
+            Student.lastname,
+            Diploma.title,
+            exams.c.average,
+            exams.c.count,
+            admitted.label('admitted')
+        )
+        .join(Student, Student.group_id == Group.id)
+        .outerjoin(Diploma, Diploma.student_id == Student.id)
+        .join(exams, true())
+        .order_by(Group.id, Student.id)
+    )
 
-    students = await session.execute(
-        select(Student)
-        .where(Student.group_id == group_id)
-        .options(selectinload(Student.group))
+
+def _report_row(educational_id, surname, name, lastname, topic, average, exams, admitted) -> tuple:
+    """Строка таблицы отчета: (№, ФИО, тема, средний балл, экзаменов, допуск)."""
+    return (
+        educational_id,
+        f"{surname} {name} {lastname or ''}",
+        topic if topic else 'Не определена',
+        average if average is not None else '-',
+        exams,
+        'Да' if admitted else 'Нет'
     )
-    students = students.scalars().all()
 
-    if not students:
+
+async def _build_group_report(group_id: int, today: str, session: AsyncSession) -> bytes:
+    """Загружает строки отчета одним запросом и рендерит отчет в пуле процессов."""
+    rows = (await session.execute(_report_query().where(Group.id == group_id))).all()
+
+    if not rows:
+        raise PermanentJobError("No students in group")
+
+    report = {
+        'group': rows[0][1],
+        'date': today,
+        'rows': [_report_row(*row[2:]) for row in rows]
+    }
+
+    # Документ собирается в памяти рабочего процесса и возвращается байтами:
+    # без временных файлов, Content-Length выставляется по размеру
+    return await run_in_pool(render_group_report, report)
+
+
+async def _group_report_job(params: dict, progress) -> tuple[str, str, bytes]:
+    """Обработчик фонового задания 'group'."""
+    group_id = params['group_id']
+
+    async with session_factory() as session:
+        version = await _group_report_version(group_id, session)
+        if version is None:
+            raise PermanentJobError("Group not found")
+        _, _, key, today = version
+        await progress(10)
+
+        content = await report_cache.get(key)
+        if content is None:
+            content = await _build_group_report(group_id, today, session)
+            await progress(90)
+            await report_cache.put(key, content)
+
+    return f"Otchet_Gruppa_{group_id}_{today}.docx", DOCX_MEDIA_TYPE, content
+
+
+jobs.register('group', _group_report_job)
+
+
+async def get_group_report(group_id, session, current_user, if_none_match: Optional[str] = None):
+    """
+    Формирует отчет по успеваемости группы (DOCX).
+
+    Готовые отчеты кэшируются по ключу (группа, тип отчета, версия данных,
+    дата). Версия - счетчик изменений данных этой группы, прочитанный вместе
+    с группой одним запросом, поэтому при неизменных данных отчет не
+    пересобирается, а при совпадении If-None-Match возвращается 304.
+
+    Если отчета нет в кэше, он формируется фоновым заданием. Одновременные
+    запросы одной версии отчета получают одно задание (по ключу кэша).
+    Запрос ждет его не дольше REPORT_JOB_INLINE_WAIT секунд, затем отвечает
+    202 с ID задания.
+
+    Args:
+        group_id: ID группы
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+        if_none_match: Значение заголовка If-None-Match
+
+    Returns:
+        Response: DOCX-файл, 304 Not Modified или 202 с ID задания
+
+    Raises:
+        HTTPException: 404 - Группа не найдена или в ней нет студентов
+        HTTPException: 500 - Задание завершилось ошибкой
+    """
+    version = await _group_report_version(group_id, session, current_user)
+
+    if not version:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    _, students_count, key, today = version
+    if not students_count:
         raise HTTPException(status_code=404, detail="No students in group")
 
-    doc = Document()
-    filename = f"Otchet_Gruppa_{datetime.today().strftime('%d.%m.%Y')}.docx"
-
-    style = doc.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(12)
-
-    for section in doc.sections:
-        section.top_margin = Inches(0.5)
-        section.bottom_margin = Inches(0.5)
-        section.left_margin = Inches(0.7)
-        section.right_margin = Inches(0.7)
-
-    title = doc.add_paragraph()
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    title_run = title.add_run('ОТЧЕТ\nпо успеваемости студентов')
-    title_run.font.name = 'Times New Roman'
-    title_run.font.size = Pt(14)
-    title_run.font.bold = True
-    title.add_run('\nРТУ МИРЭА Кафедра №250')
-    title.runs[1].font.size = Pt(11.5)
-    title.runs[1].font.italic = True
-
-    doc.add_paragraph().add_run().add_break()
-
-    info = doc.add_paragraph()
-    info.add_run('Факультет: ')
-    info.add_run('   Программная инженерия   \n').font.underline = True
-    info.add_run('Направление подготовки: ')
-    info.add_run('   Вычислительная техника   \n').font.underline = True
-    info.add_run('Группа: ')
-    info.add_run(f'   {group.name}   ').font.underline = True
-    info.add_run('\t\t\t\t\tКурс: ___\n')
-
-    date_para = doc.add_paragraph()
-    date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    date_para.add_run(f'Дата составления: {datetime.today().strftime("%d.%m.%Y")}')
-    date_para.runs[0].font.italic = True
-
-    doc.add_paragraph().add_run().add_break()
-
-    table = doc.add_table(rows=1, cols=5)
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    table.style = 'Table Grid'
-
-    columns = [
-        ('№ п/п', 0.3),
-        ('ФИО студента', 2.5),
-        ('Тема курсовой работы', 3),
-        ('Оценка', 0.7),
-        ('Допуск к защите', 1)
-    ]
+    etag = f'"{key}"'
+    filename = f"Otchet_Gruppa_{group_id}_{today}.docx"
+    headers = {'ETag': etag, 'Content-Disposition': f'attachment; filename="{filename}"'}
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    content = await report_cache.get(key)
+    if content is not None:
+        return Response(content=content, media_type=DOCX_MEDIA_TYPE, headers=headers)
+
+    job_id = await jobs.submit('group', {'group_id': group_id}, current_user['id'], key=key)
+    if not await jobs.wait(job_id, rpcfg.JOB_INLINE_WAIT):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={'job_id': job_id, 'status': QUEUED},
+            headers={'Location': f'/api/user/report_jobs/{job_id}'}
+        )
+
+    job = await _load_job(job_id, session, current_user, with_result=True, shared=True)
+    if job.status != DONE:
+        raise HTTPException(status_code=500, detail=f"Формирование отчета завершилось ошибкой: {job.error}")
+
+    return Response(content=job.result, media_type=job.media_type, headers=headers)
+
+
+async def _load_job(
+        job_id: str,
+        session: AsyncSession,
+        current_user: dict,
+        with_result: bool = False,
+        shared: bool = False
+) -> ReportJob:
+    """
+    Задание по ID. Пользователь видит только свои задания, администратор - все;
+    чужое задание неотличимо от несуществующего (404).
+
+    С ``shared`` также видны задания get_report на отчет по закрепленной за
+    пользователем группе: они общие для всех, кто запросил тот же отчет.
+    Задания, поставленные через /report_jobs, остаются личными.
+    """
+    query = select(ReportJob).where(ReportJob.id == job_id)
+    if current_user['privilege'] < ADMIN:
+        owned = ReportJob.user_id == current_user['id']
+        if shared:
+            assigned = select(TeacherGroup.group_id).where(
+                TeacherGroup.user_id == current_user['id'],
+                TeacherGroup.group_id == ReportJob.params['group_id'].as_integer()
+            ).exists()
+            owned = or_(owned, and_(ReportJob.kind == 'group', ReportJob.params['key'].as_string().is_not(None), assigned))
+        query = query.where(owned)
+    if with_result:
+        query = query.options(undefer(ReportJob.result))
+
+    job = (await session.execute(query)).scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Задание {job_id} не найдено")
+    return job
+
+
+async def submit_report_job(group_id: int, session: AsyncSession, current_user: dict) -> ReportJobModel:
+    """
+    Ставит формирование отчета по группе в очередь.
+
+    Raises:
+        HTTPException: 404 - Группа не найдена
+    """
+    if await missing_ids(session, Group, [group_id], lambda q: scope_groups(q, Group.id, current_user)):
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    job_id = await jobs.submit('group', {'group_id': group_id}, current_user['id'])
+    return ReportJobModel.model_validate(await _load_job(job_id, session, current_user))
+
+
+async def get_report_job(job_id: str, session: AsyncSession, current_user: dict) -> ReportJobModel:
+    """
+    Статус и прогресс задания.
+
+    Raises:
+        HTTPException: 404 - Задание не найдено или недоступно пользователю
+    """
+    return ReportJobModel.model_validate(await _load_job(job_id, session, current_user, shared=True))
+
 
-    hdr_cells = table.rows[0].cells
-    for i, (text, width) in enumerate(columns):
-        hdr_cells[i].text = text
-        hdr_cells[i].width = Inches(width)
-        hdr_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        hdr_cells[i].paragraphs[0].runs[0].font.bold = True
-
-        tcPr = hdr_cells[i]._tc.get_or_add_tcPr()
-        shade = OxmlElement('w:shd')
-        shade.set(qn('w:fill'), 'E6E6E6')
-        tcPr.append(shade)
-
-    for idx, student in enumerate(students, 1):
-        row_cells = table.add_row().cells
-
-        # Номер п/п
-        row_cells[0].text = str(student.educational_id)
-        row_cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # ФИО
-        row_cells[1].text = f"{student.surname} {student.name} {student.lastname or ''}"
-
-        # Тема курсовой
-        row_cells[2].text = student.diploma.title if student.diploma else 'Не определена'
-
-        # Оценка
-        row_cells[3].text = '-'
-        row_cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # Допуск к защите
-        admission = "Да"
-        row_cells[4].text = admission
-        row_cells[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-    footer = doc.sections[0].footer
-    footer_para = footer.paragraphs[0]
-    footer_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    footer_run = footer_para.add_run('Руководитель подразделения: _________________')
-    footer_run.font.size = Pt(12)
-
-    temp_path = f"/tmp/{filename}"
-    doc.save(temp_path)
-
-    response = FileResponse(
-        path=temp_path,
-        filename=filename,
-        media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+async def download_report_job(job_id: str, session: AsyncSession, current_user: dict) -> Response:
+    """
+    Результат выполненного задания.
+
+    Raises:
+        HTTPException: 404 - Задание не найдено или недоступно пользователю
+        HTTPException: 409 - Задание еще не выполнено или завершилось ошибкой
+    """
+    job = await _load_job(job_id, session, current_user, with_result=True, shared=True)
+    if job.status != DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Задание {job_id} в статусе '{job.status}'"
+        )
+
+    return Response(
+        content=job.result,
+        media_type=job.media_type,
+        headers={'Content-Disposition': f'attachment; filename="{job.filename}"'}
     )
 
-    response.headers["X-Cleanup"] = temp_path
-    return response
\ No newline at end of file
+
+async def cancel_report_job(job_id: str, session: AsyncSession, current_user: dict) -> dict:
+    """
+    Отменяет задание в очереди или в работе. Отменить общее задание может
+    только его автор или администратор.
+
+    Raises:
+        HTTPException: 404 - Задание не найдено или принадлежит другому пользователю
+        HTTPException: 409 - Задание уже завершено
+    """
+    await _load_job(job_id, session, current_user)
+    if not await jobs.cancel(job_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Задание {job_id} уже завершено")
+    return {"status": "success", "job_id": job_id}
+
+
+async def get_report_bundle(group_ids: Optional[List[int]], session: AsyncSession, current_user: dict) -> StreamingResponse:
+    """
+    Отчеты по всем (или выбранным) группам одним ZIP-архивом.
+
+    Данные загружаются одним агрегатным запросом на все группы сразу:
+    студенты, темы дипломов и итоги по экзаменам. Документы рендерятся параллельно в пуле
+    процессов и попадают в архив по мере готовности.
+
+    Args:
+        group_ids: ID групп (None - все группы)
+        session: Асинхронная сессия
+        current_user: Данные пользователя
+
+    Returns:
+        StreamingResponse: ZIP-архив с отчетами
+
+    Raises:
+        HTTPException: 404 - Группы не найдены
+    """
+    # Преподаватель получает отчеты только по закрепленным группам
+    query = scope_groups(_report_query(), Group.id, current_user)
+    if group_ids:
+        missing = await missing_ids(session, Group, group_ids, lambda q: scope_groups(q, Group.id, current_user))
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Группы {sorted(missing)} не найдены")
+        query = query.where(Group.id.in_(group_ids))
+
+    names: dict[int, str] = {}
+    rows: dict[int, list[tuple]] = {}
+    for group_id, name, *student in await session.execute(query):
+        names[group_id] = name
+        rows.setdefault(group_id, []).append(_report_row(*student))
+
+    today = datetime.today().strftime('%d.%m.%Y')
+    reports = [
+        (
+            f"{name.replace('/', '_')}_{group_id}.docx",
+            {'group': name, 'date': today, 'rows': rows[group_id]}
+        )
+        for group_id, name in names.items()
+    ]
+    if not reports:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Нет групп со студентами")
+
+    return StreamingResponse(
+        stream_bundle(render_group_report, reports),
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="Otchety_{today}.zip"'}
+    )
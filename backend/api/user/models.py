@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -37,3 +38,20 @@ class UserParamSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ReportJobModel(BaseModel):
+    id: str
+    kind: str
+    params: dict
+    status: str
+    progress: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,23 +1,171 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Header, Query, status
 from fastapi.responses import FileResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.api.auth.auth import get_current_user
+from backend.api.auth.privileges import require, GUEST, TEACHER, ADMIN
 from backend.api.user import crud
-from backend.api.user.models import UserSchema, CreateUserSchema, UserParamSchema
+from backend.api.user.models import UserSchema, CreateUserSchema, UserParamSchema, ReportJobModel
+from backend.database import profiles
 from backend.database.engine import create_session
 
 router = APIRouter(prefix='/api/user', tags=['User'])
 
-@router.post('', response_model=UserSchema)
+@router.post('', response_model=UserSchema, status_code=status.HTTP_201_CREATED)
 async def create_user(user: CreateUserSchema, session: AsyncSession = Depends(create_session)):
     return await crud.create_user(user, session)
 
 
-@router.get('/get_report')
-async def protected(group_id: int, session: AsyncSession = Depends(create_session)):
-   return await crud.get_group_report(group_id, session, 4)
+@router.post(
+    '/bulk',
+    summary="Создать пользователей пакетом",
+    response_model=list[UserSchema],
+    status_code=status.HTTP_201_CREATED
+)
+async def create_users(
+    users: list[CreateUserSchema] = Body(..., max_length=1000),
+    current_user: dict = Depends(require(ADMIN)),
+    session: AsyncSession = Depends(create_session)
+) -> list[UserSchema]:
+    """
+    Создает пользователей пакетом: пароли хешируются параллельно, вставка одним запросом
+
+    Args:
+        users: Данные пользователей (не более 1000)
+        session: Асинхронная сессия SQLAlchemy
+        current_user: Текущий авторизованный пользователь
+
+    Returns:
+        list[UserSchema]: Созданные пользователи
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 409 - Логины повторяются или заняты
+    """
+    return await crud.create_users(users, session, current_user)
+
+
+@router.get('/get_report', dependencies=[Depends(profiles.query_budget('report'))])
+async def protected(
+    group_id: int,
+    if_none_match: str = Header(None),
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+):
+   return await crud.get_group_report(group_id, session, current_user, if_none_match)
+
+
+@router.get(
+    '/report_bundle',
+    summary="Отчеты по группам одним ZIP-архивом"
+)
+async def get_report_bundle(
+    group_ids: list[int] = Query(None, description="ID групп; по умолчанию все группы"),
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+):
+    """
+    Формирует отчеты по всем или выбранным группам и отдает их потоком в ZIP
+
+    Args:
+        group_ids: Идентификаторы групп (опционально)
+        session: Асинхронная сессия SQLAlchemy
+        current_user: Текущий авторизованный пользователь
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Группы не найдены
+    """
+    return await crud.get_report_bundle(group_ids, session, current_user)
+
+
+@router.post(
+    '/report_jobs',
+    summary="Поставить отчет по группе в очередь",
+    response_model=ReportJobModel,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_report_job(
+    group_id: int,
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+) -> ReportJobModel:
+    """
+    Создает фоновое задание на формирование отчета по группе
+
+    Args:
+        group_id: Идентификатор группы
+        session: Асинхронная сессия SQLAlchemy
+        current_user: Текущий авторизованный пользователь
+
+    Returns:
+        ReportJobModel: Созданное задание
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Группа не найдена
+    """
+    return await crud.submit_report_job(group_id, session, current_user)
+
+
+@router.get(
+    '/report_jobs/{job_id}',
+    summary="Статус задания на отчет",
+    response_model=ReportJobModel
+)
+async def get_report_job(
+    job_id: str,
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+) -> ReportJobModel:
+    """
+    Возвращает статус и прогресс задания (свои задания; администратору - любые)
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Задание не найдено
+    """
+    return await crud.get_report_job(job_id, session, current_user)
+
+
+@router.get(
+    '/report_jobs/{job_id}/download',
+    summary="Скачать результат задания"
+)
+async def download_report_job(
+    job_id: str,
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+):
+    """
+    Возвращает сформированный отчет (свои задания; администратору - любые)
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Задание не найдено
+        HTTPException: 409 - Задание не выполнено
+    """
+    return await crud.download_report_job(job_id, session, current_user)
+
+
+@router.delete(
+    '/report_jobs/{job_id}',
+    summary="Отменить задание на отчет"
+)
+async def cancel_report_job(
+    job_id: str,
+    current_user: dict = Depends(require(TEACHER)),
+    session: AsyncSession = Depends(create_session)
+) -> dict:
+    """
+    Отменяет задание в очереди или в работе (свои задания; администратору - любые)
+
+    Raises:
+        HTTPException: 403 - Недостаточно прав
+        HTTPException: 404 - Задание не найдено
+        HTTPException: 409 - Задание уже завершено
+    """
+    return await crud.cancel_report_job(job_id, session, current_user)
 
 
 @router.get(
@@ -43,13 +191,12 @@ async def get_users_by_id(user_id: int = None, session: AsyncSession = Depends(c
 
 @router.put(
     '',
-    summary="Обновить пользователей",
-    response_model=list[UserSchema]
+    summary="Обновить пользователей"
 )
 async def update_user(
     updated_users: list[UserParamSchema],
-    session: AsyncSession = Depends(create_session),
-    current_user: UserSchema = Depends(get_current_user)
+    current_user: dict = Depends(require(GUEST)),
+    session: AsyncSession = Depends(create_session)
 ) -> dict:
     """
     Обновляет данные пользователей (требует авторизации)
@@ -60,7 +207,7 @@ async def update_user(
         current_user: Текущий авторизованный пользователь
 
     Returns:
-        list[UserSchema]: Обновленные пользователи
+        dict: Статус операции и число обновленных пользователей
 
     Raises:
         HTTPException: 403 - Недостаточно прав
@@ -76,8 +223,8 @@ async def update_user(
 )
 async def delete_users(
     user_ids: list[int],
-    session: AsyncSession = Depends(create_session),
-    current_user: UserSchema = Depends(get_current_user)
+    current_user: UserSchema = Depends(require(ADMIN)),
+    session: AsyncSession = Depends(create_session)
 ) -> None:
     """
     Удаляет пользователей по списку ID (требует авторизации)
@@ -1,6 +1,7 @@
 __all__ = {
     'dbcfg',
-    'becfg'
+    'becfg',
+    'rpcfg'
 }
 
-from .config import dbcfg, becfg
+from .config import dbcfg, becfg, rpcfg
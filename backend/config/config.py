@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 from pydantic import BaseModel
@@ -17,12 +18,57 @@ class DataBaseConfig(BaseModel):
     ECHO: bool = True
     DROPS_AFTER_START: bool = False
 
+    # Пул соединений. POOLING=False возвращает старое поведение (NullPool)
+    POOLING: bool = os.environ.get('DB_POOLING', 'true').lower() in ('1', 'true', 'yes')
+    POOL_SIZE: int = int(os.environ.get('DB_POOL_SIZE', 10))
+    MAX_OVERFLOW: int = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    POOL_PRE_PING: bool = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    POOL_RECYCLE: int = int(os.environ.get('DB_POOL_RECYCLE', 1800))      # секунды, -1 отключает
+    POOL_TIMEOUT: float = float(os.environ.get('DB_POOL_TIMEOUT', 30))    # ожидание свободного соединения
+    STATEMENT_CACHE_SIZE: int = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 500))
+
+    # Тестовый режим: запрос к API падает, если превышен лимит SQL-запросов профиля
+    QUERY_BUDGET: bool = os.environ.get('DB_QUERY_BUDGET', 'false').lower() in ('1', 'true', 'yes')
+
+    # Write-behind для выставления оценок: пачка пишется одной транзакцией
+    GRADE_BATCH_ROWS: int = int(os.environ.get('DB_GRADE_BATCH_ROWS', 500))
+    GRADE_BATCH_MS: float = float(os.environ.get('DB_GRADE_BATCH_MS', 50))
+
 
 class BackEndConfig(BaseModel):
     ALGORITHM: str = os.environ.get('ALGORITHM')
     SECRET_KEY: str = os.environ.get('SECRET_KEY')
     JWT_SECRET_KEY: str = os.environ.get('JWT_SECRET_KEY')
 
+    # bcrypt выполняется в отдельном пуле потоков, чтобы не блокировать event loop
+    HASH_WORKERS: int = int(os.environ.get('AUTH_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+    BCRYPT_ROUNDS: int = int(os.environ.get('AUTH_BCRYPT_ROUNDS', 12))     # cost factor, 4..31
+
+    # Кэш проверенных JWT: подпись проверяется один раз, запись живет до exp токена
+    TOKEN_CACHE_SIZE: int = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 4096))
+
+
+class ReportConfig(BaseModel):
+    # Процессы для рендеринга DOCX и сколько заданий может ждать в очереди сверх них
+    WORKERS: int = int(os.environ.get('REPORT_WORKERS', min(4, os.cpu_count() or 1)))
+    QUEUE_LIMIT: int = int(os.environ.get('REPORT_QUEUE_LIMIT', 16))
+
+    # Кэш готовых отчетов: LRU в памяти и каталог на диске с вытеснением по размеру
+    CACHE_MEMORY_ITEMS: int = int(os.environ.get('REPORT_CACHE_MEMORY_ITEMS', 64))
+    CACHE_DIR: str = os.environ.get('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'report-cache'))
+    CACHE_DISK_BYTES: int = int(os.environ.get('REPORT_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+
+    # Фоновые задания на формирование отчетов
+    JOB_WORKERS: int = int(os.environ.get('REPORT_JOB_WORKERS', 4))
+    JOB_MAX_RETRIES: int = int(os.environ.get('REPORT_JOB_MAX_RETRIES', 2))
+    JOB_RESULT_TTL: int = int(os.environ.get('REPORT_JOB_RESULT_TTL', 3600))     # секунды
+    JOB_LEASE: int = int(os.environ.get('REPORT_JOB_LEASE', 600))               # после этого running считается брошенным
+    JOB_INLINE_WAIT: float = float(os.environ.get('REPORT_JOB_INLINE_WAIT', 10))  # ожидание в GET /get_report
+
+    # Минимальная положительная оценка: ниже нее студент не допускается к защите
+    PASS_SCORE: int = int(os.environ.get('REPORT_PASS_SCORE', 3))
+
 
 dbcfg = DataBaseConfig()    # dbcfg stands for Database Config
 becfg = BackEndConfig()     # becfg stands for BackEnd Config
+rpcfg = ReportConfig()      # rpcfg stands for Report Config
@@ -0,0 +1,62 @@
+"""
+Set-based bulk mutations.
+
+``bulk_update`` turns a list of partial row updates into
+``UPDATE ... FROM (VALUES ...)`` statements, one per distinct set of changed
+columns (and per chunk, to stay under the bind parameter limit of asyncpg).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import update, values, column, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# asyncpg принимает не больше 32767 параметров в одном запросе
+MAX_PARAMS = 32767
+MAX_ROWS_PER_STATEMENT = 1000
+
+
+def _chunks(rows: list, size: int) -> Iterable[list]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+async def bulk_update(session: AsyncSession, model, rows: list[dict], key: str = 'id') -> int:
+    """
+    Applies partial updates ``rows`` (dicts containing ``key``) to ``model``'s table.
+
+    Returns the number of updated rows. Does not commit.
+    """
+    table = model.__table__
+    key_column = table.c[key]
+
+    # Группируем строки по набору изменяемых колонок
+    groups: dict[tuple[str, ...], list[dict]] = defaultdict(list)
+    for row in rows:
+        changed = tuple(sorted(name for name in row if name != key))
+        if changed:
+            groups[changed].append(row)
+
+    updated = 0
+    for changed, group_rows in groups.items():
+        names = (key, *changed)
+        chunk_size = min(MAX_ROWS_PER_STATEMENT, MAX_PARAMS // len(names))
+
+        for chunk in _chunks(group_rows, chunk_size):
+            source = values(
+                *(column(name, table.c[name].type) for name in names),
+                name='v'
+            ).data([tuple(row[name] for name in names) for row in chunk])
+
+            statement = (
+                update(table)
+                .where(key_column == source.c[key])
+                # cast: колонка VALUES из одних NULL иначе получит тип text
+                .values({name: cast(source.c[name], table.c[name].type) for name in changed})
+            )
+            result = await session.execute(statement)
+            updated += result.rowcount
+
+    return updated
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import sys
+import time
 import logging
 
-from sqlalchemy import NullPool
+from sqlalchemy import NullPool, AsyncAdaptedQueuePool
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
@@ -11,11 +12,50 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from backend.config import dbcfg
 from backend.database.tables import Base
 
-engine = create_async_engine(
-    url=dbcfg.URL,
-    echo=dbcfg.ECHO,
-    poolclass=NullPool
-)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.acquisitions = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.acquisitions += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def _engine_options() -> dict:
+    options = {
+        'url': dbcfg.URL,
+        'echo': dbcfg.ECHO,
+        'connect_args': {'prepared_statement_cache_size': dbcfg.STATEMENT_CACHE_SIZE},
+    }
+
+    if not dbcfg.POOLING:
+        options['poolclass'] = NullPool
+        return options
+
+    options.update(
+        poolclass=InstrumentedPool,
+        pool_size=dbcfg.POOL_SIZE,
+        max_overflow=dbcfg.MAX_OVERFLOW,
+        pool_pre_ping=dbcfg.POOL_PRE_PING,
+        pool_recycle=dbcfg.POOL_RECYCLE,
+        pool_timeout=dbcfg.POOL_TIMEOUT,
+    )
+    return options
+
+
+engine = create_async_engine(**_engine_options())
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -27,6 +67,27 @@ session_factory = async_sessionmaker(
 )
 
 
+def pool_stats() -> dict:
+    """Current state of the connection pool."""
+    pool = engine.sync_engine.pool
+
+    if not isinstance(pool, InstrumentedPool):
+        return {'pooling': False, 'status': pool.status()}
+
+    return {
+        'pooling': True,
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': dbcfg.MAX_OVERFLOW,
+        'acquisitions': pool.acquisitions,
+        'wait_total_ms': round(pool.wait_total * 1000, 3),
+        'wait_avg_ms': round(pool.wait_total * 1000 / pool.acquisitions, 3) if pool.acquisitions else 0.0,
+        'wait_max_ms': round(pool.wait_max * 1000, 3),
+    }
+
+
 async def global_init():
     """Database initialization"""
     async with engine.begin() as connection:
@@ -42,6 +103,11 @@ async def global_init():
             sys.exit(1)
 
 
+async def global_dispose():
+    """Closes pooled connections on shutdown"""
+    await engine.dispose()
+
+
 async def create_session() -> AsyncSession:
     async with session_factory() as session:
-        yield session
\ No newline at end of file
+        yield session
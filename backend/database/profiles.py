@@ -0,0 +1,83 @@
+"""
+Loader profiles.
+
+Relationships are declared with lazy='raise', so nothing is loaded implicitly.
+Each endpoint picks a named profile: ``options()`` returns the loader options
+for an entity and ``query_budget()`` is a dependency that, when
+DB_QUERY_BUDGET is enabled (test mode), fails the request if it issued more
+queries than the profile allows.
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+from backend.config import dbcfg
+from backend.database.engine import engine
+from backend.database.tables import Group
+
+
+PROFILES = {
+    # Списки: только то, что отдает API списка
+    'list': {
+        Group: (selectinload(Group.students),),
+    },
+    # Одна запись со связанными данными
+    'detail': {
+        Group: (selectinload(Group.students),),
+    },
+}
+
+# Максимальное число SQL-запросов на один запрос к API
+QUERY_BUDGETS = {
+    'list': 2,
+    # Список с ETag: плюс чтение версий таблиц (304 - только оно)
+    'versioned_list': 3,
+    # Отчеты: строки собираются одним агрегатным запросом, связи не загружаются
+    'report': 3,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Endpoint issued more queries than its load profile allows."""
+
+
+_query_counter: ContextVar[list[int] | None] = ContextVar('query_counter', default=None)
+
+
+@event.listens_for(engine.sync_engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def options(profile: str, entity) -> tuple:
+    """Loader options of ``profile`` for ``entity``."""
+    return PROFILES[profile][entity]
+
+
+def query_budget(profile: str):
+    """Dependency enforcing the query budget of ``profile`` in test mode."""
+    budget = QUERY_BUDGETS[profile]
+
+    async def dependency():
+        if not dbcfg.QUERY_BUDGET:
+            yield
+            return
+
+        counter = [0]
+        token = _query_counter.set(counter)
+        try:
+            yield
+        finally:
+            _query_counter.reset(token)
+
+        if counter[0] > budget:
+            raise QueryBudgetExceeded(
+                f"Profile '{profile}' allows {budget} queries, endpoint issued {counter[0]}"
+            )
+
+    return dependency
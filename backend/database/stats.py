@@ -0,0 +1,91 @@
+"""
+Maintenance of the exam score aggregates (``student_score_stats`` and
+``group_score_stats``, see ``backend.database.tables.exam_stats``).
+
+    python -m backend.database.stats check      # report rows that differ from exams
+    python -m backend.database.stats rebuild    # recompute both tables from exams
+
+Triggers keep the tables current; a rebuild is only needed after writes that
+bypass them (TRUNCATE, triggers disabled during a restore) or when ``check``
+reports a mismatch.
+"""
+from __future__ import annotations
+
+import sys
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.engine import session_factory, global_dispose
+from backend.database.tables.exam_stats import (
+    GROUP_KEY, FILL_STATS, EXPECTED_STUDENT_STATS, EXPECTED_GROUP_STATS
+)
+
+# Запись в exams и students блокируется на время пересборки; чтение - нет
+LOCK_SOURCES = text("LOCK TABLE exams, students IN SHARE MODE")
+
+CLEAR_STATS = [
+    text("DELETE FROM student_score_stats"),
+    text("DELETE FROM group_score_stats"),
+]
+
+_STUDENT_KEY = ['student_id', 'score']
+
+CHECKS = {
+    'student_score_stats': (_STUDENT_KEY, EXPECTED_STUDENT_STATS),
+    'group_score_stats': (GROUP_KEY, EXPECTED_GROUP_STATS),
+}
+
+
+def _diff_query(table: str, key: list[str], expected: str):
+    columns = ', '.join(key)
+    return text(f"""
+        SELECT {columns}, coalesce(x.exams, 0) AS expected, coalesce(t.exams, 0) AS actual
+        FROM (SELECT {columns}, exams FROM ({expected}) q ({columns}, exams)) x
+        FULL JOIN {table} t USING ({columns})
+        WHERE x.exams IS DISTINCT FROM t.exams
+        ORDER BY {columns}
+    """)
+
+
+async def rebuild(session: AsyncSession) -> None:
+    """Recomputes both aggregate tables from ``exams`` in one transaction."""
+    await session.execute(LOCK_SOURCES)
+    for statement in CLEAR_STATS + FILL_STATS:
+        await session.execute(statement)
+    await session.commit()
+
+
+async def check(session: AsyncSession) -> dict[str, list[dict]]:
+    """Rows of each aggregate table that differ from ``exams``, as ``{table: [row, ...]}``."""
+    mismatches = {}
+    for table, (key, expected) in CHECKS.items():
+        rows = await session.execute(_diff_query(table, key, expected))
+        mismatches[table] = [dict(row._mapping) for row in rows]
+    return mismatches
+
+
+async def _main(command: str) -> int:
+    try:
+        async with session_factory() as session:
+            if command == 'rebuild':
+                await rebuild(session)
+                print("Exam statistics rebuilt.")
+                return 0
+
+            mismatches = await check(session)
+            for table, rows in mismatches.items():
+                print(f"{table}: {len(rows)} mismatched rows")
+                for row in rows[:20]:
+                    print(f"    {row}")
+            return 1 if any(mismatches.values()) else 0
+    finally:
+        await global_dispose()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in ('check', 'rebuild'):
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(asyncio.run(_main(sys.argv[1])))
@@ -3,11 +3,21 @@ __all__ = {
     'User',
     'Student',
     'Group',
+    'ReportJob',
+    'StudentScoreStats',
+    'GroupScoreStats',
+    'TeacherGroup',
+    'TableVersion',
+    'GroupVersion',
 }
 
 from backend.database.tables.base import Base
 from backend.database.tables.user import User
 from backend.database.tables.student import Student
 from backend.database.tables.student import Group
+from backend.database.tables.report_job import ReportJob
+from backend.database.tables.exam_stats import StudentScoreStats, GroupScoreStats
+from backend.database.tables.teacher_group import TeacherGroup
+from backend.database.tables.table_version import TableVersion, GroupVersion
 
 
@@ -0,0 +1,205 @@
+"""
+Exam score aggregates maintained by the database.
+
+Both tables are score histograms: how many exams got each score, per student
+and per (group, subject, semester, year). Averages, counts, minimums and
+percentiles are derived from them without touching ``exams``.
+
+Statement-level triggers on ``exams`` fold every INSERT/UPDATE/DELETE into the
+histograms with one upsert per statement, whatever the write path (ORM, bulk
+UPDATE, COPY). Row triggers on ``students`` move a student's scores when the
+group changes and remove the exams before the student row itself disappears,
+so the group is still known. Missing keys are stored as 0 (IDs start at 1);
+exams without a score are not counted.
+
+``backend.database.stats`` rebuilds the tables and checks them against
+``exams``.
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import mapped_column, Mapped
+
+from backend.database.tables import Base
+
+
+class StudentScoreStats(Base):
+    __tablename__ = 'student_score_stats'
+    student_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    score: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    exams: Mapped[int] = mapped_column(nullable=False)
+
+    def __str__(self):
+        return f"StudentScoreStats student={self.student_id} score={self.score} exams={self.exams}"
+
+
+class GroupScoreStats(Base):
+    __tablename__ = 'group_score_stats'
+    group_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    subject_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    semester: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    year: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    score: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    exams: Mapped[int] = mapped_column(nullable=False)
+
+    def __str__(self):
+        return (
+            f"GroupScoreStats group={self.group_id} subject={self.subject_id} "
+            f"semester={self.semester} year={self.year} score={self.score} exams={self.exams}"
+        )
+
+
+GROUP_KEY = ['group_id', 'subject_id', 'semester', 'year', 'score']
+
+# Ключ group_score_stats для экзамена e студента s
+_GROUP_KEY_SQL = """
+    coalesce(s.group_id, 0), coalesce(e.subject_id, 0), coalesce(e.semester, 0),
+    coalesce(extract(year FROM e.year)::integer, 0), e.score
+"""
+
+# Эталонные агрегаты из exams: заполнение, пересборка и проверка
+EXPECTED_STUDENT_STATS = """
+    SELECT e.student_id, e.score, count(*) AS exams
+    FROM exams e
+    WHERE e.student_id IS NOT NULL AND e.score IS NOT NULL
+    GROUP BY e.student_id, e.score
+"""
+
+EXPECTED_GROUP_STATS = f"""
+    SELECT {_GROUP_KEY_SQL}, count(*) AS exams
+    FROM exams e LEFT JOIN students s ON s.id = e.student_id
+    WHERE e.score IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+FILL_STATS = [
+    text(f"INSERT INTO student_score_stats (student_id, score, exams) {EXPECTED_STUDENT_STATS}"),
+    text(f"INSERT INTO group_score_stats ({', '.join(GROUP_KEY)}, exams) {EXPECTED_GROUP_STATS}"),
+]
+
+
+def _apply_changes(changes: str) -> str:
+    """PL/pgSQL applying ``changes`` (exam columns plus ``delta`` = +1/-1) to both histograms."""
+    return f"""
+        WITH changes AS ({changes})
+        INSERT INTO student_score_stats AS t (student_id, score, exams)
+        SELECT e.student_id, e.score, sum(e.delta)
+        FROM changes e
+        WHERE e.student_id IS NOT NULL AND e.score IS NOT NULL
+        GROUP BY e.student_id, e.score
+        HAVING sum(e.delta) <> 0
+        ON CONFLICT (student_id, score) DO UPDATE SET exams = t.exams + EXCLUDED.exams;
+
+        DELETE FROM student_score_stats t
+        USING ({changes}) e
+        WHERE t.exams = 0 AND t.student_id = e.student_id AND t.score = e.score;
+
+        WITH changes AS ({changes})
+        INSERT INTO group_score_stats AS t ({', '.join(GROUP_KEY)}, exams)
+        SELECT {_GROUP_KEY_SQL}, sum(e.delta)
+        FROM changes e LEFT JOIN students s ON s.id = e.student_id
+        WHERE e.score IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+        HAVING sum(e.delta) <> 0
+        ON CONFLICT ({', '.join(GROUP_KEY)}) DO UPDATE SET exams = t.exams + EXCLUDED.exams;
+
+        DELETE FROM group_score_stats
+        WHERE exams = 0 AND ({', '.join(GROUP_KEY)}) IN (
+            SELECT {_GROUP_KEY_SQL}
+            FROM ({changes}) e LEFT JOIN students s ON s.id = e.student_id
+        );
+    """
+
+
+_EXAM_COLUMNS = 'student_id, subject_id, semester, year, score'
+
+_CHANGES = {
+    'INSERT': f"SELECT {_EXAM_COLUMNS}, 1 AS delta FROM new_rows",
+    'DELETE': f"SELECT {_EXAM_COLUMNS}, -1 AS delta FROM old_rows",
+    'UPDATE': (
+        f"SELECT {_EXAM_COLUMNS}, 1 AS delta FROM new_rows "
+        f"UNION ALL SELECT {_EXAM_COLUMNS}, -1 AS delta FROM old_rows"
+    ),
+}
+
+_TRANSITION_TABLES = {
+    'INSERT': 'NEW TABLE AS new_rows',
+    'DELETE': 'OLD TABLE AS old_rows',
+    'UPDATE': 'NEW TABLE AS new_rows OLD TABLE AS old_rows',
+}
+
+TRIGGERS = []
+for _op, _changes in _CHANGES.items():
+    TRIGGERS += [
+        text(f"""
+            CREATE OR REPLACE FUNCTION exam_stats_{_op.lower()}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                {_apply_changes(_changes)}
+                RETURN NULL;
+            END $$
+        """),
+        text(f"DROP TRIGGER IF EXISTS exam_stats_{_op.lower()} ON exams"),
+        text(f"""
+            CREATE TRIGGER exam_stats_{_op.lower()}
+            AFTER {_op} ON exams REFERENCING {_TRANSITION_TABLES[_op]}
+            FOR EACH STATEMENT EXECUTE FUNCTION exam_stats_{_op.lower()}()
+        """),
+    ]
+
+TRIGGERS += [
+    # Экзамены удаляются до студента: группа студента еще известна
+    text("""
+        CREATE OR REPLACE FUNCTION exam_stats_student_delete() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM exams WHERE student_id = OLD.id;
+            RETURN OLD;
+        END $$
+    """),
+    text("DROP TRIGGER IF EXISTS exam_stats_student_delete ON students"),
+    text("""
+        CREATE TRIGGER exam_stats_student_delete
+        BEFORE DELETE ON students
+        FOR EACH ROW EXECUTE FUNCTION exam_stats_student_delete()
+    """),
+
+    # Смена группы (в том числе SET NULL при удалении группы) переносит оценки студента
+    text(f"""
+        CREATE OR REPLACE FUNCTION exam_stats_student_group() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO group_score_stats AS t ({', '.join(GROUP_KEY)}, exams)
+            SELECT {_GROUP_KEY_SQL.replace('s.group_id', 'g.group_id')}, sum(g.delta)
+            FROM exams e
+            CROSS JOIN (VALUES (OLD.group_id, -1), (NEW.group_id, 1)) AS g (group_id, delta)
+            WHERE e.student_id = NEW.id AND e.score IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5
+            ON CONFLICT ({', '.join(GROUP_KEY)}) DO UPDATE SET exams = t.exams + EXCLUDED.exams;
+
+            DELETE FROM group_score_stats
+            WHERE exams = 0 AND group_id IN (coalesce(OLD.group_id, 0), coalesce(NEW.group_id, 0));
+            RETURN NULL;
+        END $$
+    """),
+    text("DROP TRIGGER IF EXISTS exam_stats_student_group ON students"),
+    text("""
+        CREATE TRIGGER exam_stats_student_group
+        AFTER UPDATE OF group_id ON students
+        FOR EACH ROW WHEN (OLD.group_id IS DISTINCT FROM NEW.group_id)
+        EXECUTE FUNCTION exam_stats_student_group()
+    """),
+]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _install_triggers(target, connection, tables=(), **kw):
+    if connection.dialect.name != 'postgresql':
+        return
+
+    for statement in TRIGGERS:
+        connection.execute(statement)
+
+    # Таблицы созданы только что: заполняем их по уже накопленным экзаменам
+    if StudentScoreStats.__table__ in tables:
+        connection.execute(FILL_STATS[0])
+    if GroupScoreStats.__table__ in tables:
+        connection.execute(FILL_STATS[1])
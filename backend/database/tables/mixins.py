@@ -3,10 +3,15 @@ from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
 
 
+def _now() -> datetime:
+    return datetime.now().replace(microsecond=0)
+
+
 class TimestampMixin:
+    # Вызываемые default/onupdate: время берется при каждой записи, а не при импорте модуля
     updated_at: Mapped[datetime] = mapped_column(
-        default=datetime.now().replace(microsecond=0),
-        onupdate=datetime.now().replace(microsecond=0),
+        default=_now,
+        onupdate=_now,
         nullable=False
     )
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now().replace(microsecond=0), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=_now, nullable=False)
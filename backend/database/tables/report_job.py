@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, LargeBinary, Index
+from sqlalchemy.orm import mapped_column, Mapped, deferred
+
+from backend.database.tables.base import Base
+from backend.database.tables.mixins import TimestampMixin
+
+
+class ReportJob(Base, TimestampMixin):
+    """
+    Table: Report jobs\n
+    id          - Job ID (uuid4 hex)\n
+    kind        - Report type, e.g. "group"\n
+    params      - Report parameters (JSON)\n
+    status      - queued, running, done, failed, cancelled\n
+    progress    - 0..100\n
+    result      - Rendered report, loaded only on download\n
+    expires_at  - Finished jobs are deleted after this moment
+    """
+    __tablename__ = 'report_jobs'
+    __table_args__ = (
+        Index('ix_report_jobs_status', 'status'),
+        Index('ix_report_jobs_expires_at', 'expires_at'),
+    )
+    id: Mapped[str] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    params: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    user_id: Mapped[int] = mapped_column(nullable=True)
+
+    status: Mapped[str] = mapped_column(default='queued', nullable=False)
+    progress: Mapped[int] = mapped_column(default=0, nullable=False)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    error: Mapped[str] = mapped_column(nullable=True)
+
+    filename: Mapped[str] = mapped_column(nullable=True)
+    media_type: Mapped[str] = mapped_column(nullable=True)
+    result: Mapped[bytes] = deferred(mapped_column(LargeBinary, nullable=True))
+
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(nullable=True)
+
+    def __repr__(self):
+        return f"<ReportJob id={self.id} kind={self.kind} status={self.status}>"
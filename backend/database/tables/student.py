@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, DDL, event, func, literal_column
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from sqlalchemy_serializer import SerializerMixin
 
@@ -11,6 +11,13 @@ from backend.database.tables.mixins import TimestampMixin
 
 class Student(Base, TimestampMixin, SerializerMixin):
     __tablename__ = 'students'
+    __table_args__ = (
+        # Индексы для keyset-пагинации и фильтра по группе
+        Index('ix_students_group_id_id', 'group_id', 'id'),
+        Index('ix_students_surname_id', 'surname', 'id'),
+        Index('ix_students_name_id', 'name', 'id'),
+        Index('ix_students_educational_id_id', 'educational_id', 'id'),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
     educational_id: Mapped[str] = mapped_column(nullable=False)
@@ -27,22 +34,50 @@ class Student(Base, TimestampMixin, SerializerMixin):
         ForeignKey('groups.id', ondelete="SET NULL", name="FK_student_group"),
         nullable=True
     )
-    group: Mapped[Group] = relationship(back_populates='students', lazy='selectin')
+    group: Mapped[Group] = relationship(back_populates='students', lazy='raise')
 
     # При удалении студента диплом удаляется
-    diploma: Mapped[Diploma] = relationship(back_populates='student', cascade="all, delete", lazy='selectin')
+    diploma: Mapped[Diploma] = relationship(back_populates='student', cascade="all, delete", lazy='raise')
 
     # При удалении студента экзамены удаляются
     exams: Mapped[list[Exam]] = relationship(
         back_populates='student',
         cascade="all, delete-orphan",
-        lazy='selectin'
+        lazy='raise'
     )
 
     def __str__(self):
         return f"<Student id={self.id} name={self.name}>"
 
 
+# Поисковый документ студента: "Фамилия Имя Отчество Номер_билета".
+# Константы записаны литералами, чтобы выражение в запросе совпадало
+# с выражением индекса и при подготовленных (prepared) запросах.
+student_search_document = (
+    Student.surname
+    .op('||')(literal_column("' '"))
+    .op('||')(Student.name)
+    .op('||')(literal_column("' '"))
+    .op('||')(func.coalesce(Student.lastname, literal_column("''")))
+    .op('||')(literal_column("' '"))
+    .op('||')(Student.educational_id)
+)
+
+# Триграммный GIN-индекс для поиска подстрок (ILIKE) и word_similarity
+Index(
+    'ix_students_search_trgm',
+    student_search_document.label('search_document'),
+    postgresql_using='gin',
+    postgresql_ops={'search_document': 'gin_trgm_ops'}
+)
+
+event.listen(
+    Student.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
 class Group(Base, TimestampMixin, SerializerMixin):
     __tablename__ = 'groups'
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -52,7 +87,7 @@ class Group(Base, TimestampMixin, SerializerMixin):
     students: Mapped[list[Student]] = relationship(
         back_populates="group",
         passive_deletes=True,
-        lazy='selectin'
+        lazy='raise'
     )
 
     def __str__(self):
@@ -65,9 +100,10 @@ class Diploma(Base, TimestampMixin, SerializerMixin):
 
     student_id: Mapped[int] = mapped_column(
         ForeignKey('students.id', ondelete="CASCADE", name='FK_diploma_student'),
-        nullable=True
+        nullable=True,
+        index=True
     )
-    student: Mapped[Student] = relationship(back_populates='diploma', lazy='selectin')
+    student: Mapped[Student] = relationship(back_populates='diploma', lazy='raise')
 
     assignment: Mapped[str] = mapped_column(default="", nullable=True)
     title: Mapped[bool] = mapped_column(default=False, nullable=True)
@@ -81,21 +117,27 @@ class Diploma(Base, TimestampMixin, SerializerMixin):
 
 class Exam(Base, TimestampMixin, SerializerMixin):
     __tablename__ = 'exams'
+    __table_args__ = (
+        # Фильтр ведомостей и аналитики по семестру и году
+        Index('ix_exams_semester_year', 'semester', 'year'),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
     student_id: Mapped[int] = mapped_column(
         ForeignKey('students.id', ondelete="CASCADE", name='FK_exam_student'),
-        nullable=True
+        nullable=True,
+        index=True
     )
-    student: Mapped[Student] = relationship(back_populates='exams', lazy='selectin')
+    student: Mapped[Student] = relationship(back_populates='exams', lazy='raise')
 
     subject_id: Mapped[int] = mapped_column(
         ForeignKey('subjects.id', ondelete="CASCADE", name='FK_exam_subject'),
         default="",
-        nullable=True
+        nullable=True,
+        index=True
     )
     semester: Mapped[int] = mapped_column(default=1, nullable=True)
-    year: Mapped[datetime] = mapped_column(default=datetime.now(), nullable=True)
+    year: Mapped[datetime] = mapped_column(default=datetime.now, nullable=True)
     score: Mapped[int] = mapped_column(default=0, nullable=True)
 
     def __str__(self):
@@ -0,0 +1,135 @@
+"""
+Per-table data versions for conditional GET.
+
+A statement-level trigger on every versioned table bumps its row in
+``table_versions`` on INSERT, UPDATE, DELETE and TRUNCATE, so any write path
+(ORM, bulk statements, other triggers) changes the version. Reading the
+versions is a primary-key lookup; list endpoints derive their ETag from them
+and answer If-None-Match without running the list query.
+
+The counter is transactional: a reader never sees a new version before the
+data it stands for is committed. Read the versions before the data - a
+version older than the data only costs the client one extra refetch.
+
+``group_versions`` narrows the same idea to one group: statement triggers
+with transition tables bump the counter of every group whose name,
+students, diplomas or exams a statement touched, so group reports are
+invalidated only by writes to their own group. A group never written since
+the triggers were installed has no row and reads as version 0.
+"""
+from sqlalchemy import BigInteger, event, text
+from sqlalchemy.orm import mapped_column, Mapped
+
+from backend.database.tables import Base
+
+
+class TableVersion(Base):
+    __tablename__ = 'table_versions'
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    def __str__(self):
+        return f"TableVersion table={self.table_name} version={self.version}"
+
+
+class GroupVersion(Base):
+    __tablename__ = 'group_versions'
+    group_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    def __str__(self):
+        return f"GroupVersion group={self.group_id} version={self.version}"
+
+
+VERSIONED_TABLES = ('groups', 'students', 'subjects', 'diplomas', 'exams', 'teacher_groups')
+
+TRIGGERS = [
+    text("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_versions AS t (table_name, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (table_name) DO UPDATE SET version = t.version + 1;
+            RETURN NULL;
+        END $$
+    """),
+]
+for _table in VERSIONED_TABLES:
+    TRIGGERS += [
+        text(f"DROP TRIGGER IF EXISTS {_table}_version ON {_table}"),
+        text(f"""
+            CREATE TRIGGER {_table}_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {_table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """),
+    ]
+
+# Группы, затронутые строками {rows} таблицы: имя группы, ее студенты, их дипломы и экзамены
+_AFFECTED_GROUPS = {
+    'groups': "SELECT r.id AS group_id FROM {rows} r",
+    'students': "SELECT r.group_id FROM {rows} r",
+    'diplomas': "SELECT s.group_id FROM {rows} r JOIN students s ON s.id = r.student_id",
+    'exams': "SELECT s.group_id FROM {rows} r JOIN students s ON s.id = r.student_id",
+}
+
+_TRANSITION_TABLES = {
+    'INSERT': ('NEW TABLE AS new_rows', ('new_rows',)),
+    'DELETE': ('OLD TABLE AS old_rows', ('old_rows',)),
+    'UPDATE': ('NEW TABLE AS new_rows OLD TABLE AS old_rows', ('new_rows', 'old_rows')),
+}
+
+TRIGGERS += [
+    # TRUNCATE не дает строк: меняется версия всех групп
+    text("""
+        CREATE OR REPLACE FUNCTION bump_all_group_versions() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO group_versions AS t (group_id, version)
+            SELECT id, 1 FROM groups ORDER BY id
+            ON CONFLICT (group_id) DO UPDATE SET version = t.version + 1;
+            RETURN NULL;
+        END $$
+    """),
+]
+for _table, _affected in _AFFECTED_GROUPS.items():
+    for _op, (_referencing, _rows) in _TRANSITION_TABLES.items():
+        _changes = ' UNION '.join(_affected.format(rows=rows) for rows in _rows)
+        _name = f"{_table}_group_version_{_op.lower()}"
+        TRIGGERS += [
+            # Один upsert на оператор; порядок по group_id - одинаковый порядок блокировок
+            text(f"""
+                CREATE OR REPLACE FUNCTION {_name}() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    INSERT INTO group_versions AS t (group_id, version)
+                    SELECT DISTINCT c.group_id, 1 FROM ({_changes}) c
+                    WHERE c.group_id IS NOT NULL
+                    ORDER BY c.group_id
+                    ON CONFLICT (group_id) DO UPDATE SET version = t.version + 1;
+                    RETURN NULL;
+                END $$
+            """),
+            text(f"DROP TRIGGER IF EXISTS {_name} ON {_table}"),
+            text(f"""
+                CREATE TRIGGER {_name}
+                AFTER {_op} ON {_table} REFERENCING {_referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {_name}()
+            """),
+        ]
+    TRIGGERS += [
+        text(f"DROP TRIGGER IF EXISTS {_table}_group_version_truncate ON {_table}"),
+        text(f"""
+            CREATE TRIGGER {_table}_group_version_truncate
+            AFTER TRUNCATE ON {_table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_all_group_versions()
+        """),
+    ]
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _install_triggers(target, connection, tables=(), **kw):
+    if connection.dialect.name != 'postgresql':
+        return
+
+    for statement in TRIGGERS:
+        connection.execute(statement)
@@ -0,0 +1,47 @@
+from sqlalchemy import ForeignKey, Index, event, text
+from sqlalchemy.orm import mapped_column, Mapped
+
+from backend.database.tables.base import Base
+
+
+class TeacherGroup(Base):
+    """
+    Table: Teacher - group assignments\n
+    user_id     - Teacher (users.id)\n
+    group_id    - Group the teacher is responsible for\n
+
+    Teachers see only the groups assigned here and their students.
+    When the table is first created, every existing teacher is assigned to
+    every existing group, so upgraded deployments keep the visibility they
+    had before scoping; administrators then narrow the assignments.
+    """
+    __tablename__ = 'teacher_groups'
+    __table_args__ = (
+        # Первичный ключ (user_id, group_id) обслуживает выборку групп преподавателя,
+        # этот индекс - обратный поиск и каскадное удаление групп
+        Index('ix_teacher_groups_group_id', 'group_id'),
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete="CASCADE", name="FK_teacher_group_user"),
+        primary_key=True
+    )
+    group_id: Mapped[int] = mapped_column(
+        ForeignKey('groups.id', ondelete="CASCADE", name="FK_teacher_group_group"),
+        primary_key=True
+    )
+
+    def __repr__(self):
+        return f"<TeacherGroup user_id={self.user_id} group_id={self.group_id}>"
+
+
+# Назначения при создании таблицы: 1 - TEACHER (backend.api.auth.privileges)
+BACKFILL = text("""
+    INSERT INTO teacher_groups (user_id, group_id)
+    SELECT u.id, g.id FROM users u CROSS JOIN groups g
+    WHERE u.privilege = 1
+""")
+
+
+@event.listens_for(TeacherGroup.__table__, 'after_create')
+def _backfill(target, connection, **kw):
+    connection.execute(BACKFILL)
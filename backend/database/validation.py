@@ -0,0 +1,51 @@
+"""
+Targeted existence checks.
+
+Only the requested IDs are looked up (``WHERE id = ANY(:ids)``, a single array
+parameter regardless of list length); deletes use ``RETURNING`` so that the
+mutation itself reports which rows were missing.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import Integer, select, delete, any_, literal
+from sqlalchemy.types import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _any_id(model, ids: set[int]):
+    return model.id == any_(literal(sorted(ids), ARRAY(Integer)))
+
+
+async def missing_ids(session: AsyncSession, model, ids: Iterable[int], scope=None) -> set[int]:
+    """
+    IDs from ``ids`` that have no row in ``model``'s table.
+
+    ``scope``, if given, narrows the lookup query (e.g. to rows visible to the
+    user); rows outside it are reported as missing.
+    """
+    requested = set(ids)
+    if not requested:
+        return set()
+
+    query = select(model.id).where(_any_id(model, requested))
+    if scope is not None:
+        query = scope(query)
+    found = (await session.execute(query)).scalars()
+    return requested - set(found)
+
+
+async def delete_existing(session: AsyncSession, model, ids: Iterable[int]) -> set[int]:
+    """
+    Deletes rows with ``ids`` and returns the IDs that did not exist.
+
+    Does not commit: callers roll back when the result is not empty.
+    """
+    requested = set(ids)
+    if not requested:
+        return set()
+
+    statement = delete(model).where(_any_id(model, requested)).returning(model.id)
+    deleted = (await session.execute(statement)).scalars()
+    return requested - set(deleted)
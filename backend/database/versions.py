@@ -0,0 +1,34 @@
+"""
+Reading table and group versions (see ``tables.table_version``) and hashing
+them into cache addresses and ETags.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.tables import TableVersion, GroupVersion
+
+
+def digest(*parts) -> str:
+    """Cache address (and ETag value) for the given key parts."""
+    return hashlib.sha256('\x1f'.join(map(str, parts)).encode()).hexdigest()
+
+
+async def table_versions(session: AsyncSession, tables: Sequence[str]) -> list[int]:
+    """Versions of ``tables`` in the given order, one query; never written tables are 0."""
+    rows = await session.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    )
+    versions = dict(rows.all())
+    return [versions.get(table, 0) for table in tables]
+
+
+def group_version(group_id):
+    """Version of a group's report data as a scalar subquery, to read it within another query."""
+    return func.coalesce(
+        select(GroupVersion.version).where(GroupVersion.group_id == group_id).scalar_subquery(), 0
+    )
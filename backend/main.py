@@ -3,11 +3,16 @@ from contextlib import asynccontextmanager
 import logging
 import uvicorn
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.database.engine import global_init
-from backend.api import user_router, auth_router, student_router, subject_router, group_router
+from backend.api.auth.auth import shutdown_hash_pool, token_cache
+from backend.api.auth.privileges import require, ADMIN
+from backend.database.engine import global_init, global_dispose, pool_stats
+from backend.reports import shutdown_pool
+from backend.reports.jobs import jobs
+from backend.api.exam.grades import grade_batcher
+from backend.api import user_router, auth_router, student_router, subject_router, group_router, export_router, analytics_router, exam_router
 
 
 @asynccontextmanager
@@ -15,7 +20,14 @@ async def lifespan(app: FastAPI):
     logger.info('Database initialization was started.')
     await global_init()
     logger.info('Database initialization was finished.')
+    await jobs.start()
+    await grade_batcher.start()
     yield
+    await grade_batcher.stop()
+    await jobs.stop()
+    shutdown_pool()
+    shutdown_hash_pool()
+    await global_dispose()
 
 app = FastAPI(title='Reporting System', version='0.0.1', lifespan=lifespan)
 app.include_router(user_router)
@@ -23,16 +35,30 @@ app.include_router(student_router)
 app.include_router(subject_router)
 app.include_router(group_router)
 app.include_router(auth_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(exam_router)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=['X-Total-Count', 'X-Next-After-Id', 'ETag']
 )
 logger = logging.getLogger('uvicorn.error')
 
 
+@app.get('/api/pool', tags=['System'], summary="Connection pool statistics")
+async def get_pool_stats(current_user: dict = Depends(require(ADMIN))) -> dict:
+    return pool_stats()
+
+
+@app.get('/api/token_cache', tags=['System'], summary="Verified token cache statistics")
+async def get_token_cache_stats(current_user: dict = Depends(require(ADMIN))) -> dict:
+    return token_cache.stats()
+
+
 if __name__ == '__main__':
     uvicorn.run('main:app', host='192.168.1.63', port=8000)
\ No newline at end of file
@@ -0,0 +1,11 @@
+__all__ = {
+    'render_group_report',
+    'run_in_pool',
+    'shutdown_pool',
+    'report_cache',
+    'digest'
+}
+
+from backend.reports.render import render_group_report
+from backend.reports.executor import run_in_pool, shutdown_pool
+from backend.reports.cache import report_cache, digest
@@ -0,0 +1,78 @@
+"""
+Streamed ZIP bundles of rendered reports.
+
+Reports render in the process pool, at most ``rpcfg.WORKERS`` at a time, and
+each document is written to the archive as soon as it is ready. ``zipfile``
+writes to an unseekable sink using data descriptors, so the archive is never
+held in memory as a whole.
+"""
+from __future__ import annotations
+
+import asyncio
+import zipfile
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException
+
+from backend.config import rpcfg
+from backend.reports.executor import run_in_pool
+
+
+class _Sink:
+    """Write-only file object that hands out what was written so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _render(render: Callable, report: dict) -> bytes:
+    while True:
+        try:
+            return await run_in_pool(render, report)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            # Очередь занята другими запросами: архив уже отдается, ждем места
+            await asyncio.sleep(1)
+
+
+async def stream_bundle(render: Callable, reports: list[tuple[str, dict]]) -> AsyncIterator[bytes]:
+    """Renders ``(filename, report)`` pairs with ``render`` and yields ZIP chunks in completion order."""
+    sink = _Sink()
+    pending = iter(reports)
+    running: dict[asyncio.Task, str] = {}
+
+    def start_next() -> None:
+        item = next(pending, None)
+        if item is not None:
+            filename, report = item
+            running[asyncio.create_task(_render(render, report))] = filename
+
+    for _ in range(rpcfg.WORKERS):
+        start_next()
+
+    try:
+        with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    filename = running.pop(task)
+                    archive.writestr(filename, task.result())
+                    start_next()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        for task in running:
+            task.cancel()
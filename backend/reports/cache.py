@@ -0,0 +1,92 @@
+"""
+Two-tier cache for rendered reports.
+
+Entries are addressed by the SHA-256 of a key describing the report and the
+version of the data it was built from, so a changed group simply gets a new
+address. The same digest is used as the ETag. Memory tier: LRU by item
+count. Disk tier: one file per entry, oldest files evicted once the directory
+exceeds its byte budget.
+"""
+from __future__ import annotations
+
+import os
+import asyncio
+from collections import OrderedDict
+
+from backend.config import rpcfg
+from backend.database.versions import digest
+
+
+class ReportCache:
+    def __init__(self, memory_items: int, directory: str, disk_bytes: int):
+        self.memory_items = memory_items
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.docx")
+
+    def _remember(self, key: str, content: bytes) -> None:
+        self._memory[key] = content
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # mtime служит отметкой последнего использования
+        return content
+
+    def _write_disk(self, key: str, content: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.docx'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    async def get(self, key: str) -> bytes | None:
+        content = self._memory.get(key)
+        if content is None:
+            content = await asyncio.to_thread(self._read_disk, key)
+            if content is not None:
+                self._remember(key, content)
+
+        if content is None:
+            self.misses += 1
+        else:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        return content
+
+    async def put(self, key: str, content: bytes) -> None:
+        self._remember(key, content)
+        await asyncio.to_thread(self._write_disk, key, content)
+
+
+report_cache = ReportCache(rpcfg.CACHE_MEMORY_ITEMS, rpcfg.CACHE_DIR, rpcfg.CACHE_DISK_BYTES)
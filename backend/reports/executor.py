@@ -0,0 +1,56 @@
+"""
+Bounded process pool for CPU-bound report rendering.
+
+At most ``rpcfg.WORKERS`` reports render at once and at most
+``rpcfg.QUEUE_LIMIT`` more may wait; beyond that callers get 503 instead of
+piling up work behind a busy pool.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+
+from backend.config import rpcfg
+from backend.reports.render import warm_up
+
+_pool: ProcessPoolExecutor | None = None
+_in_flight = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: дочерние процессы не наследуют event loop и соединения с БД
+        _pool = ProcessPoolExecutor(
+            max_workers=rpcfg.WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_up
+        )
+    return _pool
+
+
+async def run_in_pool(fn, *args):
+    """Runs ``fn(*args)`` in the report pool and awaits the result."""
+    global _in_flight
+    if _in_flight >= rpcfg.WORKERS + rpcfg.QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Очередь формирования отчетов переполнена, повторите позже",
+            headers={'Retry-After': '5'}
+        )
+
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _in_flight -= 1
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
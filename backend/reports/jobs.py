@@ -0,0 +1,273 @@
+"""
+Asynchronous report jobs.
+
+Jobs are rows in ``report_jobs``; the in-process queue only carries job IDs.
+A worker claims a job with an atomic ``UPDATE ... WHERE status = 'queued'``,
+so a job never runs twice even when several app processes share the table.
+On startup queued jobs (and running jobs whose lease expired) are picked up
+again; finished jobs are deleted once ``expires_at`` passes.
+
+A job submitted with a ``key`` (e.g. the cache key of the report) reuses a
+queued or running job of this process with the same kind and key instead of
+queueing a duplicate, so concurrent requests for one report render it once.
+The map of in-flight keys is per process: several app processes run at most
+one job per key each.
+
+Handlers are registered per job kind:
+``async def handler(params: dict, progress) -> (filename, media_type, content)``
+where ``await progress(percent)`` records progress.
+"""
+from __future__ import annotations
+
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import select, update, delete, or_, and_
+
+from backend.config import rpcfg
+from backend.database.engine import session_factory
+from backend.database.tables import ReportJob
+
+logger = logging.getLogger('uvicorn.error')
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class PermanentJobError(Exception):
+    """Job failure that retrying cannot fix."""
+
+
+Handler = Callable[[dict, Callable[[int], Awaitable[None]]], Awaitable[tuple[str, str, bytes]]]
+
+
+def _now() -> datetime:
+    return datetime.now().replace(microsecond=0)
+
+
+class JobManager:
+    def __init__(self, workers: int, max_retries: int, result_ttl: int, lease: int):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self._handlers: dict[str, Handler] = {}
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        self._cancelled: set[str] = set()
+        self._finished: dict[str, asyncio.Event] = {}
+        # Отложенные повторы: ссылка держит задачу до конца sleep
+        self._retries: set[asyncio.Task] = set()
+        # Выполняющиеся и ожидающие задания с ключом: (kind, key) <-> job_id
+        self._inflight: dict[tuple[str, str], str] = {}
+        self._job_keys: dict[str, tuple[str, str]] = {}
+        self._submitting = asyncio.Lock()
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+        async with session_factory() as session:
+            # Задания, брошенные упавшим процессом, возвращаются в очередь
+            await session.execute(
+                update(ReportJob)
+                .where(ReportJob.status == RUNNING, ReportJob.started_at < _now() - timedelta(seconds=self.lease))
+                .values(status=QUEUED)
+            )
+            pending = (await session.execute(
+                select(ReportJob.id, ReportJob.kind, ReportJob.params)
+                .where(ReportJob.status == QUEUED)
+                .order_by(ReportJob.created_at)
+            )).all()
+            await session.commit()
+
+        for job_id, kind, params in pending:
+            if params.get('key') is not None:
+                self._track(job_id, kind, params['key'])
+            self._queue.put_nowait(job_id)
+        if pending:
+            logger.info(f"Requeued {len(pending)} report jobs.")
+
+    async def stop(self) -> None:
+        # Задания отложенных повторов остаются queued и подхватываются при старте
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, params: dict, user_id: int | None = None, key: str | None = None) -> str:
+        """
+        Queues a job and returns its ID. With ``key``, returns the ID of a
+        queued or running job of the same kind and key if there is one.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        # Проверка и вставка под блокировкой: одновременные запросы не создают дублей
+        async with self._submitting:
+            if key is not None:
+                existing = self._inflight.get((kind, key))
+                if existing is not None:
+                    return existing
+                params = {**params, 'key': key}
+
+            job_id = uuid.uuid4().hex
+            async with session_factory() as session:
+                session.add(ReportJob(id=job_id, kind=kind, params=params, user_id=user_id))
+                await session.commit()
+
+            self._finished[job_id] = asyncio.Event()
+            if key is not None:
+                self._track(job_id, kind, key)
+
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job. Returns False if it already finished."""
+        async with session_factory() as session:
+            result = await session.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status.in_((QUEUED, RUNNING)))
+                .values(status=CANCELLED, finished_at=_now(), expires_at=self._expiry())
+            )
+            await session.commit()
+
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        self._mark_finished(job_id)
+        return result.rowcount > 0
+
+    async def wait(self, job_id: str, timeout: float) -> bool:
+        """Waits until a job submitted by this process finishes. Returns False on timeout."""
+        event = self._finished.get(job_id)
+        if event is None:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _expiry(self) -> datetime:
+        return _now() + timedelta(seconds=self.result_ttl)
+
+    def _track(self, job_id: str, kind: str, key: str) -> None:
+        self._inflight[(kind, key)] = job_id
+        self._job_keys[job_id] = (kind, key)
+
+    def _untrack(self, job_id: str) -> None:
+        inflight = self._job_keys.pop(job_id, None)
+        if inflight is not None:
+            self._inflight.pop(inflight, None)
+
+    def _mark_finished(self, job_id: str) -> None:
+        self._untrack(job_id)
+        event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _set(self, job_id: str, **values) -> None:
+        # Пишем только в выполняющееся задание: отмена не перетирается результатом
+        async with session_factory() as session:
+            await session.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == RUNNING)
+                .values(**values)
+            )
+            await session.commit()
+
+    async def _claim(self, job_id: str) -> ReportJob | None:
+        async with session_factory() as session:
+            job = (await session.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == QUEUED)
+                .values(status=RUNNING, started_at=_now(), attempts=ReportJob.attempts + 1, error=None)
+                .returning(ReportJob)
+            )).scalar_one_or_none()
+            await session.commit()
+            return job
+
+    async def _requeue_later(self, job_id: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Report job {job_id} crashed the worker: {e}.")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await self._claim(job_id)
+        if job is None:
+            self._untrack(job_id)
+            return  # уже выполнено, отменено или забрано другим процессом
+
+        async def progress(percent: int) -> None:
+            await self._set(job_id, progress=max(0, min(100, percent)))
+
+        task = asyncio.create_task(self._handlers[job.kind](job.params, progress))
+        self._running[job_id] = task
+        try:
+            filename, media_type, content = await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                raise  # остановка самого воркера
+            self._cancelled.discard(job_id)
+            return  # статус cancelled уже записан в cancel()
+        except Exception as e:
+            if job.attempts <= self.max_retries and not isinstance(e, PermanentJobError):
+                logger.info(f"Report job {job_id} failed (attempt {job.attempts}), retrying: {e}.")
+                await self._set(job_id, status=QUEUED, error=str(e))
+                retry = asyncio.create_task(self._requeue_later(job_id, 2 ** job.attempts))
+                self._retries.add(retry)
+                retry.add_done_callback(self._retries.discard)
+            else:
+                await self._set(
+                    job_id, status=FAILED, error=str(e), finished_at=_now(), expires_at=self._expiry()
+                )
+                self._mark_finished(job_id)
+            return
+        finally:
+            self._running.pop(job_id, None)
+
+        await self._set(
+            job_id, status=DONE, progress=100, filename=filename, media_type=media_type,
+            result=content, finished_at=_now(), expires_at=self._expiry()
+        )
+        self._mark_finished(job_id)
+
+    async def _janitor(self) -> None:
+        while True:
+            try:
+                async with session_factory() as session:
+                    await session.execute(
+                        delete(ReportJob).where(
+                            or_(
+                                ReportJob.expires_at < _now(),
+                                and_(ReportJob.expires_at.is_(None), ReportJob.status.in_(FINISHED))
+                            )
+                        )
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Report job cleanup failed: {e}.")
+            await asyncio.sleep(60)
+
+
+jobs = JobManager(rpcfg.JOB_WORKERS, rpcfg.JOB_MAX_RETRIES, rpcfg.JOB_RESULT_TTL, rpcfg.JOB_LEASE)
@@ -0,0 +1,155 @@
+"""
+Report rendering.
+
+Functions here are pure: they take plain data (str, tuples, dicts) and touch
+neither the database nor the event loop, so they can run in worker processes.
+
+The group report is filled from a pre-styled template. The template document
+is built once per worker process and kept parsed, together with a pristine
+copy of its body. Each render restores the body from that copy, substitutes
+the {placeholders} and clones the prototype table row at the XML level for
+every student instead of going through the python-docx cell API. The DOCX
+package (styles, settings, footer) is never re-read.
+"""
+import io
+from copy import deepcopy
+from functools import lru_cache
+
+from docx import Document
+from docx.shared import Pt, Inches
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+from docx.oxml import OxmlElement
+from docx.enum.table import WD_TABLE_ALIGNMENT
+
+# Поля строки таблицы в порядке колонок
+ROW_FIELDS = ('educational_id', 'full_name', 'topic', 'average', 'exams', 'admission')
+
+
+def _build_group_template() -> Document:
+    """Styled group report with {group}, {date} and a prototype row of {field} placeholders."""
+    doc = Document()
+
+    style = doc.styles['Normal']
+    style.font.name = 'Times New Roman'
+    style.font.size = Pt(12)
+
+    for section in doc.sections:
+        section.top_margin = Inches(0.5)
+        section.bottom_margin = Inches(0.5)
+        section.left_margin = Inches(0.7)
+        section.right_margin = Inches(0.7)
+
+    title = doc.add_paragraph()
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_run = title.add_run('ОТЧЕТ\nпо успеваемости студентов')
+    title_run.font.name = 'Times New Roman'
+    title_run.font.size = Pt(14)
+    title_run.font.bold = True
+    title.add_run('\nРТУ МИРЭА Кафедра №250')
+    title.runs[1].font.size = Pt(11.5)
+    title.runs[1].font.italic = True
+
+    doc.add_paragraph().add_run().add_break()
+
+    info = doc.add_paragraph()
+    info.add_run('Факультет: ')
+    info.add_run('   Программная инженерия   \n').font.underline = True
+    info.add_run('Направление подготовки: ')
+    info.add_run('   Вычислительная техника   \n').font.underline = True
+    info.add_run('Группа: ')
+    info.add_run('   {group}   ').font.underline = True
+    info.add_run('\t\t\t\t\tКурс: ___\n')
+
+    date_para = doc.add_paragraph()
+    date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    date_para.add_run('Дата составления: {date}')
+    date_para.runs[0].font.italic = True
+
+    doc.add_paragraph().add_run().add_break()
+
+    table = doc.add_table(rows=2, cols=len(ROW_FIELDS))
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    table.style = 'Table Grid'
+
+    columns = [
+        ('№ п/п', 0.3),
+        ('ФИО студента', 2.2),
+        ('Тема курсовой работы', 2.5),
+        ('Средний балл', 0.8),
+        ('Экзаменов', 0.8),
+        ('Допуск к защите', 1)
+    ]
+
+    hdr_cells = table.rows[0].cells
+    for i, (text, width) in enumerate(columns):
+        hdr_cells[i].text = text
+        hdr_cells[i].width = Inches(width)
+        hdr_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        hdr_cells[i].paragraphs[0].runs[0].font.bold = True
+
+        tcPr = hdr_cells[i]._tc.get_or_add_tcPr()
+        shade = OxmlElement('w:shd')
+        shade.set(qn('w:fill'), 'E6E6E6')
+        tcPr.append(shade)
+
+    # Строка-прототип: ровно один w:t на ячейку, по порядку ROW_FIELDS
+    row_cells = table.rows[1].cells
+    for i, field in enumerate(ROW_FIELDS):
+        row_cells[i].text = f'{{{field}}}'
+        if field in ('educational_id', 'average', 'exams', 'admission'):
+            row_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    footer = doc.sections[0].footer
+    footer_para = footer.paragraphs[0]
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    footer_run = footer_para.add_run('Руководитель подразделения: _________________')
+    footer_run.font.size = Pt(12)
+
+    return doc
+
+
+@lru_cache(maxsize=None)
+def _group_template() -> tuple[Document, list]:
+    """Parsed template of this process and pristine copies of its body elements."""
+    doc = _build_group_template()
+    return doc, [deepcopy(child) for child in doc.element.body]
+
+
+def warm_up() -> None:
+    """Builds the cached templates; used as the worker process initializer."""
+    _group_template()
+
+
+def render_group_report(report: dict) -> bytes:
+    """
+    Renders the group performance report and returns the DOCX file contents.
+
+    ``report`` holds ``group`` (group name), ``date`` (dd.mm.yyyy) and ``rows``:
+    tuples of (educational_id, full name, diploma topic, average score,
+    exam count, admission).
+    """
+    # Рабочий процесс рендерит по одному отчету, поэтому документ шаблона
+    # переиспользуется: тело восстанавливается из нетронутой копии
+    doc, pristine = _group_template()
+    doc.element.body[:] = [deepcopy(child) for child in pristine]
+    values = {'{group}': report['group'], '{date}': report['date']}
+
+    for paragraph in doc.paragraphs:
+        for run in paragraph.runs:
+            for placeholder, value in values.items():
+                if placeholder in run.text:
+                    run.text = run.text.replace(placeholder, str(value))
+
+    tbl = doc.tables[0]._tbl
+    prototype = tbl.tr_lst[-1]
+    for row in report['rows']:
+        tr = deepcopy(prototype)
+        for t, value in zip(tr.iter(qn('w:t')), row):
+            t.text = str(value)
+        tbl.append(tr)
+    tbl.remove(prototype)
+
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
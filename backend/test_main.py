@@ -1,31 +1,144 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+import uuid
+import zipfile
+from datetime import datetime
 from fastapi.testclient import TestClient
+
+# Запросы, превышающие лимит своего профиля загрузки, роняют тест
+os.environ.setdefault('DB_QUERY_BUDGET', 'true')
+
 from main import app
 from typing import Dict
 
-class TestAPI(unittest.TestCase):
-    def setUp(self):
-        self.client = TestClient(app)
-        self.token = None
+import numpy as np
+from docx import Document
+from openpyxl import Workbook
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
+
+from backend.api.analytics.crud import summarize
+from backend.api.auth import auth
+from backend.api.auth.auth import TokenCache, create_access_token, get_current_user
+from backend.api.exam.grades import Grade, GradeBatcher
+from backend.api.export import crud as export_crud
+from backend.config import becfg, rpcfg
+from backend.api.student import importer
+from backend.database import bulk, profiles, stats
+from backend.database.engine import engine, session_factory
+from backend.database.validation import missing_ids, delete_existing
+from backend.reports import render
+from backend.reports.jobs import jobs, PermanentJobError
+from backend.database.tables import Student, StudentScoreStats, GroupScoreStats, TeacherGroup, User
+from backend.database.tables.student import Diploma, Exam
+
+# База между запусками не очищается: уникальный суффикс для логинов и имен
+RUN = uuid.uuid4().hex[:8]
+
+
+def auth_header(user: dict) -> Dict[str, str]:
+    """Заголовок с токеном, выпущенным так же, как при входе."""
+    token = create_access_token({"id": user["id"], "login": user["login"], "privilege": user["privilege"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class APITestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Клиент в контексте: lifespan создает пул соединений, и все запросы
+        # идут в одном event loop, к которому привязаны соединения пула
+        cls.client = TestClient(app)
+        cls.client.__enter__()
+        cls.admin = cls.create_user(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    @classmethod
+    def create_user(cls, privilege: int) -> dict:
+        login = f"user_{privilege}_{uuid.uuid4().hex[:8]}"
+        response = cls.client.post("/api/user", json={
+            "login": login,
+            "password": login,
+            "name": "Test",
+            "surname": "User",
+            "lastname": "",
+            "privilege": privilege
+        })
+        assert response.status_code == 201, response.text
+        return {**response.json(), "login": login, "password": login}
 
     def _get_auth_header(self) -> Dict[str, str]:
-        if not self.token:
-            self.test_login_success()
-        return {"Authorization": f"Bearer {self.token}"}
+        return auth_header(self.admin)
+
+    def run_async(self, coro_fn, *args):
+        """Выполняет корутину в event loop приложения, где живет пул соединений."""
+        return self.client.portal.call(coro_fn, *args)
+
+    def create_student(self, surname: str, group_id: int = None, **fields) -> dict:
+        student_data = {
+            "educational_id": f"ИК{uuid.uuid4().hex[:10]}",
+            "name": "Студент",
+            "surname": surname,
+            "lastname": None,
+            "phone": None,
+            "group_id": group_id,
+            "entrance": True,
+            **fields
+        }
+        response = self.client.post("/api/student", json=student_data, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json()
+
+    def create_group(self, name: str) -> dict:
+        response = self.client.post("/api/group", json={"name": name}, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json()
+
+    def create_subject(self, name: str) -> dict:
+        response = self.client.post("/api/subject", json={"name": name}, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json()
+
+    def assign_teachers(self, group_id: int, *teachers: dict) -> None:
+        response = self.client.put("/api/group/teachers", json={
+            "group_id": group_id, "user_ids": [teacher["id"] for teacher in teachers]
+        }, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200, response.text)
+
+    def create_exam(self, student_id: int, subject_id: int, score: int, semester: int = 1, year: int = 2024) -> dict:
+        response = self.client.post("/api/exam", json={
+            "student_id": student_id,
+            "subject_id": subject_id,
+            "semester": semester,
+            "year": f"{year}-06-01T00:00:00",
+            "score": score
+        }, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 201, response.text)
+        return response.json()
 
+
+class TestAPI(APITestCase):
     def test_login_success(self):
         credentials = {
-            "login": "admin1234",
-            "password": "admin1234"
+            "login": self.admin["login"],
+            "password": self.admin["password"]
         }
         response = self.client.post("/api/oauth2/authorize", json=credentials)
         self.assertEqual(response.status_code, 200)
-        self.token = response.json()["access_token"]
-        return self.token
+        self.assertTrue(response.json()["access_token"])
 
     def test_create_user(self):
         user_data = {
-            "login": "new_user",
+            "login": f"new_user_{RUN}",
             "password": "strongpassword",
             "name": "John",
             "surname": "Doe",
@@ -39,20 +152,23 @@ class TestAPI(unittest.TestCase):
 
     def test_get_users(self):
         headers = self._get_auth_header()
-        response = self.client.get("/api/user", params={"user_id": 1}, headers=headers)
+        response = self.client.get("/api/user", params={"user_id": self.admin["id"]}, headers=headers)
         self.assertEqual(response.status_code, 200)
+        self.assertEqual([user["id"] for user in response.json()], [self.admin["id"]])
 
     def test_protected_endpoint(self):
         headers = self._get_auth_header()
-        response = self.client.get("/api/user/protected", headers=headers)
+        response = self.client.get("/api/token_cache", headers=headers)
         self.assertEqual(response.status_code, 200)
 
     def test_create_student(self):
         student_data = {
-            "educational_id": "ИК0001",
+            "educational_id": f"ИК{RUN}",
             "name": "Алиса",
             "surname": "Матвиенко",
             "lastname": None,
+            "phone": None,
+            "group_id": None,
             "entrance": True
         }
         headers = self._get_auth_header()
@@ -61,6 +177,217 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertIn("id", response.json())
 
+    def test_search_students(self):
+        surname = f"Поиск{RUN}"
+        # Частичное совпадение создано раньше: без ранжирования оно шло бы первым по id
+        partial = self.create_student(surname + "ова")
+        exact = self.create_student(surname)
+        self.create_student(f"Другой{RUN}")
+
+        headers = self._get_auth_header()
+        response = self.client.get("/api/student/search", params={"q": surname}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([student["id"] for student in response.json()], [exact["id"], partial["id"]])
+
+        response = self.client.get(
+            "/api/student/search", params={"q": exact["educational_id"]}, headers=headers
+        )
+        self.assertEqual(response.json()[0]["id"], exact["id"])
+
+    def test_export_students_csv(self):
+        group = self.create_group(f"Выгрузка{RUN}")
+        first = self.create_student(f"Выгрузка{RUN}", group_id=group["id"], lastname="Петрович", phone="+7001")
+        second = self.create_student(f"Выгрузка{RUN}, \"в кавычках\"")
+
+        headers = self._get_auth_header()
+        limit = export_crud.CHUNK_ROWS
+        # Чанк на каждую строку: ответ собирается из многих частей
+        export_crud.CHUNK_ROWS = 1
+        try:
+            response = self.client.get("/api/export/students", params={"format": "csv"}, headers=headers)
+        finally:
+            export_crud.CHUNK_ROWS = limit
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+
+        rows = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[0], ["id", "educational_id", "surname", "name", "lastname", "phone", "entrance", "group"])
+        ids = [int(row[0]) for row in rows[1:]]
+        self.assertEqual(ids, sorted(ids))
+        exported = {int(row[0]): row for row in rows[1:]}
+        self.assertEqual(exported[first["id"]], [
+            str(first["id"]), first["educational_id"], f"Выгрузка{RUN}", "Студент", "Петрович", "+7001",
+            "True", f"Выгрузка{RUN}"
+        ])
+        self.assertEqual(exported[second["id"]][2], f"Выгрузка{RUN}, \"в кавычках\"")
+        self.assertEqual(exported[second["id"]][7], "")
+
+    def test_export_exams_ndjson(self):
+        student = self.create_student(f"Выгрузка{RUN}")
+        subject = self.create_subject(f"Выгрузка{RUN}")
+        exam = self.create_exam(student["id"], subject["id"], 5, semester=2, year=2023)
+
+        response = self.client.get("/api/export/exams", params={"format": "ndjson"}, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200)
+        exported = {row["id"]: row for row in map(json.loads, response.text.splitlines())}
+        self.assertEqual(exported[exam["id"]], {
+            "id": exam["id"],
+            "student_id": student["id"],
+            "educational_id": student["educational_id"],
+            "subject_id": subject["id"],
+            "subject": f"Выгрузка{RUN}",
+            "semester": 2,
+            "year": "2023-06-01 00:00:00",
+            "score": 5
+        })
+
+    def test_export_unknown_dataset(self):
+        response = self.client.get("/api/export/grades", headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 404)
+
+    # Analytics endpoints tests
+    def test_performance_by_subject(self):
+        group = self.create_group(f"Аналитика{RUN}")
+        math = self.create_subject(f"Математика{RUN}")
+        physics = self.create_subject(f"Физика{RUN}")
+        students = [self.create_student(f"Аналитика{RUN}", group_id=group["id"]) for _ in range(5)]
+        for student, score in zip(students, (2, 3, 4, 5, 5)):
+            self.create_exam(student["id"], math["id"], score, semester=1, year=2031)
+        self.create_exam(students[0]["id"], physics["id"], 4, semester=1, year=2031)
+        # Другой семестр отфильтрован
+        self.create_exam(students[1]["id"], physics["id"], 2, semester=2, year=2031)
+
+        headers = self._get_auth_header()
+        response = self.client.get("/api/analytics/performance", params={
+            "by": "subject", "group_id": group["id"], "semester": 1, "year": 2031
+        }, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["by"], "subject")
+        items = {item["name"]: item for item in body["items"]}
+        self.assertEqual(set(items), {f"Математика{RUN}", f"Физика{RUN}"})
+
+        stats = items[f"Математика{RUN}"]
+        self.assertEqual(stats["id"], math["id"])
+        self.assertEqual((stats["count"], stats["mean"], stats["median"]), (5, 3.8, 4.0))
+        self.assertEqual(stats["percentiles"], {"p10": 2.4, "p25": 3.0, "p75": 5.0, "p90": 5.0})
+        self.assertEqual((stats["min"], stats["max"], stats["pass_rate"]), (2, 5, 0.8))
+        self.assertEqual(stats["distribution"], {"2": 1, "3": 1, "4": 1, "5": 2})
+        self.assertEqual(items[f"Физика{RUN}"]["distribution"], {"4": 1})
+
+        total = body["total"]
+        self.assertEqual((total["count"], total["mean"]), (6, 3.833))
+        self.assertEqual(total["distribution"], {"2": 1, "3": 1, "4": 2, "5": 2})
+
+    def test_summarize_matches_numpy(self):
+        rng = np.random.default_rng(17)
+        exams = {key: rng.integers(0, 6, size=rng.integers(1, 40)) for key in (3, 7, 11)}
+        # Гистограмма в перемешанном порядке, как ее отдает array_agg
+        histogram = [(key, score, int((values == score).sum())) for key, values in exams.items()
+                     for score in np.unique(values)]
+        rng.shuffle(histogram)
+        keys, scores, counts = (np.array(column, dtype=np.int64) for column in zip(*histogram))
+
+        result = summarize(keys, scores, counts, pass_score=3)
+        self.assertEqual([item["key"] for item in result], [3, 7, 11])
+        for item in result:
+            values = exams[item["key"]]
+            self.assertEqual(item["count"], len(values))
+            self.assertAlmostEqual(item["mean"], round(float(values.mean()), 3))
+            self.assertAlmostEqual(item["median"], float(np.median(values)))
+            for p in (10, 25, 75, 90):
+                self.assertAlmostEqual(item["percentiles"][f"p{p}"], float(np.percentile(values, p)))
+            self.assertEqual((item["min"], item["max"]), (values.min(), values.max()))
+            self.assertAlmostEqual(item["pass_rate"], round(float((values >= 3).mean()), 4))
+
+    # Exam endpoints tests
+    def test_get_exams(self):
+        student = self.create_student(f"Страницы{RUN}")
+        subject = self.create_subject(f"Страницы{RUN}")
+        exams = [self.create_exam(student["id"], subject["id"], score) for score in (2, 3, 4, 5, 5)]
+        headers = self._get_auth_header()
+
+        pages, after_id = [], None
+        while True:
+            params = {"student_id": student["id"], "limit": 2}
+            if after_id is not None:
+                params["after_id"] = after_id
+            response = self.client.get("/api/exam", params=params, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            pages.append([exam["id"] for exam in response.json()])
+            after_id = response.headers.get("X-Next-After-Id")
+            if after_id is None:
+                break
+            self.assertEqual(int(after_id), pages[-1][-1])
+
+        ids = [exam["id"] for exam in exams]
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:]])
+
+        # Полная последняя страница: курсор есть, следующая страница пуста
+        response = self.client.get("/api/exam", params={
+            "student_id": student["id"], "after_id": ids[1], "limit": 3
+        }, headers=headers)
+        self.assertEqual(response.headers["X-Next-After-Id"], str(ids[4]))
+        response = self.client.get("/api/exam", params={
+            "student_id": student["id"], "after_id": ids[4], "limit": 3
+        }, headers=headers)
+        self.assertEqual(response.json(), [])
+        self.assertNotIn("X-Next-After-Id", response.headers)
+
+    def test_unscored_exam_keeps_null_score(self):
+        student = self.create_student(f"Несдан{RUN}")
+        subject = self.create_subject(f"Несдан{RUN}")
+        headers = self._get_auth_header()
+        response = self.client.post("/api/exam", json={
+            "student_id": student["id"], "subject_id": subject["id"]
+        }, headers=headers)
+        self.assertEqual(response.status_code, 201, response.text)
+        self.assertIsNone(response.json()["score"])
+
+        response = self.client.get("/api/analytics/performance", params={
+            "by": "subject", "subject_id": subject["id"]
+        }, headers=headers)
+        self.assertEqual(response.json()["items"], [])
+
+    def test_gradebook_round_trip(self):
+        group = self.create_group(f"Ведомость{RUN}")
+        math, physics = self.create_subject(f"Математика{RUN}"), self.create_subject(f"Физика{RUN}")
+        first = self.create_student(f"А{RUN}", group_id=group["id"])
+        second = self.create_student(f"Б{RUN}", group_id=group["id"])
+        self.create_exam(first["id"], math["id"], 3, year=2033)
+        # Берется последний экзамен по предмету
+        self.create_exam(first["id"], math["id"], 4, year=2033)
+        self.create_exam(second["id"], physics["id"], 5, year=2033)
+        # Другой семестр в ведомость не попадает
+        self.create_exam(second["id"], math["id"], 2, semester=2, year=2033)
+        headers = self._get_auth_header()
+        params = {"group_id": group["id"], "semester": 1, "year": 2033}
+
+        response = self.client.get("/api/exam/gradebook", params=params, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        gradebook = response.json()
+        self.assertEqual([s["id"] for s in gradebook["subjects"]], [math["id"], physics["id"]])
+        self.assertEqual(
+            [(row["student_id"], row["scores"]) for row in gradebook["rows"]],
+            [(first["id"], [4, None]), (second["id"], [None, 5])]
+        )
+
+        response = self.client.put("/api/exam/gradebook", params=params, json={
+            "subject_ids": [math["id"], physics["id"]],
+            "rows": [
+                {"student_id": first["id"], "scores": [None, 3]},
+                {"student_id": second["id"], "scores": [5, 4]}
+            ]
+        }, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual((response.json()["updated"], response.json()["inserted"]), (1, 2))
+
+        response = self.client.get("/api/exam/gradebook", params=params, headers=headers)
+        self.assertEqual(
+            [row["scores"] for row in response.json()["rows"]],
+            [[4, 3], [5, 4]]
+        )
+
     # Group endpoints tests
     def test_create_group(self):
         group_data = {"name": "Group A"}
@@ -75,6 +402,45 @@ class TestAPI(unittest.TestCase):
         response = self.client.get("/api/subject", headers=headers)
         self.assertEqual(response.status_code, 200)
 
+    def test_update_and_delete_subjects(self):
+        subjects = [self.create_subject(f"Предмет{RUN}-{index}") for index in range(2)]
+        student = self.create_student(f"Предмет{RUN}")
+        exam = self.create_exam(student["id"], subjects[1]["id"], 4)
+        headers = self._get_auth_header()
+
+        response = self.client.put("/api/subject", json=[
+            {"id": subjects[0]["id"], "name": f"Переименован{RUN}"},
+            {"id": subjects[1]["id"], "name": f"Удаляемый{RUN}"}
+        ], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json(), {"status": "success", "updated": 2})
+        response = self.client.get("/api/subject", params={"subject_id": subjects[0]["id"]}, headers=headers)
+        self.assertEqual(response.json(), [{"id": subjects[0]["id"], "name": f"Переименован{RUN}"}])
+
+        response = self.client.put("/api/subject", json=[{"id": 2_000_000_000, "name": "x"}], headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.request("DELETE", "/api/subject", json=[subjects[1]["id"], 2_000_000_000], headers=headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Предметы [2000000000] не найдены")
+
+        response = self.client.request("DELETE", "/api/subject", json=[subjects[1]["id"]], headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "success", "deleted": 1})
+        response = self.client.get("/api/subject", params={"subject_id": subjects[1]["id"]}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+        # Экзамены по удаленному предмету удаляются каскадно
+        response = self.client.get("/api/exam", params={"exam_id": exam["id"]}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_subject_not_modified(self):
+        headers = self._get_auth_header()
+        response = self.client.get("/api/subject", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/subject", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
     # Negative tests
     def test_invalid_login(self):
         invalid_credentials = {
@@ -85,8 +451,1325 @@ class TestAPI(unittest.TestCase):
         self.assertNotEqual(response.status_code, 200)
 
     def test_unauthorized_access(self):
-        response = self.client.get("/api/user/protected")
+        response = self.client.get("/api/token_cache")
+        self.assertEqual(response.status_code, 401)
+
+
+class TestStudentPaging(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        group = cls.client.post("/api/group", json={"name": f"Страницы{RUN}"}, headers=auth_header(cls.admin)).json()
+        cls.group_id = group["id"]
+        cls.students = []
+        # Повторы фамилий: порядок внутри одинаковых ключей задает id
+        for surname in ("Б", "А", "В", "А", "Б", "А", "Г"):
+            response = cls.client.post("/api/student", json={
+                "educational_id": f"ИК{uuid.uuid4().hex[:10]}",
+                "name": "Студент",
+                "surname": surname,
+                "lastname": None,
+                "phone": None,
+                "group_id": cls.group_id,
+                "entrance": True
+            }, headers=auth_header(cls.admin))
+            assert response.status_code == 201, response.text
+            cls.students.append(response.json())
+
+    def walk(self, sort: str, desc: bool) -> list[int]:
+        """Проходит все страницы по X-Next-After-Id и возвращает id по порядку."""
+        params = {"group_id": self.group_id, "limit": 2, "sort": sort, "desc": desc, "with_total": True}
+        ids = []
+        while True:
+            response = self.client.get("/api/student", params=params, headers=self._get_auth_header())
+            self.assertEqual(response.status_code, 200, response.text)
+            self.assertEqual(response.headers["X-Total-Count"], str(len(self.students)))
+            ids += [student["id"] for student in response.json()]
+            if "X-Next-After-Id" not in response.headers:
+                return ids
+            params["after_id"] = int(response.headers["X-Next-After-Id"])
+            self.assertLessEqual(len(ids), len(self.students))
+
+    def test_walk_all_pages(self):
+        by_id = sorted(student["id"] for student in self.students)
+        by_surname = [s["id"] for s in sorted(self.students, key=lambda s: (s["surname"], s["id"]))]
+        for sort, desc, expected in (
+                ("id", False, by_id),
+                ("id", True, by_id[::-1]),
+                ("surname", False, by_surname),
+                ("surname", True, by_surname[::-1]),
+        ):
+            with self.subTest(sort=sort, desc=desc):
+                self.assertEqual(self.walk(sort, desc), expected)
+
+    def test_last_full_page_ends_with_empty_page(self):
+        # 7 студентов по 7 на страницу: курсор выдан, следующая страница пуста
+        response = self.client.get("/api/student", params={
+            "group_id": self.group_id, "limit": 7, "sort": "surname"
+        }, headers=self._get_auth_header())
+        after_id = response.headers["X-Next-After-Id"]
+
+        response = self.client.get("/api/student", params={
+            "group_id": self.group_id, "limit": 7, "sort": "surname", "after_id": after_id
+        }, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_unknown_cursor(self):
+        params = {"group_id": self.group_id, "sort": "surname", "after_id": 2_000_000_000}
+        response = self.client.get("/api/student", params=params, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Студент с ID 2000000000 не найден")
+
+        response = self.client.get("/api/student", params={**params, "sort": "rating"}, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 422)
+
+
+class TestUserCreation(APITestCase):
+    def bulk_payload(self, *logins: str) -> list[dict]:
+        return [
+            {"login": login, "password": f"{login}-pass", "name": "Пакет", "surname": "Пользователь", "lastname": "", "privilege": 1}
+            for login in logins
+        ]
+
+    def stored_logins(self, logins: list[str]) -> list[str]:
+        async def load():
+            async with session_factory() as session:
+                return sorted((await session.scalars(select(User.login).where(User.login.in_(logins)))).all())
+        return self.run_async(load)
+
+    def test_bulk_create(self):
+        logins = [f"bulk_{RUN}_{index}" for index in range(3)]
+        response = self.client.post("/api/user/bulk", json=self.bulk_payload(*logins), headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 201, response.text)
+        # Порядок ответа - порядок запроса
+        self.assertEqual([user["login"] for user in response.json()], logins)
+        self.assertEqual(len({user["id"] for user in response.json()}), 3)
+
+        # Пароли захешированы с солью и проверяются при входе
+        for login in logins:
+            response = self.client.post("/api/oauth2/authorize", json={"login": login, "password": f"{login}-pass"})
+            self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.post("/api/oauth2/authorize", json={"login": logins[0], "password": "wrong-pass"})
+        self.assertNotEqual(response.status_code, 200)
+
+    def test_bulk_duplicate_logins_in_payload(self):
+        login, other = f"bulk_dup_{RUN}", f"bulk_dup2_{RUN}"
+        response = self.client.post(
+            "/api/user/bulk", json=self.bulk_payload(login, other, login), headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"], f"Логины ['{login}'] повторяются в запросе")
+        self.assertEqual(self.stored_logins([login, other]), [])
+
+    def test_bulk_taken_login(self):
+        fresh = f"bulk_new_{RUN}"
+        response = self.client.post(
+            "/api/user/bulk", json=self.bulk_payload(fresh, self.admin["login"]), headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"], f"Логины ['{self.admin['login']}'] уже заняты")
+        self.assertEqual(self.stored_logins([fresh]), [])
+
+    def test_bulk_requires_admin(self):
+        teacher = self.create_user(1)
+        response = self.client.post("/api/user/bulk", json=self.bulk_payload(f"bulk_t_{RUN}"), headers=auth_header(teacher))
+        self.assertEqual(response.status_code, 403)
+
+    def test_password_hashing_in_pool(self):
+        threads = []
+        original = auth.get_password_hash
+
+        def recording(password, salt=''):
+            threads.append(threading.current_thread().name)
+            return original(password, salt)
+
+        auth.get_password_hash = recording
+        try:
+            hashed = self.run_async(auth.hash_password, "секретный пароль", "соль")
+        finally:
+            auth.get_password_hash = original
+
+        # Хеширование идет в пуле, не в потоке event loop
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("bcrypt"), threads)
+        # Стоимость берется из BCRYPT_ROUNDS
+        self.assertEqual(hashed.split("$")[2], f"{becfg.BCRYPT_ROUNDS:02d}")
+
+        self.assertTrue(self.run_async(auth.check_password, "секретный пароль", hashed, "соль"))
+        self.assertFalse(self.run_async(auth.check_password, "секретный пароль", hashed, "другая"))
+        self.assertFalse(self.run_async(auth.check_password, "другой пароль", hashed, "соль"))
+
+    def test_check_password_accepts_other_rounds(self):
+        # Хеши, созданные при другом BCRYPT_ROUNDS, остаются действительными
+        legacy = auth.bcrypt_context.hash("пароль" + "соль", rounds=4)
+        self.assertEqual(legacy.split("$")[2], "04")
+        self.assertTrue(self.run_async(auth.check_password, "пароль", legacy, "соль"))
+
+
+class TestConditionalGet(APITestCase):
+    def get_counting(self, path: str, params: dict, headers: Dict[str, str]):
+        """GET с подсчетом SQL-запросов эндпоинта."""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if profiles._query_counter.get() is not None:
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', record)
+        try:
+            return self.client.get(path, params=params, headers=headers), statements
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute', record)
+
+    def test_student_list_not_modified(self):
+        group = self.create_group(f"Условный{RUN}")
+        self.create_student(f"Условный{RUN}", group_id=group["id"])
+        headers = self._get_auth_header()
+        params = {"group_id": group["id"]}
+
+        response = self.client.get("/api/student", params=params, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        # 304 - только чтение версий, без запроса списка
+        response, statements = self.get_counting("/api/student", params, {**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(len(statements), 1, statements)
+
+        # Другие параметры и другой пользователь - другой ETag
+        response = self.client.get("/api/student", params={**params, "sort": "surname"}, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        teacher = self.create_user(1)
+        self.assign_teachers(group["id"], teacher)
+        response = self.client.get("/api/student", params=params, headers={**headers, "If-None-Match": etag})
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/student", params=params, headers={**auth_header(teacher), "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+        # Запись в студентов меняет ETag
+        self.create_student(f"Условный{RUN}", group_id=group["id"])
+        response = self.client.get("/api/student", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_group_list_not_modified(self):
+        group = self.create_group(f"Условная{RUN}")
+        teacher = self.create_user(1)
+        self.assign_teachers(group["id"], teacher)
+        headers = auth_header(teacher)
+
+        response = self.client.get("/api/group", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        response, statements = self.get_counting("/api/group", {}, {**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(statements), 1, statements)
+
+        # Переименование группы
+        response = self.client.put("/api/group", json=[{"id": group["id"], "name": f"Переименована{RUN}"}], headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.get("/api/group", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([g["name"] for g in response.json()], [f"Переименована{RUN}"])
+        etag = response.headers["ETag"]
+
+        # Снятие преподавателя с группы: teacher_groups тоже в версии
+        self.assign_teachers(group["id"])
+        response = self.client.get("/api/group", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_timestamps_set_at_write_time(self):
+        # default/onupdate вычисляются при записи, а не при импорте модуля
+        started = datetime.now().replace(microsecond=0)
+        time.sleep(1.1)
+        student = self.create_student(f"Время{RUN}")
+
+        async def timestamps():
+            async with session_factory() as session:
+                row = (await session.execute(
+                    select(Student.created_at, Student.updated_at).where(Student.id == student["id"])
+                )).one()
+                return tuple(row)
+
+        created_at, updated_at = self.run_async(timestamps)
+        self.assertGreater(created_at, started)
+        self.assertEqual(updated_at, created_at)
+
+        time.sleep(1.1)
+        response = self.client.put("/api/student", json=[{"id": student["id"], "name": "Позже", "phone": None}], headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.run_async(timestamps)[0], created_at)
+        self.assertGreater(self.run_async(timestamps)[1], created_at)
+
+
+class TestLoadProfiles(APITestCase):
+    def test_relationship_access_raises(self):
+        student = self.create_student(f"Связи{RUN}")
+
+        async def load():
+            async with session_factory() as session:
+                loaded = await session.get(Student, student["id"])
+                with self.assertRaises(InvalidRequestError):
+                    _ = loaded.group
+
+        self.run_async(load)
+
+    def test_query_budget_exceeded(self):
+        async def over_budget():
+            budget = profiles.query_budget('list')()
+            await budget.__anext__()
+            async with session_factory() as session:
+                for _ in range(profiles.QUERY_BUDGETS['list'] + 1):
+                    await session.execute(select(1))
+            with self.assertRaises(profiles.QueryBudgetExceeded):
+                await budget.__anext__()
+
+        self.run_async(over_budget)
+
+    def test_group_list_within_budget(self):
+        # Число запросов не зависит от числа групп и студентов. Список читает
+        # преподаватель: у администратора группы всех прошлых запусков, а
+        # selectin грузит студентов пачками по 500 групп
+        teacher = self.create_user(1)
+        for index in range(3):
+            group = self.create_group(f"Бюджет{RUN}-{index}")
+            self.assign_teachers(group["id"], teacher)
+            for _ in range(3):
+                self.create_student(f"Бюджет{RUN}", group_id=group["id"])
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            # Только запросы внутри эндпоинта с бюджетом, не фоновые задачи
+            if profiles._query_counter.get() is not None:
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get("/api/group", headers=auth_header(teacher))
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        # Версии таблиц, группы и студенты всех групп одним selectin-запросом
+        self.assertEqual(len(statements), profiles.QUERY_BUDGETS['versioned_list'], statements)
+        self.assertIn("table_versions", statements[0])
+        groups = {group["name"]: group for group in response.json()}
+        self.assertEqual(len(groups[f"Бюджет{RUN}-2"]["students"]), 3)
+
+
+class TestBulkUpdate(APITestCase):
+    def test_bulk_update_mixed_columns_and_chunks(self):
+        students = [self.create_student(f"Пакет{RUN}", lastname="Отчество") for _ in range(5)]
+        rows = [{"id": s["id"], "name": f"Имя{index}"} for index, s in enumerate(students[:3])]
+        # Другой набор колонок и NULL, который без cast стал бы text
+        rows += [{"id": s["id"], "surname": f"Новая{RUN}", "lastname": None} for s in students[3:]]
+
+        async def apply():
+            limit = bulk.MAX_ROWS_PER_STATEMENT
+            bulk.MAX_ROWS_PER_STATEMENT = 2
+            try:
+                async with session_factory() as session:
+                    updated = await bulk.bulk_update(session, Student, rows)
+                    await session.commit()
+            finally:
+                bulk.MAX_ROWS_PER_STATEMENT = limit
+
+            async with session_factory() as session:
+                result = await session.execute(
+                    select(Student.id, Student.name, Student.surname, Student.lastname)
+                    .where(Student.id.in_([s["id"] for s in students]))
+                    .order_by(Student.id)
+                )
+                return updated, [tuple(row) for row in result]
+
+        updated, stored = self.run_async(apply)
+        self.assertEqual(updated, 5)
+        self.assertEqual(stored, [
+            (students[0]["id"], "Имя0", f"Пакет{RUN}", "Отчество"),
+            (students[1]["id"], "Имя1", f"Пакет{RUN}", "Отчество"),
+            (students[2]["id"], "Имя2", f"Пакет{RUN}", "Отчество"),
+            (students[3]["id"], "Студент", f"Новая{RUN}", None),
+            (students[4]["id"], "Студент", f"Новая{RUN}", None),
+        ])
+
+    def test_update_students_reports_missing_sorted(self):
+        student = self.create_student(f"Пакет{RUN}")
+        headers = self._get_auth_header()
+        response = self.client.put("/api/student", json=[
+            {"id": student["id"], "name": "Обновлено", "phone": "+7000"}
+        ], headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 1)
+
+        response = self.client.put("/api/student", json=[
+            {"id": 2_000_000_002, "phone": None}, {"id": 2_000_000_001, "phone": None}
+        ], headers=headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Студенты с ID [2000000001, 2000000002] не найдены")
+
+
+class TestExistenceChecks(APITestCase):
+    def test_missing_ids_single_query(self):
+        students = [self.create_student(f"Наличие{RUN}") for _ in range(2)]
+        requested = [s["id"] for s in students] + list(range(2_000_000_000, 2_000_000_500))
+
+        async def check():
+            counter = [0]
+            token = profiles._query_counter.set(counter)
+            try:
+                async with session_factory() as session:
+                    missing = await missing_ids(session, Student, requested)
+                    scoped = await missing_ids(
+                        session, Student, [s["id"] for s in students],
+                        lambda query: query.where(Student.id != students[0]["id"])
+                    )
+            finally:
+                profiles._query_counter.reset(token)
+            return missing, scoped, counter[0]
+
+        missing, scoped, queries = self.run_async(check)
+        self.assertEqual(missing, set(range(2_000_000_000, 2_000_000_500)))
+        # Строки вне scope считаются отсутствующими
+        self.assertEqual(scoped, {students[0]["id"]})
+        # Одна проверка - один запрос, независимо от числа ID
+        self.assertEqual(queries, 2)
+
+    def test_delete_existing_returns_missing(self):
+        students = [self.create_student(f"Удаление{RUN}") for _ in range(2)]
+
+        async def delete():
+            async with session_factory() as session:
+                missing = await delete_existing(session, Student, [students[0]["id"], 2_000_000_000])
+                await session.commit()
+            async with session_factory() as session:
+                left = await missing_ids(session, Student, [s["id"] for s in students])
+            return missing, left
+
+        missing, left = self.run_async(delete)
+        self.assertEqual(missing, {2_000_000_000})
+        self.assertEqual(left, {students[0]["id"]})
+
+    def test_delete_with_missing_id_rolls_back(self):
+        student = self.create_student(f"Удаление{RUN}")
+        response = self.client.request(
+            "DELETE", "/api/student", json=[student["id"], 2_000_000_000], headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Студенты с ID [2000000000] не найдены")
+
+        async def exists():
+            async with session_factory() as session:
+                return not await missing_ids(session, Student, [student["id"]])
+
+        self.assertTrue(self.run_async(exists))
+
+
+class TestStudentImport(APITestCase):
+    def test_import_then_list(self):
+        group = self.create_group(f"Импорт{RUN}")
+        existing = self.create_student(f"Импорт{RUN}", lastname="Старое")
+        csv_data = (
+            "educational_id,name,surname,lastname,phone,group,entrance\n"
+            f"{existing['educational_id']},Мария,Обновлена{RUN},,,Импорт{RUN},да\n"
+            f"ИМ{RUN}1,Петр,Новый{RUN},,,Импорт{RUN},нет\n"
+            f"ИМ{RUN}2,Анна,Новая{RUN},Ивановна,+7000,Импорт{RUN},\n"
+            f"ИМ{RUN}3,Олег,Без группы,,,Нет такой{RUN},\n"
+            f"ИМ{RUN}1,Петр,Повтор{RUN},,,Импорт{RUN},нет\n"
+            f",Пустой,Номер,,,,\n"
+        ).encode()
+        headers = self._get_auth_header()
+        response = self.client.post(
+            "/api/student/import", files={"file": ("students.csv", csv_data, "text/csv")}, headers=headers
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        result = response.json()
+        self.assertEqual((result["rows"], result["inserted"], result["updated"]), (6, 2, 1))
+        self.assertEqual([error["row"] for error in result["errors"]], [3, 5, 7])
+
+        response = self.client.get("/api/student", params={"group_id": group["id"]}, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        rows = {student["educational_id"]: student for student in response.json()}
+        self.assertEqual(set(rows), {existing["educational_id"], f"ИМ{RUN}1", f"ИМ{RUN}2"})
+        self.assertEqual(rows[existing["educational_id"]]["surname"], f"Обновлена{RUN}")
+        self.assertEqual(rows[existing["educational_id"]]["lastname"], "")
+        self.assertEqual(rows[f"ИМ{RUN}1"]["surname"], f"Повтор{RUN}")
+        self.assertEqual((rows[f"ИМ{RUN}1"]["lastname"], rows[f"ИМ{RUN}1"]["phone"]), ("", ""))
+        self.assertEqual((rows[f"ИМ{RUN}2"]["lastname"], rows[f"ИМ{RUN}2"]["phone"]), ("Ивановна", "+7000"))
+        self.assertTrue(rows[existing["educational_id"]]["entrance"])
+        self.assertEqual(rows[f"ИМ{RUN}2"]["group"], f"Импорт{RUN}")
+
+    def test_import_xlsx(self):
+        group = self.create_group(f"ИмпортXLSX{RUN}")
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Educational_ID", "Name", "Surname", "Lastname", "Phone", "Group", "Entrance"])
+        sheet.append([f"ИX{RUN}1", "Ирина", f"Таблица{RUN}", "Петровна", None, f"ИмпортXLSX{RUN}", True])
+        sheet.append([None, None, None, None, None, None, None])
+        # Числа из ячеек приходят строками
+        sheet.append([f"ИX{RUN}2", "Игорь", f"Таблица{RUN}", None, 79001234567, f"ИмпортXLSX{RUN}", False])
+        sheet.append([f"ИX{RUN}3", None, f"Таблица{RUN}", None, None, None, None])
+        data = io.BytesIO()
+        workbook.save(data)
+
+        headers = self._get_auth_header()
+        limit = importer.CHUNK_ROWS
+        # Несколько переходов в поток на одном файле
+        importer.CHUNK_ROWS = 1
+        try:
+            response = self.client.post("/api/student/import", files={"file": (
+                "students.xlsx", data.getvalue(),
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )}, headers=headers)
+        finally:
+            importer.CHUNK_ROWS = limit
+        self.assertEqual(response.status_code, 200, response.text)
+        result = response.json()
+        self.assertEqual((result["rows"], result["inserted"], result["updated"]), (3, 2, 0))
+        self.assertEqual([error["row"] for error in result["errors"]], [5])
+
+        response = self.client.get("/api/student", params={"group_id": group["id"]}, headers=headers)
+        rows = {student["educational_id"]: student for student in response.json()}
+        self.assertEqual(set(rows), {f"ИX{RUN}1", f"ИX{RUN}2"})
+        self.assertEqual((rows[f"ИX{RUN}1"]["lastname"], rows[f"ИX{RUN}1"]["entrance"]), ("Петровна", True))
+        self.assertEqual((rows[f"ИX{RUN}2"]["phone"], rows[f"ИX{RUN}2"]["entrance"]), ("79001234567", False))
+
+    def test_import_csv_not_utf8(self):
+        csv_data = (
+            "educational_id,name,surname,lastname,phone,group,entrance\n"
+            f"ИК{RUN}cp,Мария,Кодировка{RUN},,,,\n"
+        ).encode("cp1251")
+        response = self.client.post(
+            "/api/student/import", files={"file": ("students.csv", csv_data, "text/csv")},
+            headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 415, response.text)
+
+        # Ничего не загружено, соединение пригодно для следующего запроса
+        response = self.client.get("/api/student/search", params={"q": f"Кодировка{RUN}"}, headers=self._get_auth_header())
+        self.assertEqual(response.json(), [])
+
+
+class TestGroupReport(APITestCase):
+    def test_report_rendered_in_memory(self):
+        group = self.create_group(f"Отчет{RUN}")
+        student = self.create_student(f"Отчет{RUN}", group_id=group["id"], lastname="Иванович")
+
+        response = self.client.get(
+            "/api/user/get_report", params={"group_id": group["id"]}, headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(int(response.headers["content-length"]), len(response.content))
+        self.assertIn(f"Otchet_Gruppa_{group['id']}_", response.headers["content-disposition"])
+
+        document = Document(io.BytesIO(response.content))
+        rows = [[cell.text for cell in row.cells] for row in document.tables[0].rows]
+        self.assertEqual(rows[1:], [[
+            student["educational_id"], f"Отчет{RUN} Студент Иванович", "Не определена", "-", "0", "Нет"
+        ]])
+        self.assertTrue(any(f"Отчет{RUN}" in paragraph.text for paragraph in document.paragraphs))
+
+        # Отчет не проходит через временные файлы
+        leftovers = [name for name in os.listdir(tempfile.gettempdir()) if name.startswith(f"Otchet_Gruppa_{group['id']}_")]
+        self.assertEqual(leftovers, [])
+
+    def test_report_admission(self):
+        group = self.create_group(f"Допуск{RUN}")
+        subject = self.create_subject(f"Допуск{RUN}")
+        passing = rpcfg.PASS_SCORE
+        # (диплом с темой, оценки, ожидаемый допуск)
+        cases = [
+            (True, [passing + 1, passing + 2], "Да"),
+            (True, [passing], "Да"),                    # ровно проходной балл
+            (True, [passing + 2, passing - 1], "Нет"),  # одна оценка ниже проходного
+            (True, [], "Нет"),                          # ни одного экзамена
+            (False, [passing + 2], "Нет"),              # тема не утверждена
+            (None, [passing + 2], "Нет"),               # диплома нет
+        ]
+        students = [self.create_student(f"Допуск{RUN}", group_id=group["id"]) for _ in cases]
+        for student, (_, scores, _) in zip(students, cases):
+            for score in scores:
+                self.create_exam(student["id"], subject["id"], score)
+
+        async def add_diplomas():
+            async with session_factory() as session:
+                session.add_all([
+                    Diploma(student_id=student["id"], title=title)
+                    for student, (title, _, _) in zip(students, cases) if title is not None
+                ])
+                await session.commit()
+
+        self.run_async(add_diplomas)
+
+        response = self.client.get(
+            "/api/user/get_report", params={"group_id": group["id"]}, headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        rows = [[cell.text for cell in row.cells] for row in Document(io.BytesIO(response.content)).tables[0].rows[1:]]
+        self.assertEqual([row[0] for row in rows], [student["educational_id"] for student in students])
+        self.assertEqual([row[5] for row in rows], [admitted for _, _, admitted in cases])
+        self.assertEqual([row[4] for row in rows], [str(len(scores)) for _, scores, _ in cases])
+
+    def test_report_etag_changes_after_same_second_regrade(self):
+        group = self.create_group(f"Отчет{RUN}")
+        student = self.create_student(f"Отчет{RUN}", group_id=group["id"])
+        subject = self.create_subject(f"Отчет{RUN}")
+        exam = self.create_exam(student["id"], subject["id"], 3)
+        headers = self._get_auth_header()
+        params = {"group_id": group["id"]}
+
+        response = self.client.get("/api/user/get_report", params=params, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/user/get_report", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        # Переоценка в ту же секунду: updated_at остается прежним, версия - меняется
+        async def updated_at():
+            async with session_factory() as session:
+                return await session.scalar(select(Exam.updated_at).where(Exam.id == exam["id"]))
+
+        async def pin(value):
+            async with session_factory() as session:
+                await session.execute(update(Exam).where(Exam.id == exam["id"]).values(updated_at=value))
+                await session.commit()
+
+        graded_at = self.run_async(updated_at)
+        response = self.client.put("/api/exam", json=[{"id": exam["id"], "score": 5}], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.run_async(pin, graded_at)
+
+        response = self.client.get("/api/user/get_report", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        row = [cell.text for cell in Document(io.BytesIO(response.content)).tables[0].rows[1].cells]
+        self.assertEqual(row[3:5], ["5.00", "1"])
+
+    def test_report_etag_ignores_other_groups(self):
+        group, other = self.create_group(f"Отчет{RUN}"), self.create_group(f"Соседняя{RUN}")
+        student = self.create_student(f"Отчет{RUN}", group_id=group["id"])
+        neighbour = self.create_student(f"Соседняя{RUN}", group_id=other["id"])
+        subject = self.create_subject(f"Отчет{RUN}")
+        headers = self._get_auth_header()
+        params = {"group_id": group["id"]}
+
+        response = self.client.get("/api/user/get_report", params=params, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        etag = response.headers["ETag"]
+
+        # Записи в другую группу: оценка, студенты, имя группы
+        self.create_exam(neighbour["id"], subject["id"], 4)
+        self.create_student(f"Соседняя{RUN}", group_id=other["id"])
+        response = self.client.put("/api/student", json=[{"id": neighbour["id"], "name": "Другое", "phone": None}], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.put("/api/group", json=[{"id": other["id"], "name": f"Переименована{RUN}"}], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+
+        response = self.client.get("/api/user/get_report", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        # Студент переходит в группу: ее отчет меняется
+        response = self.client.put("/api/student", json=[{"id": neighbour["id"], "group_id": group["id"], "phone": None}], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.get("/api/user/get_report", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        # Оценка своему студенту тоже
+        self.create_exam(student["id"], subject["id"], 5)
+        response = self.client.get("/api/user/get_report", params=params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(Document(io.BytesIO(response.content)).tables[0].rows), 3)
+
+    def test_report_bundle(self):
+        groups = [self.create_group(f"Архив{RUN}/{index}") for index in range(2)]
+        students = [self.create_student(f"Архив{RUN}", group_id=group["id"]) for group in groups]
+        empty = self.create_group(f"Архив{RUN}-пустая")
+
+        response = self.client.get(
+            "/api/user/report_bundle",
+            params={"group_ids": [group["id"] for group in groups] + [empty["id"]]},
+            headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.headers["content-type"], "application/zip")
+
+        with zipfile.ZipFile(io.BytesIO(response.content)) as bundle:
+            # Группа без студентов в архив не попадает; "/" в имени заменяется
+            self.assertEqual(
+                sorted(bundle.namelist()),
+                sorted(f"Архив{RUN}_{index}_{group['id']}.docx" for index, group in enumerate(groups))
+            )
+            for index, (group, student) in enumerate(zip(groups, students)):
+                document = Document(io.BytesIO(bundle.read(f"Архив{RUN}_{index}_{group['id']}.docx")))
+                self.assertEqual(document.tables[0].rows[1].cells[0].text, student["educational_id"])
+
+    def test_report_bundle_unknown_group(self):
+        response = self.client.get(
+            "/api/user/report_bundle", params={"group_ids": [2_000_000_000]}, headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"], "Группы [2000000000] не найдены")
+
+    def test_template_reused_between_renders(self):
+        first = render.render_group_report({
+            'group': 'Первая', 'date': '01.09.2024', 'rows': [('ИК1', 'А Б В', 'Тема', 4.5, 2, 'Да')] * 3
+        })
+        parses = render._group_template.cache_info().misses
+        second = render.render_group_report({
+            'group': 'Вторая', 'date': '02.09.2024', 'rows': [('ИК2', 'Г Д Е', 'Не определена', '-', 0, 'Нет')]
+        })
+        self.assertEqual(render._group_template.cache_info().misses, parses)
+
+        document = Document(io.BytesIO(second))
+        text = "\n".join(paragraph.text for paragraph in document.paragraphs)
+        self.assertIn("Вторая", text)
+        self.assertIn("02.09.2024", text)
+        self.assertNotIn("Первая", text)
+        self.assertEqual(
+            [[cell.text for cell in row.cells] for row in document.tables[0].rows[1:]],
+            [["ИК2", "Г Д Е", "Не определена", "-", "0", "Нет"]]
+        )
+        self.assertEqual(len(Document(io.BytesIO(first)).tables[0].rows), 4)
+
+    def test_report_for_empty_group(self):
+        group = self.create_group(f"Отчет{RUN}")
+        response = self.client.get(
+            "/api/user/get_report", params={"group_id": group["id"]}, headers=self._get_auth_header()
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TestReportJobs(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.teacher = cls.create_user(1)
+        cls.other_teacher = cls.create_user(1)
+
+    def wait_job(self, job_id: str, headers: Dict[str, str], timeout: float = 30) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.client.get(f"/api/user/report_jobs/{job_id}", headers=headers)
+            self.assertEqual(response.status_code, 200, response.text)
+            job = response.json()
+            if job["status"] not in ("queued", "running") or time.monotonic() > deadline:
+                return job
+            time.sleep(0.1)
+
+    def submit(self, kind: str, params: dict, user: dict) -> str:
+        async def submit():
+            return await jobs.submit(kind, params, user["id"])
+        return self.run_async(submit)
+
+    def test_job_visible_to_owner_and_admin_only(self):
+        group = self.create_group(f"Задание{RUN}")
+        self.create_student(f"Задание{RUN}", group_id=group["id"])
+        self.assign_teachers(group["id"], self.teacher, self.other_teacher)
+        owner = auth_header(self.teacher)
+        stranger = auth_header(self.other_teacher)
+
+        response = self.client.post("/api/user/report_jobs", params={"group_id": group["id"]}, headers=owner)
+        self.assertEqual(response.status_code, 202, response.text)
+        job_id = response.json()["id"]
+
+        job = self.wait_job(job_id, owner)
+        self.assertEqual((job["status"], job["progress"]), ("done", 100))
+
+        response = self.client.get(f"/api/user/report_jobs/{job_id}/download", headers=owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Document(io.BytesIO(response.content)).tables[0].rows[1].cells[1].text, f"Задание{RUN} Студент ")
+
+        # Чужое задание для преподавателя не существует
+        self.assertEqual(self.client.get(f"/api/user/report_jobs/{job_id}", headers=stranger).status_code, 404)
+        self.assertEqual(self.client.get(f"/api/user/report_jobs/{job_id}/download", headers=stranger).status_code, 404)
+        self.assertEqual(self.client.delete(f"/api/user/report_jobs/{job_id}", headers=stranger).status_code, 404)
+
+        self.assertEqual(self.client.get(f"/api/user/report_jobs/{job_id}", headers=self._get_auth_header()).status_code, 200)
+        # Завершенное задание отменить нельзя
+        self.assertEqual(self.client.delete(f"/api/user/report_jobs/{job_id}", headers=owner).status_code, 409)
+
+    def test_guest_cannot_poll_jobs(self):
+        guest = auth_header({"id": self.teacher["id"], "login": "guest", "privilege": 0})
+        response = self.client.get(f"/api/user/report_jobs/{uuid.uuid4().hex}", headers=guest)
+        self.assertEqual(response.status_code, 403)
+
+    def test_cancel_running_job(self):
+        started = []
+
+        async def block(params, progress):
+            started.append(params)
+            await asyncio.sleep(60)
+
+        jobs.register('test_block', block)
+        job_id = self.submit('test_block', {}, self.teacher)
+        owner = auth_header(self.teacher)
+
+        deadline = time.monotonic() + 10
+        while not started and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        response = self.client.delete(f"/api/user/report_jobs/{job_id}", headers=owner)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.wait_job(job_id, owner)["status"], "cancelled")
+        self.assertEqual(self.client.get(f"/api/user/report_jobs/{job_id}/download", headers=owner).status_code, 409)
+
+    def test_failed_job_is_retried(self):
+        calls = []
+
+        async def flaky(params, progress):
+            calls.append(params)
+            if len(calls) == 1:
+                raise RuntimeError("temporary")
+            return "flaky.txt", "text/plain", b"ok"
+
+        jobs.register('test_flaky', flaky)
+        job_id = self.submit('test_flaky', {"n": 1}, self.teacher)
+        owner = auth_header(self.teacher)
+
+        # Повтор ждет в отложенной задаче, на которую держится ссылка
+        deadline = time.monotonic() + 10
+        while not jobs._retries and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(len(jobs._retries), 1)
+
+        job = self.wait_job(job_id, owner)
+        self.assertEqual((job["status"], job["attempts"]), ("done", 2))
+        self.assertEqual(jobs._retries, set())
+        response = self.client.get(f"/api/user/report_jobs/{job_id}/download", headers=owner)
+        self.assertEqual(response.content, b"ok")
+
+    def test_submit_with_key_reuses_inflight_job(self):
+        release = asyncio.Event()
+
+        async def block(params, progress):
+            await release.wait()
+            return "block.txt", "text/plain", b"ok"
+
+        jobs.register('test_keyed', block)
+        key = uuid.uuid4().hex
+
+        async def submit_many():
+            return await asyncio.gather(*(
+                jobs.submit('test_keyed', {}, self.teacher["id"], key=key) for _ in range(5)
+            ))
+
+        job_ids = self.run_async(submit_many)
+        self.assertEqual(len(set(job_ids)), 1)
+
+        # Завершенное задание не переиспользуется
+        self.client.portal.call(release.set)
+        self.assertEqual(self.wait_job(job_ids[0], auth_header(self.teacher))["status"], "done")
+        self.assertNotEqual(self.run_async(submit_many)[0], job_ids[0])
+
+    def test_concurrent_report_requests_share_job(self):
+        group = self.create_group(f"Общее{RUN}")
+        self.create_student(f"Общее{RUN}", group_id=group["id"])
+        self.assign_teachers(group["id"], self.teacher, self.other_teacher)
+        first, second = auth_header(self.teacher), auth_header(self.other_teacher)
+
+        # Все воркеры заняты: задание на отчет остается в очереди
+        release = asyncio.Event()
+
+        async def block(params, progress):
+            await release.wait()
+            return "block.txt", "text/plain", b"ok"
+
+        jobs.register('test_busy', block)
+        for _ in range(jobs.workers):
+            self.submit('test_busy', {}, self.teacher)
+
+        wait = rpcfg.JOB_INLINE_WAIT
+        rpcfg.JOB_INLINE_WAIT = 0
+        try:
+            responses = [
+                self.client.get("/api/user/get_report", params={"group_id": group["id"]}, headers=headers)
+                for headers in (first, second, first)
+            ]
+        finally:
+            rpcfg.JOB_INLINE_WAIT = wait
+            self.client.portal.call(release.set)
+
+        self.assertEqual([response.status_code for response in responses], [202, 202, 202])
+        job_ids = {response.json()["job_id"] for response in responses}
+        self.assertEqual(len(job_ids), 1)
+        job_id = job_ids.pop()
+
+        # Общее задание видят все, кто может получить отчет; отменить - только автор
+        self.assertEqual(self.wait_job(job_id, second)["status"], "done")
+        response = self.client.get(f"/api/user/report_jobs/{job_id}/download", headers=second)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f"/api/user/report_jobs/{job_id}", headers=second).status_code, 404)
+        outsider = auth_header(self.create_user(1))
+        self.assertEqual(self.client.get(f"/api/user/report_jobs/{job_id}", headers=outsider).status_code, 404)
+
+    def test_permanent_error_is_not_retried(self):
+        async def broken(params, progress):
+            raise PermanentJobError("broken")
+
+        jobs.register('test_broken', broken)
+        job_id = self.submit('test_broken', {}, self.teacher)
+
+        job = self.wait_job(job_id, auth_header(self.teacher))
+        self.assertEqual((job["status"], job["attempts"], job["error"]), ("failed", 1, "broken"))
+
+
+class TestScoreStats(APITestCase):
+    def histograms(self, student_ids: list, group_ids: list, subject_id: int) -> tuple[dict, dict]:
+        async def load():
+            async with session_factory() as session:
+                students = await session.execute(
+                    select(StudentScoreStats.student_id, StudentScoreStats.score, StudentScoreStats.exams)
+                    .where(StudentScoreStats.student_id.in_(student_ids))
+                )
+                groups = await session.execute(
+                    select(GroupScoreStats.group_id, GroupScoreStats.score, GroupScoreStats.exams)
+                    .where(GroupScoreStats.group_id.in_(group_ids), GroupScoreStats.subject_id == subject_id)
+                )
+                return students.all(), groups.all()
+
+        students, groups = self.run_async(load)
+        by_student = {student_id: {} for student_id in student_ids}
+        for student_id, score, exams in students:
+            by_student[student_id][score] = exams
+        by_group = {group_id: {} for group_id in group_ids}
+        for group_id, score, exams in groups:
+            by_group[group_id][score] = exams
+        return by_student, by_group
+
+    def test_triggers_follow_every_write_path(self):
+        first_group, second_group = self.create_group(f"Стат{RUN}-1"), self.create_group(f"Стат{RUN}-2")
+        subject = self.create_subject(f"Стат{RUN}")
+        s1 = self.create_student(f"Стат{RUN}", group_id=first_group["id"])
+        s2 = self.create_student(f"Стат{RUN}", group_id=first_group["id"])
+        ids, groups = [s1["id"], s2["id"]], [first_group["id"], second_group["id"]]
+        headers = self._get_auth_header()
+
+        self.create_exam(s1["id"], subject["id"], 5, year=2032)
+        regraded = self.create_exam(s1["id"], subject["id"], 3, year=2032)
+        removed = self.create_exam(s2["id"], subject["id"], 5, year=2032)
+        self.assertEqual(self.histograms(ids, groups, subject["id"]), (
+            {s1["id"]: {3: 1, 5: 1}, s2["id"]: {5: 1}},
+            {first_group["id"]: {3: 1, 5: 2}, second_group["id"]: {}}
+        ))
+
+        # Пакетное UPDATE ... FROM VALUES
+        response = self.client.put("/api/exam", json=[{"id": regraded["id"], "score": 4}], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.histograms(ids, groups, subject["id"])[1][first_group["id"]], {4: 1, 5: 2})
+
+        # Перевод студента в другую группу переносит его оценки
+        response = self.client.put("/api/student", json=[
+            {"id": s1["id"], "group_id": second_group["id"], "phone": None}
+        ], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.histograms(ids, groups, subject["id"])[1], {
+            first_group["id"]: {5: 1}, second_group["id"]: {4: 1, 5: 1}
+        })
+
+        response = self.client.request("DELETE", "/api/exam", json=[removed["id"]], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        response = self.client.request("DELETE", "/api/student", json=[s1["id"]], headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.histograms(ids, groups, subject["id"]), (
+            {s1["id"]: {}, s2["id"]: {}},
+            {first_group["id"]: {}, second_group["id"]: {}}
+        ))
+
+    def test_group_delete_moves_scores_to_no_group(self):
+        group = self.create_group(f"Стат{RUN}-удаляемая")
+        subject = self.create_subject(f"Стат{RUN}")
+        student = self.create_student(f"Стат{RUN}", group_id=group["id"])
+        self.create_exam(student["id"], subject["id"], 4, year=2032)
+
+        response = self.client.delete("/api/group", params={"group_ids": [group["id"]]}, headers=self._get_auth_header())
+        self.assertEqual(response.status_code, 200, response.text)
+        # Студент остается без группы (SET NULL), оценка - под ключом 0
+        self.assertEqual(self.histograms([student["id"]], [group["id"], 0], subject["id"]), (
+            {student["id"]: {4: 1}}, {group["id"]: {}, 0: {4: 1}}
+        ))
+
+    def test_aggregates_match_exams(self):
+        student = self.create_student(f"Стат{RUN}")
+        subject = self.create_subject(f"Стат{RUN}")
+        self.create_exam(student["id"], subject["id"], 5, year=2032)
+
+        async def check():
+            async with session_factory() as session:
+                return await stats.check(session)
+
+        self.assertEqual(self.run_async(check), {"student_score_stats": [], "group_score_stats": []})
+
+    def test_summarize_merges_duplicate_rows(self):
+        keys, scores, counts = (np.array(column, dtype=np.int64) for column in ([1, 1, 1], [4, 2, 4], [1, 1, 2]))
+        [item] = summarize(keys, scores, counts, pass_score=3)
+        self.assertEqual(item["distribution"], {2: 1, 4: 3})
+        self.assertEqual((item["count"], item["median"], item["pass_rate"]), (4, 4.0, 0.75))
+
+
+class TestGradeBatcher(APITestCase):
+    def setUp(self):
+        self.student = self.create_student(f"Оценки{RUN}")
+        self.subjects = [self.create_subject(f"Оценки{RUN}-{index}")["id"] for index in range(3)]
+
+    def grade(self, subject_id: int, score: int, student_id: int = None) -> Grade:
+        return Grade(student_id or self.student["id"], subject_id, 1, 2034, score)
+
+    def scores(self) -> dict:
+        async def load():
+            async with session_factory() as session:
+                rows = await session.execute(
+                    select(Exam.subject_id, Exam.score).where(Exam.student_id == self.student["id"])
+                )
+                return dict(rows.all())
+        return self.run_async(load)
+
+    def run_batcher(self, batcher: GradeBatcher, scenario):
+        async def run():
+            await batcher.start()
+            try:
+                return await scenario()
+            finally:
+                await batcher.stop()
+        return self.run_async(run)
+
+    def test_full_batch_flushes_without_waiting(self):
+        batcher = GradeBatcher(max_rows=3, max_delay=30)
+
+        async def scenario():
+            started = time.monotonic()
+            sizes = await asyncio.gather(*(batcher.submit(self.grade(s, 4)) for s in self.subjects))
+            return sizes, time.monotonic() - started
+
+        sizes, elapsed = self.run_batcher(batcher, scenario)
+        self.assertEqual(sizes, [3, 3, 3])
+        self.assertLess(elapsed, 5)
+        self.assertEqual(batcher.stats()["batches"], 1)
+        self.assertEqual(self.scores(), dict.fromkeys(self.subjects, 4))
+
+    def test_partial_batch_flushes_after_delay(self):
+        batcher = GradeBatcher(max_rows=100, max_delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(batcher.submit(self.grade(self.subjects[0], 5)),
+                                        batcher.submit(self.grade(self.subjects[1], 3)))
+
+        self.assertEqual(self.run_batcher(batcher, scenario), [2, 2])
+        self.assertEqual(self.scores(), {self.subjects[0]: 5, self.subjects[1]: 3})
+
+    def test_writes_applied_in_arrival_order(self):
+        # Пачки по две оценки: 2 и 3 в первой пачке, 5 - во второй
+        batcher = GradeBatcher(max_rows=2, max_delay=0.05)
+        cell = self.subjects[0]
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(self.grade(cell, score)) for score in (2, 3, 5)))
+
+        self.assertEqual(self.run_batcher(batcher, scenario), [2, 2, 1])
+        self.assertEqual(batcher.stats()["batches"], 2)
+        # Ячейка одна: последняя запись побеждает, экзамен не дублируется
+        self.assertEqual(self.scores(), {cell: 5})
+
+        batcher = GradeBatcher(max_rows=10, max_delay=0.05)
+
+        async def same_batch():
+            return await asyncio.gather(*(batcher.submit(self.grade(cell, score)) for score in (4, 1)))
+
+        self.assertEqual(self.run_batcher(batcher, same_batch), [2, 2])
+        self.assertEqual(self.scores(), {cell: 1})
+
+    def test_bad_cell_does_not_reject_batch(self):
+        batcher = GradeBatcher(max_rows=3, max_delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(
+                batcher.submit(self.grade(self.subjects[0], 4)),
+                batcher.submit(self.grade(self.subjects[1], 4, student_id=2_000_000_000)),
+                batcher.submit(self.grade(self.subjects[2], 5)),
+                return_exceptions=True
+            )
+
+        first, bad, last = self.run_batcher(batcher, scenario)
+        self.assertEqual((first, last), (1, 1))
+        self.assertIsInstance(bad, IntegrityError)
+        self.assertEqual(self.scores(), {self.subjects[0]: 4, self.subjects[2]: 5})
+
+    def test_stop_flushes_queued_grades(self):
+        batcher = GradeBatcher(max_rows=100, max_delay=30)
+
+        async def scenario():
+            submitted = [asyncio.ensure_future(batcher.submit(self.grade(s, 3))) for s in self.subjects]
+            await asyncio.sleep(0)
+            await batcher.stop()
+            return await asyncio.gather(*submitted)
+
+        self.run_async(batcher.start)
+        self.assertEqual(self.run_async(scenario), [3, 3, 3])
+        self.assertEqual(self.scores(), dict.fromkeys(self.subjects, 3))
+
+    def test_enter_grade_endpoint(self):
+        headers = self._get_auth_header()
+        response = self.client.post("/api/exam/grades", json={
+            "student_id": self.student["id"], "subject_id": self.subjects[0], "semester": 1, "year": 2034, "score": 4
+        }, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.scores(), {self.subjects[0]: 4})
+
+        response = self.client.post("/api/exam/grades", json={
+            "student_id": 2_000_000_000, "subject_id": self.subjects[0], "semester": 1, "year": 2034, "score": 4
+        }, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+
+class TestTokenCache(APITestCase):
+    def test_lru_eviction(self):
+        cache = TokenCache(max_items=2)
+        exp = time.time() + 60
+        cache.put("a", {"id": 1}, exp)
+        cache.put("b", {"id": 2}, exp)
+        self.assertEqual(cache.get("a"), {"id": 1})
+        # "b" давно не использовался и вытесняется
+        cache.put("c", {"id": 3}, exp)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), ({"id": 1}, {"id": 3}))
+        self.assertEqual(cache.stats()["items"], 2)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (3, 1))
+
+    def test_expired_and_unexpiring_tokens(self):
+        cache = TokenCache(max_items=10)
+        cache.put("expired", {"id": 1}, time.time() - 1)
+        cache.put("no-exp", {"id": 2}, None)
+        self.assertIsNone(cache.get("expired"))
+        self.assertIsNone(cache.get("no-exp"))
+        self.assertEqual(cache.stats()["items"], 0)
+
+    def test_get_current_user_uses_cache(self):
+        token = create_access_token({"id": self.admin["id"], "login": self.admin["login"], "privilege": 2})
+        user = get_current_user(token)
+        # Изменение результата не портит закэшированные claims
+        user["privilege"] = 0
+        self.assertEqual(get_current_user(token)["privilege"], 2)
+
+        headers = {"Authorization": f"Bearer {token}"}
+        before = self.client.get("/api/token_cache", headers=headers).json()
+        after = self.client.get("/api/token_cache", headers=headers).json()
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_invalid_token_rejected(self):
+        response = self.client.get("/api/token_cache", headers={"Authorization": "Bearer not-a-token"})
         self.assertEqual(response.status_code, 401)
 
+
+class TestPrivileges(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.teacher = cls.create_user(1)
+        cls.guest = cls.create_user(0)
+
+    def test_system_stats_require_admin(self):
+        for path in ("/api/pool", "/api/token_cache", "/api/exam/grades/stats"):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path, headers=auth_header(self.teacher)).status_code, 403)
+                self.assertEqual(self.client.get(path).status_code, 401)
+                self.assertEqual(self.client.get(path, headers=self._get_auth_header()).status_code, 200)
+
+    def test_pool_stats(self):
+        stats = self.client.get("/api/pool", headers=self._get_auth_header()).json()
+        self.assertTrue(stats["pooling"])
+        self.assertGreater(stats["acquisitions"], 0)
+
+    def test_update_user_requires_login(self):
+        body = [{"id": self.guest["id"], "name": "Гость"}]
+        self.assertEqual(self.client.put("/api/user", json=body).status_code, 401)
+
+        response = self.client.put("/api/user", json=body, headers=auth_header(self.guest))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json(), {"status": "success", "updated": 1})
+        response = self.client.get("/api/user", params={"user_id": self.guest["id"]})
+        self.assertEqual(response.json()[0]["name"], "Гость")
+
+        # Чужую запись без прав администратора менять нельзя
+        response = self.client.put("/api/user", json=[{"id": self.teacher["id"], "name": "x"}], headers=auth_header(self.guest))
+        self.assertEqual(response.status_code, 403)
+
+    def test_guest_cannot_read_students(self):
+        response = self.client.get("/api/student", headers=auth_header(self.guest))
+        self.assertEqual(response.status_code, 403)
+
+
+class TestTeacherScoping(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.teacher = cls.create_user(1)
+        cls.outsider = cls.create_user(1)
+
+    def setUp(self):
+        self.group = self.create_group(f"Закрепленная{RUN}{uuid.uuid4().hex[:4]}")
+        self.assign_teachers(self.group["id"], self.teacher)
+        self.subject = self.create_subject(f"Скоуп{RUN}")
+        self.student = self.create_student(f"Скоуп{RUN}", group_id=self.group["id"])
+        self.exam = self.create_exam(self.student["id"], self.subject["id"], 4, year=2036)
+
+    def test_export_is_scoped(self):
+        for fmt in ("csv", "ndjson"):
+            with self.subTest(fmt=fmt):
+                response = self.client.get("/api/export/students", params={"format": fmt}, headers=auth_header(self.teacher))
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(self.student["educational_id"], response.text)
+
+                response = self.client.get("/api/export/students", params={"format": fmt}, headers=auth_header(self.outsider))
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(self.student["educational_id"], response.text)
+
+        # Без закрепленных групп в CSV остается только заголовок
+        response = self.client.get("/api/export/exams", params={"format": "csv"}, headers=auth_header(self.outsider))
+        self.assertEqual(len(list(csv.reader(io.StringIO(response.text)))), 1)
+
+    def test_exams_are_scoped(self):
+        params = {"group_id": self.group["id"]}
+        response = self.client.get("/api/exam", params=params, headers=auth_header(self.teacher))
+        self.assertEqual([exam["id"] for exam in response.json()], [self.exam["id"]])
+
+        self.assertEqual(self.client.get("/api/exam", params=params, headers=auth_header(self.outsider)).json(), [])
+        response = self.client.get("/api/exam", params={"student_id": self.student["id"]}, headers=auth_header(self.outsider))
+        self.assertEqual(response.json(), [])
+        response = self.client.get("/api/exam", params={"exam_id": self.exam["id"]}, headers=auth_header(self.outsider))
+        self.assertEqual(response.status_code, 404)
+
+    def test_gradebook_is_scoped(self):
+        params = {"group_id": self.group["id"], "semester": 1, "year": 2036}
+        response = self.client.get("/api/exam/gradebook", params=params, headers=auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual([row["student_id"] for row in response.json()["rows"]], [self.student["id"]])
+
+        response = self.client.get("/api/exam/gradebook", params=params, headers=auth_header(self.outsider))
+        self.assertEqual(response.status_code, 404)
+
+        # Пустая ведомость своей группы - не 404
+        empty = self.create_group(f"Пустая{RUN}{uuid.uuid4().hex[:4]}")
+        self.assign_teachers(empty["id"], self.teacher)
+        response = self.client.get("/api/exam/gradebook", params={**params, "group_id": empty["id"]}, headers=auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["rows"], [])
+
+    def test_students_are_scoped(self):
+        teacher, outsider = auth_header(self.teacher), auth_header(self.outsider)
+        response = self.client.get("/api/student", headers=teacher)
+        self.assertIn(self.student["id"], [student["id"] for student in response.json()])
+        response = self.client.get("/api/student", headers=outsider)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.student["id"], [student["id"] for student in response.json()])
+
+        params = {"student_id": self.student["id"]}
+        self.assertEqual(self.client.get("/api/student", params=params, headers=teacher).status_code, 200)
+        self.assertEqual(self.client.get("/api/student", params=params, headers=outsider).status_code, 404)
+
+        params = {"q": self.student["educational_id"]}
+        response = self.client.get("/api/student/search", params=params, headers=teacher)
+        self.assertEqual([student["id"] for student in response.json()], [self.student["id"]])
+        self.assertEqual(self.client.get("/api/student/search", params=params, headers=outsider).json(), [])
+
+    def test_groups_are_scoped(self):
+        teacher, outsider = auth_header(self.teacher), auth_header(self.outsider)
+        response = self.client.get("/api/group", headers=teacher)
+        self.assertIn(self.group["id"], [group["id"] for group in response.json()])
+        response = self.client.get("/api/group", headers=outsider)
+        self.assertNotIn(self.group["id"], [group["id"] for group in response.json()])
+
+        params = {"group_id": self.group["id"]}
+        response = self.client.get("/api/group", params=params, headers=teacher)
+        self.assertEqual([student["id"] for student in response.json()[0]["students"]], [self.student["id"]])
+        self.assertEqual(self.client.get("/api/group", params=params, headers=outsider).status_code, 404)
+
+    def test_reports_are_scoped(self):
+        teacher, outsider = auth_header(self.teacher), auth_header(self.outsider)
+        params = {"group_id": self.group["id"]}
+        response = self.client.get("/api/user/get_report", params=params, headers=teacher)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.client.get("/api/user/get_report", params=params, headers=outsider).status_code, 404)
+
+        params = {"group_ids": [self.group["id"]]}
+        response = self.client.get("/api/user/report_bundle", params=params, headers=teacher)
+        self.assertEqual(response.status_code, 200, response.text)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as bundle:
+            self.assertEqual(len(bundle.namelist()), 1)
+        self.assertEqual(self.client.get("/api/user/report_bundle", params=params, headers=outsider).status_code, 404)
+
+        # Без фильтра архив содержит только закрепленные группы
+        response = self.client.get("/api/user/report_bundle", headers=teacher)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as bundle:
+            self.assertIn(f"{self.group['name']}_{self.group['id']}.docx", bundle.namelist())
+        self.assertEqual(self.client.get("/api/user/report_bundle", headers=outsider).status_code, 404)
+
+    def test_teacher_sees_what_they_create(self):
+        creator = self.create_user(1)
+        headers = auth_header(creator)
+        response = self.client.post("/api/group", json={"name": f"Своя{RUN}"}, headers=headers)
+        self.assertEqual(response.status_code, 201, response.text)
+        group = response.json()
+        self.assertEqual([g["id"] for g in self.client.get("/api/group", headers=headers).json()], [group["id"]])
+
+        student = {
+            "educational_id": f"ИК{uuid.uuid4().hex[:10]}", "name": "Студент", "surname": f"Своя{RUN}",
+            "lastname": None, "phone": None, "entrance": True
+        }
+        response = self.client.post("/api/student", json={**student, "group_id": group["id"]}, headers=headers)
+        self.assertEqual(response.status_code, 201, response.text)
+        response = self.client.get("/api/student", params={"group_id": group["id"]}, headers=headers)
+        self.assertEqual([s["surname"] for s in response.json()], [f"Своя{RUN}"])
+
+        # Студент без группы или в чужой группе был бы не виден создателю
+        student["educational_id"] = f"ИК{uuid.uuid4().hex[:10]}"
+        response = self.client.post("/api/student", json={**student, "group_id": None}, headers=headers)
+        self.assertEqual(response.status_code, 422)
+        response = self.client.post("/api/student", json={**student, "group_id": self.group["id"]}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+        # Администратор не закрепляется за своими группами
+        admin_group = self.create_group(f"Админская{RUN}")
+        response = self.client.get("/api/group/teachers", params={"group_id": admin_group["id"]}, headers=self._get_auth_header())
+        self.assertEqual(response.json()["user_ids"], [])
+
+    def test_backfill_assigns_existing_teachers(self):
+        async def recreate():
+            # DDL транзакционный: таблица пересоздается и возвращается откатом
+            async with engine.connect() as connection:
+                transaction = await connection.begin()
+                try:
+                    await connection.run_sync(lambda sync: TeacherGroup.__table__.drop(sync))
+                    await connection.run_sync(lambda sync: TeacherGroup.__table__.create(sync))
+                    assigned = set((await connection.execute(
+                        select(TeacherGroup.user_id, TeacherGroup.group_id)
+                        .where(TeacherGroup.group_id == self.group["id"])
+                    )).all())
+                    admins = await connection.scalar(
+                        select(func.count()).select_from(TeacherGroup).where(TeacherGroup.user_id == self.admin["id"])
+                    )
+                finally:
+                    await transaction.rollback()
+            return assigned, admins
+
+        assigned, admins = self.run_async(recreate)
+        self.assertIn((self.teacher["id"], self.group["id"]), assigned)
+        self.assertIn((self.outsider["id"], self.group["id"]), assigned)
+        self.assertEqual(admins, 0)
+
+    def test_analytics_is_scoped(self):
+        params = {"by": "group", "year": 2036, "subject_id": self.subject["id"]}
+        response = self.client.get("/api/analytics/performance", params=params, headers=auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual([item["id"] for item in response.json()["items"]], [self.group["id"]])
+
+        response = self.client.get("/api/analytics/performance", params=params, headers=auth_header(self.outsider))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["items"], [])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file